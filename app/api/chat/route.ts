@@ -132,6 +132,45 @@ export async function POST(request: NextRequest) {
 
       console.log('Processing chat message:', { message, context, history })
 
+      // Streaming mode: relay start/delta/done events as Server-Sent Events
+      // so the answer can be shown while it is being generated
+      if (body.stream) {
+        const encoder = new TextEncoder()
+        const stream = new ReadableStream({
+          async start(controller) {
+            let finished = false
+            const send = (event: any) => {
+              finished = finished || event.type === 'done' || event.type === 'error'
+              controller.enqueue(encoder.encode(`event: ${event.type}\ndata: ${JSON.stringify(event)}\n\n`))
+            }
+            try {
+              await AIFTStandalone.chatStream(message, {
+                sessionid: 'web-chat',
+                context: context.join(', '),
+                temperature: 0.7,
+                return_json: false
+              }, send)
+            } catch (aiError) {
+              console.error('AIFT streaming chat failed:', aiError)
+              if (!finished) {
+                send({ type: 'error', success: false, error: 'AI service temporarily unavailable' })
+              }
+            }
+            controller.close()
+          }
+        })
+
+        const response = new NextResponse(stream, {
+          headers: {
+            'Content-Type': 'text/event-stream; charset=utf-8',
+            'Cache-Control': 'no-cache, no-transform',
+            'Connection': 'keep-alive'
+          }
+        })
+        const rateLimitResult = rateLimiters.chat.checkLimit(request)
+        return addRateLimitHeaders(response, rateLimitResult)
+      }
+
       // Generate AI response for regular chat using Python scripts
       let aiResponse: string
       try {
@@ -4,6 +4,7 @@ import { vectorDB } from '@/lib/rag-utils'
 import { ValidationUtils, handleValidationError } from '@/lib/validation'
 import { ApiErrorHandler } from '@/lib/error-handler'
 import { checkRateLimit, addRateLimitHeaders, rateLimiters } from '@/lib/rate-limiter'
+import { AIFTWorkerClient } from '@/lib/aift-worker'
 
 export async function GET(request: NextRequest) {
   try {
@@ -76,9 +77,23 @@ export async function GET(request: NextRequest) {
       }
     }
 
+    // Ranked matches from the Python document index, when the worker pool is running
+    let documents: any[] = []
+    if (AIFTWorkerClient.isEnabled()) {
+      try {
+        const indexResult = await AIFTWorkerClient.call({ op: 'search', question: sanitizedQuery, top_k: 10 })
+        if (indexResult?.success) {
+          documents = indexResult.results
+        }
+      } catch (indexError) {
+        console.error('Document index search failed:', indexError)
+      }
+    }
+
     const response = NextResponse.json({
       success: true,
       files,
+      documents,
       searchType,
       query: sanitizedQuery,
       totalResults: files.length
@@ -22,6 +22,7 @@ export class AIFTService {
 
   static async textqa(question: string, params: AIFTChatParams = {}): Promise<string> {
     try {
+      const startedAt = Date.now()
       console.log('Calling AIFT textqa with:', { question, params })
       
       // Use AIFT standalone service (Python scripts)
@@ -37,7 +38,7 @@ export class AIFTService {
           content: response,
           temperature: params.temperature || 0.4,
           max_new_tokens: 256,
-          execution_time: '0.04'
+          execution_time: ((Date.now() - startedAt) / 1000).toFixed(2)
         })
       } else {
         return response
@@ -51,6 +52,7 @@ export class AIFTService {
 
   static async chat(message: string, params: AIFTChatParams = {}): Promise<string> {
     try {
+      const startedAt = Date.now()
       console.log('Calling AIFT chat with:', { message, params })
       
       const sessionid = params.sessionid || 'default-session'
@@ -89,7 +91,7 @@ export class AIFTService {
           context,
           content: response,
           temperature: params.temperature || 0.4,
-          execution_time: '0.04'
+          execution_time: ((Date.now() - startedAt) / 1000).toFixed(2)
         })
       } else {
         return response
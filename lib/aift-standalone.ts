@@ -1,3 +1,5 @@
+import { AIFTWorkerClient, AIFTStreamEvent } from './aift-worker'
+
 // Simple error logging without external dependency
 const logError = (error: any, context: string) => {
   const timestamp = new Date().toISOString()
@@ -16,47 +18,20 @@ export class AIFTStandalone {
 
   static async textqa(question: string, params: AIFTChatParams = {}): Promise<string> {
     try {
+      const startedAt = Date.now()
       console.log('Calling AIFT standalone textqa with:', { question, params })
       
-      // Call Python script file
-      const { spawn } = await import('child_process')
-      const path = await import('path')
-      
-      // Path to the Python script
-      const pythonScriptPath = path.default.join(process.cwd(), 'python', 'aift_textqa.py')
-      
-      // Call Python script
-      const pythonProcess = spawn('python', [
-        pythonScriptPath,
-        question,
-        params.sessionid || 'default-session',
-        params.context || '',
-        (params.temperature || 0.2).toString(),
-        (params.return_json || false).toString()
-      ])
-      
-      // Get response from Python
       let response = ''
-      let error = ''
-      
-      pythonProcess.stdout.on('data', (data: Buffer) => {
-        response += data.toString()
-      })
-      
-      pythonProcess.stderr.on('data', (data: Buffer) => {
-        error += data.toString()
-      })
-      
-      // Wait for Python process to complete
-      await new Promise<string>((resolve, reject) => {
-        pythonProcess.on('close', (code: number) => {
-          if (code === 0) {
-            resolve(response.trim())
-          } else {
-            reject(new Error(`Python process failed with code ${code}: ${error}`))
-          }
-        })
-      })
+      if (AIFTWorkerClient.isEnabled()) {
+        response = await this.callWorkerChat(question, params)
+      } else {
+        response = await this.spawnTextqa(
+          question,
+          params.sessionid || 'default-session',
+          params.context || '',
+          params
+        )
+      }
       
       console.log('AIFT standalone Python response:', { content: response })
       
@@ -67,7 +42,7 @@ export class AIFTStandalone {
           content: response,
           temperature: params.temperature || 0.4,
           max_new_tokens: 256,
-          execution_time: '0.05'
+          execution_time: ((Date.now() - startedAt) / 1000).toFixed(2)
         })
       } else {
         return response
@@ -82,6 +57,7 @@ export class AIFTStandalone {
 
   static async chat(message: string, params: AIFTChatParams = {}): Promise<string> {
     try {
+      const startedAt = Date.now()
       console.log('Calling AIFT standalone chat with:', { message, params })
       
       const sessionid = params.sessionid || 'default-session'
@@ -99,45 +75,12 @@ export class AIFTStandalone {
       }
       sessionHistory.push(`User: ${message}`)
       
-      // Call Python script file - using textqa instead of chat
-      const { spawn } = await import('child_process')
-      const path = await import('path')
-      
-      // Path to the Python script - using textqa
-      const pythonScriptPath = path.default.join(process.cwd(), 'python', 'aift_textqa.py')
-      
-      // Call Python script
-      const pythonProcess = spawn('python', [
-        pythonScriptPath,
-        message,
-        sessionid,
-        context,
-        (params.temperature || 0.2).toString(),
-        (params.return_json || false).toString()
-      ])
-      
-      // Get response from Python
       let response = ''
-      let error = ''
-      
-      pythonProcess.stdout.on('data', (data: Buffer) => {
-        response += data.toString()
-      })
-      
-      pythonProcess.stderr.on('data', (data: Buffer) => {
-        error += data.toString()
-      })
-      
-      // Wait for Python process to complete
-      await new Promise<string>((resolve, reject) => {
-        pythonProcess.on('close', (code: number) => {
-          if (code === 0) {
-            resolve(response.trim())
-          } else {
-            reject(new Error(`Python process failed with code ${code}: ${error}`))
-          }
-        })
-      })
+      if (AIFTWorkerClient.isEnabled()) {
+        response = await this.callWorkerChat(message, params)
+      } else {
+        response = await this.spawnTextqa(message, sessionid, context, params)
+      }
       
       // Add response to session history
       sessionHistory.push(`Assistant: ${response}`)
@@ -156,7 +99,7 @@ export class AIFTStandalone {
           context,
           content: response,
           temperature: params.temperature || 0.4,
-          execution_time: '0.02'
+          execution_time: ((Date.now() - startedAt) / 1000).toFixed(2)
         })
       } else {
         return response
@@ -168,6 +111,119 @@ export class AIFTStandalone {
     }
   }
 
+  // Chat with incremental output: onEvent receives start/delta/done events
+  // as the answer arrives and the promise resolves with the full answer
+  static async chatStream(
+    message: string,
+    params: AIFTChatParams,
+    onEvent: (event: AIFTStreamEvent) => void
+  ): Promise<string> {
+    const sessionid = params.sessionid || 'default-session'
+    const context = params.context || ''
+
+    if (!this.sessions.has(sessionid)) {
+      this.sessions.set(sessionid, [])
+    }
+    const sessionHistory = this.sessions.get(sessionid)!
+    if (context) {
+      sessionHistory.push(`Context: ${context}`)
+    }
+    sessionHistory.push(`User: ${message}`)
+
+    let result: any
+    if (AIFTWorkerClient.isEnabled()) {
+      result = await AIFTWorkerClient.stream({
+        op: 'chat',
+        question: message,
+        sessionid,
+        context,
+        temperature: params.temperature || 0.2,
+        return_json: params.return_json || false
+      }, onEvent)
+    } else {
+      result = await this.spawnTextqaStream(message, sessionid, context, params, onEvent)
+    }
+
+    if (!result || !result.success) {
+      throw new Error(result?.error || 'AIFT streaming chat failed')
+    }
+
+    const response = typeof result.response === 'string' ? result.response : JSON.stringify(result.response)
+    sessionHistory.push(`Assistant: ${response}`)
+    if (sessionHistory.length > 10) {
+      sessionHistory.splice(0, sessionHistory.length - 10)
+    }
+
+    return response
+  }
+
+  // Run aift_textqa.py --stream and relay its NDJSON events
+  private static async spawnTextqaStream(
+    message: string,
+    sessionid: string,
+    context: string,
+    params: AIFTChatParams,
+    onEvent: (event: AIFTStreamEvent) => void
+  ): Promise<any> {
+    const { spawn } = await import('child_process')
+    const path = await import('path')
+
+    const pythonScriptPath = path.default.join(process.cwd(), 'python', 'aift_textqa.py')
+    const pythonProcess = spawn('python', [
+      pythonScriptPath,
+      '--stream',
+      message,
+      sessionid,
+      context,
+      (params.temperature || 0.2).toString(),
+      (params.return_json || false).toString()
+    ])
+
+    let buffer = ''
+    let error = ''
+    let result: any = null
+
+    // Decode across reads: a Thai character (3 bytes in UTF-8) can be
+    // split between two chunks
+    pythonProcess.stdout.setEncoding('utf8')
+    pythonProcess.stdout.on('data', (data: string) => {
+      buffer += data
+      let newline = buffer.indexOf('\n')
+      while (newline !== -1) {
+        const line = buffer.slice(0, newline).trim()
+        buffer = buffer.slice(newline + 1)
+        newline = buffer.indexOf('\n')
+        if (!line) {
+          continue
+        }
+        try {
+          const event = JSON.parse(line) as AIFTStreamEvent
+          onEvent(event)
+          if (event.type === 'done' || event.type === 'error') {
+            result = event
+          }
+        } catch (parseError) {
+          // Not an event line (e.g. an "Error: ..." message); reported on exit
+          error += line
+        }
+      }
+    })
+
+    pythonProcess.stderr.on('data', (data: Buffer) => {
+      error += data.toString()
+    })
+
+    return new Promise<any>((resolve, reject) => {
+      pythonProcess.on('close', (code: number) => {
+        if (code === 0 && result) {
+          resolve(result)
+        } else {
+          reject(new Error(`Python process failed with code ${code}: ${error}`))
+        }
+      })
+    })
+  }
+
   // Method to clear session history
   static clearSession(sessionid: string): void {
     this.sessions.delete(sessionid)
@@ -178,6 +234,71 @@ export class AIFTStandalone {
     return this.sessions.get(sessionid) || []
   }
 
+  // Run a chat request on the warm worker pool
+  private static async callWorkerChat(message: string, params: AIFTChatParams): Promise<string> {
+    const result = await AIFTWorkerClient.call({
+      op: 'chat',
+      question: message,
+      sessionid: params.sessionid || 'default-session',
+      context: params.context || '',
+      temperature: params.temperature || 0.2,
+      return_json: params.return_json || false
+    })
+    
+    if (!result || !result.success) {
+      throw new Error(result?.error || 'AIFT worker chat failed')
+    }
+    
+    return typeof result.response === 'string' ? result.response : JSON.stringify(result.response)
+  }
+
+  // Run aift_textqa.py in a fresh Python process
+  private static async spawnTextqa(
+    message: string,
+    sessionid: string,
+    context: string,
+    params: AIFTChatParams
+  ): Promise<string> {
+    const { spawn } = await import('child_process')
+    const path = await import('path')
+    
+    // Path to the Python script - using textqa
+    const pythonScriptPath = path.default.join(process.cwd(), 'python', 'aift_textqa.py')
+    
+    // Call Python script
+    const pythonProcess = spawn('python', [
+      pythonScriptPath,
+      message,
+      sessionid,
+      context,
+      (params.temperature || 0.2).toString(),
+      (params.return_json || false).toString()
+    ])
+    
+    // Get response from Python
+    let response = ''
+    let error = ''
+    
+    pythonProcess.stdout.on('data', (data: Buffer) => {
+      response += data.toString()
+    })
+    
+    pythonProcess.stderr.on('data', (data: Buffer) => {
+      error += data.toString()
+    })
+    
+    // Wait for Python process to complete
+    return new Promise<string>((resolve, reject) => {
+      pythonProcess.on('close', (code: number) => {
+        if (code === 0) {
+          resolve(response.trim())
+        } else {
+          reject(new Error(`Python process failed with code ${code}: ${error}`))
+        }
+      })
+    })
+  }
+
   static async imageqa(imageData: string, question: string, params: AIFTChatParams = {}): Promise<string> {
     try {
       console.log('Calling AIFT standalone imageqa with:', { question, params })
@@ -265,26 +386,43 @@ export class AIFTStandalone {
     try {
       console.log('Calling AIFT standalone pdfqa with:', { question, filename: pdfFile.name, params })
       
-      // Convert PDF file to base64
+      // Read raw PDF bytes
       const arrayBuffer = await pdfFile.arrayBuffer()
-      const base64Data = Buffer.from(arrayBuffer).toString('base64')
-      
-      // Call Python script file
+      const pdfBytes = Buffer.from(arrayBuffer)
+
       const { spawn } = await import('child_process')
       const path = await import('path')
       fs = await import('fs')
       
-      // Path to the integrated Python script
-      const pythonScriptPath = path.default.join(process.cwd(), 'python', 'aift_integrated.py')
-      
-      // Create temporary file for PDF data
+      // Create temporary file holding the raw PDF bytes; the worker and the
+      // script both read it from disk rather than from a base64 payload
       const tempDir = path.default.join(process.cwd(), 'temp')
       if (!fs.default.existsSync(tempDir)) {
         fs.default.mkdirSync(tempDir, { recursive: true })
       }
       
-      tempFile = path.default.join(tempDir, `pdf_${Date.now()}_${Math.random().toString(36).substr(2, 9)}.txt`)
-      fs.default.writeFileSync(tempFile, base64Data)
+      tempFile = path.default.join(tempDir, `pdf_${Date.now()}_${Math.random().toString(36).substr(2, 9)}.pdf`)
+      fs.default.writeFileSync(tempFile, pdfBytes)
+
+      if (AIFTWorkerClient.isEnabled()) {
+        const result = await AIFTWorkerClient.call({
+          op: 'pdf',
+          data_file: tempFile,
+          question,
+          sessionid: params.sessionid || 'default-session',
+          context: params.context || '',
+          temperature: params.temperature || 0.2,
+          return_json: params.return_json || false
+        })
+        console.log('AIFT standalone worker pdfqa response:', { success: result?.success })
+        if (!result || !result.success) {
+          throw new Error(result?.error || 'PDF analysis failed')
+        }
+        return result.analysis
+      }
+
+      // Path to the integrated Python script
+      const pythonScriptPath = path.default.join(process.cwd(), 'python', 'aift_integrated.py')
       
       // Call Python script with PDF data file path
       const pythonProcess = spawn('python', [
@@ -336,26 +474,19 @@ export class AIFTStandalone {
         return response
       }
       
-      // Clean up temporary file
-      try {
-        fs.default.unlinkSync(tempFile)
-      } catch (cleanupError) {
-        console.warn('Failed to clean up temporary file:', cleanupError)
-      }
-      
     } catch (error) {
-      // Clean up temporary file on error
+      console.error('AIFT standalone pdfqa error:', error)
+      logError(error, 'AIFT standalone pdfqa failed')
+      throw new Error('AIFT standalone PDF service temporarily unavailable')
+    } finally {
+      // Clean up temporary file once the worker or script has read it
       try {
         if (tempFile && fs.default.existsSync(tempFile)) {
           fs.default.unlinkSync(tempFile)
         }
       } catch (cleanupError) {
-        console.warn('Failed to clean up temporary file on error:', cleanupError)
+        console.warn('Failed to clean up temporary file:', cleanupError)
       }
-      
-      console.error('AIFT standalone pdfqa error:', error)
-      logError(error, 'AIFT standalone pdfqa failed')
-      throw new Error('AIFT standalone PDF service temporarily unavailable')
     }
   }
 
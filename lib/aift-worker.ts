@@ -0,0 +1,114 @@
+import net from 'net'
+
+export interface AIFTWorkerRequest {
+  op: 'pdf' | 'image' | 'audio' | 'chat' | 'search' | 'ping'
+  data?: string
+  // Path of a file holding the raw payload bytes; preferred over inline base64 data
+  data_file?: string
+  question?: string
+  sessionid?: string
+  context?: string
+  temperature?: number
+  return_json?: boolean
+  top_k?: number
+  mode?: 'vector' | 'keyword'
+  stream?: boolean
+}
+
+// Incremental output of a streaming request: 'start', then 'delta' events
+// carrying the next piece of text, then 'done' (or 'error')
+export interface AIFTStreamEvent {
+  type: 'start' | 'delta' | 'done' | 'error'
+  text?: string
+  response?: string
+  success?: boolean
+  error?: string
+  [key: string]: any
+}
+
+// Client for the warm Python worker pool started with
+// `python python/aift_worker.py --socket <path>`
+export class AIFTWorkerClient {
+  private static counter = 0
+
+  static socketPath(): string | undefined {
+    return process.env.AIFT_WORKER_SOCKET || undefined
+  }
+
+  static isEnabled(): boolean {
+    return Boolean(this.socketPath())
+  }
+
+  static call(request: AIFTWorkerRequest, timeoutMs = 120000): Promise<any> {
+    return this.send(request, undefined, timeoutMs)
+  }
+
+  // Send a request with stream: true; onEvent is called for every event
+  // line and the returned promise resolves with the final result
+  static stream(
+    request: AIFTWorkerRequest,
+    onEvent: (event: AIFTStreamEvent) => void,
+    timeoutMs = 120000
+  ): Promise<any> {
+    return this.send({ ...request, stream: true }, onEvent, timeoutMs)
+  }
+
+  private static send(
+    request: AIFTWorkerRequest,
+    onEvent: ((event: AIFTStreamEvent) => void) | undefined,
+    timeoutMs: number
+  ): Promise<any> {
+    const socketPath = this.socketPath()
+    if (!socketPath) {
+      return Promise.reject(new Error('AIFT_WORKER_SOCKET is not configured'))
+    }
+
+    const id = `${process.pid}-${++this.counter}`
+
+    return new Promise((resolve, reject) => {
+      const socket = net.createConnection(socketPath)
+      let buffer = ''
+
+      socket.setTimeout(timeoutMs, () => {
+        socket.destroy(new Error(`AIFT worker timed out after ${timeoutMs}ms`))
+      })
+
+      socket.on('connect', () => {
+        socket.write(JSON.stringify({ id, ...request }) + '\n')
+      })
+
+      // Decode across reads: a Thai character (3 bytes in UTF-8) can be
+      // split between two chunks
+      socket.setEncoding('utf8')
+      socket.on('data', (chunk: string) => {
+        buffer += chunk
+        let newline = buffer.indexOf('\n')
+        while (newline !== -1) {
+          const line = buffer.slice(0, newline)
+          buffer = buffer.slice(newline + 1)
+          newline = buffer.indexOf('\n')
+
+          let response: any
+          try {
+            response = JSON.parse(line)
+          } catch (parseError) {
+            socket.destroy()
+            reject(parseError)
+            return
+          }
+
+          if (response.event !== undefined) {
+            onEvent?.(response.event)
+            continue
+          }
+
+          socket.end()
+          resolve(response.result)
+          return
+        }
+      })
+
+      socket.on('error', reject)
+    })
+  }
+}
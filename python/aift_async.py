@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AIFT Async Client
+asyncio facade over the AIFT textqa/vqa/audioqa calls with a concurrency
+limit, per-call timeouts and cancellation.
+
+The aift SDK is blocking, so calls run on a bounded thread pool while the
+event loop stays free for other work (e.g. file preprocessing). They go
+through aift_client and therefore share its response cache and request
+coalescing.
+"""
+
+import os
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+import aift_client
+
+DEFAULT_CONCURRENCY = int(os.environ.get('AIFT_MAX_CONCURRENCY', 16))
+DEFAULT_TIMEOUT = float(os.environ.get('AIFT_CALL_TIMEOUT', 120))
+
+class AsyncAIFTClient:
+    """Bounded-concurrency async access to the AIFT operations"""
+
+    def __init__(self, max_concurrency=DEFAULT_CONCURRENCY, timeout=DEFAULT_TIMEOUT):
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix='aift')
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        # Do not block the loop on upstream calls that were abandoned by a timeout
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    async def run(self, fn, *args, timeout=None, **kwargs):
+        """Run a blocking call on the pool, bounded by the concurrency limit and a timeout.
+
+        On timeout or cancellation the caller is released at once; a call that
+        already started finishes in its thread (the SDK cannot be interrupted)
+        and its result is discarded.
+        """
+        async with self._semaphore:
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(self._executor, functools.partial(fn, *args, **kwargs))
+            return await asyncio.wait_for(future, self.timeout if timeout is None else timeout)
+
+    async def generate(self, instruction, system_prompt='', max_new_tokens=512, temperature=0.2,
+                       return_json=False, timeout=None):
+        return await self.run(aift_client.generate, instruction, system_prompt=system_prompt,
+                              max_new_tokens=max_new_tokens, temperature=temperature,
+                              return_json=return_json, timeout=timeout)
+
+    async def chat(self, instruction, sessionid='default-session', context='', temperature=0.2,
+                   return_json=False, timeout=None):
+        return await self.run(aift_client.chat, instruction, sessionid=sessionid, context=context,
+                              temperature=temperature, return_json=return_json, timeout=timeout)
+
+    async def vqa_generate(self, file, instruction, return_json=False, image_key=None, timeout=None):
+        return await self.run(aift_client.vqa_generate, file, instruction,
+                              return_json=return_json, image_key=image_key, timeout=timeout)
+
+    async def audioqa_generate(self, file, instruction, return_json=False, timeout=None):
+        return await self.run(aift_client.audioqa_generate, file, instruction,
+                              return_json=return_json, timeout=timeout)
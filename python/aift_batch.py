@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AIFT Batch Script
+Runs many analyses from one JSONL manifest in a single invocation.
+
+Each manifest line is a JSON object:
+    {"id": "doc-1", "operation": "pdf", "file": "docs/report.pdf", "question": "..."}
+with optional "context", "sessionid", "temperature" and "return_json".
+Relative file paths are resolved against the manifest's directory.
+
+Preprocessing runs in a process pool while AIFT calls run concurrently up to
+a limit. Each result is written as a JSONL line as soon as it completes:
+    {"id": "doc-1", "index": 0, "result": {...}}
+where "index" is the manifest line. Items that fail are reported with
+"success": false and do not stop the batch. IDs that succeed are appended to
+the checkpoint file, and are skipped when the batch is run again.
+"""
+
+import sys
+import json
+import asyncio
+import argparse
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from aift_integrated import AIFTIntegrated, SYSTEM_PROMPT
+from aift_async import AsyncAIFTClient, DEFAULT_CONCURRENCY
+from payload_reader import read_payload
+
+FILE_OPERATIONS = ['pdf', 'image', 'audio']
+
+# Handler of a preprocessing pool process
+_handler = None
+
+def _init_batch_worker(upload_dir):
+    global _handler
+    _handler = AIFTIntegrated(upload_dir)
+
+def _prepare_item(item):
+    """Preprocess one manifest item in a pool process"""
+    operation = item.get("operation")
+    data = read_payload(item["file"]) if operation in FILE_OPERATIONS else None
+    return _handler.prepare(operation, data, item.get("question", ""), item.get("context", ""))
+
+def load_manifest(manifest_path):
+    """Return (index, item) pairs with IDs defaulted and file paths resolved"""
+    manifest_path = Path(manifest_path)
+    items = []
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        for index, line in enumerate(f):
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            item.setdefault("id", str(index))
+            if item.get("file"):
+                file_path = Path(item["file"])
+                if not file_path.is_absolute():
+                    item["file"] = str(manifest_path.parent / file_path)
+            items.append((index, item))
+    return items
+
+def load_checkpoint(checkpoint_path):
+    """Return the set of IDs already completed"""
+    if not checkpoint_path or not Path(checkpoint_path).exists():
+        return set()
+    with open(checkpoint_path, 'r', encoding='utf-8') as f:
+        return {line.rstrip("\n") for line in f if line.strip()}
+
+async def run_batch(items, output, checkpoint=None, upload_dir="uploads", workers=None,
+                    concurrency=DEFAULT_CONCURRENCY, timeout=None):
+    """Process manifest items and write each result to output as it completes"""
+    loop = asyncio.get_running_loop()
+    summary = {"total": len(items), "succeeded": 0, "failed": 0}
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_batch_worker,
+                             initargs=(upload_dir,)) as pool:
+        async with AsyncAIFTClient(max_concurrency=concurrency) as client:
+
+            async def run_item(index, item):
+                question = item.get("question", "")
+                try:
+                    prepared = await loop.run_in_executor(pool, _prepare_item, item)
+                    if not prepared.get("success"):
+                        return index, item, prepared
+
+                    answer = await client.generate(
+                        prepared["prompt"],
+                        system_prompt=SYSTEM_PROMPT,
+                        max_new_tokens=512,
+                        temperature=float(item.get("temperature", 0.2)),
+                        return_json=bool(item.get("return_json", False)),
+                        timeout=timeout
+                    )
+                    result = AIFTIntegrated.combine(prepared, answer, question,
+                                                    item.get("sessionid", "default-session"))
+                except Exception as e:
+                    result = {
+                        "success": False,
+                        "error": str(e) or type(e).__name__,
+                        "question": question
+                    }
+                return index, item, result
+
+            tasks = [asyncio.create_task(run_item(index, item)) for index, item in items]
+            for completed in asyncio.as_completed(tasks):
+                index, item, result = await completed
+                output.write(json.dumps({"id": item["id"], "index": index, "result": result},
+                                        ensure_ascii=False) + "\n")
+                output.flush()
+
+                if result.get("success"):
+                    summary["succeeded"] += 1
+                    if checkpoint is not None:
+                        checkpoint.write(item["id"] + "\n")
+                        checkpoint.flush()
+                else:
+                    summary["failed"] += 1
+
+    return summary
+
+def run_manifest(manifest_path, output_path=None, checkpoint_path=None, upload_dir="uploads",
+                 workers=None, concurrency=DEFAULT_CONCURRENCY, timeout=None):
+    """Run a manifest file, skipping items recorded in the checkpoint"""
+    done = load_checkpoint(checkpoint_path)
+    manifest = load_manifest(manifest_path)
+    items = [(index, item) for index, item in manifest if item["id"] not in done]
+
+    output = open(output_path, 'a', encoding='utf-8') if output_path else sys.stdout
+    checkpoint = open(checkpoint_path, 'a', encoding='utf-8') if checkpoint_path else None
+    try:
+        summary = asyncio.run(run_batch(items, output, checkpoint, upload_dir, workers, concurrency, timeout))
+    finally:
+        if output_path:
+            output.close()
+        if checkpoint is not None:
+            checkpoint.close()
+
+    # Count manifest items left out, not checkpoint lines, so that
+    # succeeded + failed + skipped == total
+    summary["total"] = len(manifest)
+    summary["skipped"] = len(manifest) - len(items)
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description='Run AIFT analyses from a JSONL manifest')
+    parser.add_argument('manifest', help='JSONL manifest of operation, file and question')
+    parser.add_argument('--output', help='Append results to this JSONL file instead of stdout')
+    parser.add_argument('--checkpoint', help='File of completed IDs, used to resume a batch')
+    parser.add_argument('--upload-dir', default='uploads', help='Base directory for processed files')
+    parser.add_argument('--workers', type=int, help='Preprocessing processes (default: CPU count)')
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY, help='Concurrent AIFT calls')
+    parser.add_argument('--timeout', type=float, help='Timeout in seconds per AIFT call')
+
+    args = parser.parse_args()
+
+    try:
+        summary = run_manifest(args.manifest, args.output, args.checkpoint, args.upload_dir,
+                               args.workers, args.concurrency, args.timeout)
+        print(json.dumps({"success": True, **summary}, ensure_ascii=False), file=sys.stderr)
+    except Exception as e:
+        print(json.dumps({"success": False, "error": str(e)}, ensure_ascii=False), file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
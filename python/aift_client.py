@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AIFT Client
+Cached, coalesced wrappers around the AIFT calls used by the Python scripts
+"""
+
+import os
+import hashlib
+import inspect
+from aift.multimodal import textqa, vqa, audioqa
+from response_cache import ResponseCache
+from single_flight import SingleFlight
+from stream_events import iter_upstream
+
+_cache = None
+_flight = SingleFlight()
+
+def get_cache():
+    """Return the process-wide response cache, or None when disabled"""
+    global _cache
+    if os.environ.get('AIFT_CACHE_DISABLED', '').lower() in ('1', 'true'):
+        return None
+    if _cache is None:
+        _cache = ResponseCache.from_env()
+    return _cache
+
+def file_digest(path):
+    """SHA-256 of a file's content, used to key calls that upload a file"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _coalesced_call(key_fields, call, temperature, cacheable=True):
+    """Serve key_fields from the cache, or make one upstream call for all identical callers"""
+    cache = get_cache() if cacheable else None
+    if cache is not None and not cache.enabled_for(temperature):
+        # The caller wants a fresh sample, so neither cache nor share it
+        return call()
+
+    key = ResponseCache.make_key(temperature=temperature, **key_fields)
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+
+    def fetch():
+        result = call()
+        # Empty answers are not worth keeping and are usually upstream hiccups
+        if cache is not None and result:
+            cache.put(key, result)
+        return result
+
+    return _flight.do(key, fetch)
+
+def supports_streaming(fn):
+    """Whether an SDK function takes stream=True and returns the answer as an iterator"""
+    try:
+        return 'stream' in inspect.signature(fn).parameters
+    except (TypeError, ValueError):
+        return False
+
+def _generate_request(instruction, system_prompt, max_new_tokens, temperature, return_json, stream=False):
+    """Key fields and upstream call for textqa.generate"""
+    fields = {
+        "prompt": instruction,
+        "system_prompt": system_prompt,
+        "max_new_tokens": max_new_tokens,
+        "model": "textqa.generate",
+        "return_json": return_json
+    }
+    call = lambda: textqa.generate(
+        instruction=instruction,
+        system_prompt=system_prompt,
+        max_new_tokens=max_new_tokens,
+        temperature=temperature,
+        return_json=return_json,
+        **({"stream": True} if stream else {})
+    )
+    return fields, call
+
+def _chat_request(instruction, sessionid, context, temperature, return_json, stream=False):
+    """Key fields and upstream call for textqa.chat (the session ID is part of the key)"""
+    fields = {
+        "prompt": instruction,
+        "system_prompt": context,
+        "model": "textqa.chat",
+        "sessionid": sessionid,
+        "return_json": return_json
+    }
+    call = lambda: textqa.chat(
+        instruction,
+        sessionid=sessionid,
+        context=context,
+        temperature=temperature,
+        return_json=return_json,
+        **({"stream": True} if stream else {})
+    )
+    return fields, call
+
+def _streamed_call(key_fields, call, temperature):
+    """Yield the answer as text pieces as upstream produces them; a cached or
+    complete answer is a single piece"""
+    cache = get_cache()
+    if cache is not None and not cache.enabled_for(temperature):
+        cache = None
+
+    key = ResponseCache.make_key(temperature=temperature, **key_fields)
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            yield from iter_upstream(cached)
+            return
+
+    result = call()
+    parts = []
+    for piece in iter_upstream(result):
+        parts.append(piece)
+        yield piece
+
+    answer = result if isinstance(result, (str, dict, list)) else "".join(parts)
+    if cache is not None and answer:
+        cache.put(key, answer)
+
+def generate(instruction, system_prompt='', max_new_tokens=512, temperature=0.2, return_json=False):
+    """textqa.generate with response caching"""
+    fields, call = _generate_request(instruction, system_prompt, max_new_tokens, temperature, return_json)
+    return _coalesced_call(fields, call, temperature)
+
+def generate_stream(instruction, system_prompt='', max_new_tokens=512, temperature=0.2, return_json=False):
+    """textqa.generate as an iterator of text pieces, streamed when the SDK supports it"""
+    fields, call = _generate_request(instruction, system_prompt, max_new_tokens, temperature, return_json,
+                                     stream=supports_streaming(textqa.generate))
+    return _streamed_call(fields, call, temperature)
+
+def chat(instruction, sessionid='default-session', context='', temperature=0.2, return_json=False):
+    """textqa.chat with response caching"""
+    fields, call = _chat_request(instruction, sessionid, context, temperature, return_json)
+    return _coalesced_call(fields, call, temperature)
+
+def chat_stream(instruction, sessionid='default-session', context='', temperature=0.2, return_json=False):
+    """textqa.chat as an iterator of text pieces, streamed when the SDK supports it"""
+    fields, call = _chat_request(instruction, sessionid, context, temperature, return_json,
+                                 stream=supports_streaming(textqa.chat))
+    return _streamed_call(fields, call, temperature)
+
+def vqa_generate(file, instruction, return_json=False, image_key=None):
+    """vqa.generate, cached and coalesced by image and instruction.
+
+    image_key (FileProcessor's hash of the upload and pipeline settings)
+    stands in for hashing the file when the caller already has it.
+    """
+    return _coalesced_call(
+        {
+            "prompt": instruction,
+            "model": "vqa.generate",
+            "file_sha256": image_key or file_digest(file),
+            "return_json": return_json
+        },
+        lambda: vqa.generate(file=file, instruction=instruction, return_json=return_json),
+        0
+    )
+
+def audioqa_generate(file, instruction, return_json=False):
+    """audioqa.generate, coalesced by audio content and instruction"""
+    return _coalesced_call(
+        {
+            "prompt": instruction,
+            "model": "audioqa.generate",
+            "file_sha256": file_digest(file),
+            "return_json": return_json
+        },
+        lambda: audioqa.generate(file=file, instruction=instruction, return_json=return_json),
+        0,
+        cacheable=False
+    )
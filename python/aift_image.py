@@ -12,6 +12,7 @@ import os
 import base64
 from aift.multimodal import textqa
 from aift import setting
+from payload_reader import read_payload
 
 # Set UTF-8 encoding for stdout
 sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
@@ -28,26 +29,18 @@ def main():
             print("Error: Image data file path and question parameters are required")
             sys.exit(1)
             
-        image_data_file = sys.argv[1]  # Path to file containing base64 image data
+        image_data_file = sys.argv[1]  # Path to image file, base64 .txt file or "-" for stdin
         question = sys.argv[2]
         sessionid = sys.argv[3] if len(sys.argv) > 3 else 'default-session'
         context = sys.argv[4] if len(sys.argv) > 4 else ''
         temperature = float(sys.argv[5]) if len(sys.argv) > 5 else 0.2
         return_json = sys.argv[6].lower() == 'true' if len(sys.argv) > 6 else False
         
-        # Read base64 image data from file
+        # Read raw image bytes (binary file, base64 .txt file or stdin stream)
         try:
-            with open(image_data_file, 'r') as f:
-                image_data = f.read().strip()
+            image_bytes = read_payload(image_data_file)
         except Exception as e:
-            print(f"Error: Cannot read image data file - {str(e)}")
-            sys.exit(1)
-        
-        # Decode base64 image data
-        try:
-            image_bytes = base64.b64decode(image_data)
-        except Exception as e:
-            print(f"Error: Invalid image data format - {str(e)}")
+            print(f"Error: Cannot read image data - {str(e)}")
             sys.exit(1)
         
         # Create a comprehensive Thai prompt for image analysis
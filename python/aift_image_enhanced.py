@@ -11,12 +11,13 @@ import io
 import os
 import base64
 import tempfile
-from aift.multimodal import vqa
 from aift import setting
 
 # Import file processor
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from file_processor import FileProcessor
+from payload_reader import read_payload
+import aift_client
 
 # Set UTF-8 encoding for stdout
 sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
@@ -33,7 +34,7 @@ def main():
             print("Error: Data file path, question, and file type parameters are required")
             sys.exit(1)
 
-        data_file = sys.argv[1]  # Path to file containing base64 data
+        data_file = sys.argv[1]  # Path to raw file, base64 .txt file or "-" for stdin
         question = sys.argv[2]
         file_type = sys.argv[3].lower()  # 'image' or 'audio'
         sessionid = sys.argv[4] if len(sys.argv) > 4 else 'default-session'
@@ -41,25 +42,17 @@ def main():
         temperature = float(sys.argv[6]) if len(sys.argv) > 6 else 0.2
         return_json = sys.argv[7].lower() == 'true' if len(sys.argv) > 7 else False
 
-        # Read base64 data from file
+        # Read raw file bytes (binary file, base64 .txt file or stdin stream)
         try:
-            with open(data_file, 'r') as f:
-                base64_data = f.read().strip()
+            file_bytes = read_payload(data_file)
         except Exception as e:
             print(f"Error: Cannot read data file - {str(e)}")
             sys.exit(1)
 
-        # Decode base64 data
-        try:
-            file_bytes = base64.b64decode(base64_data)
-        except Exception as e:
-            print(f"Error: Invalid base64 data format - {str(e)}")
-            sys.exit(1)
-
         if file_type == 'image':
             # Process image using file processor
             processor = FileProcessor("uploads")
-            image_result = processor.process_image(base64_data, "uploaded_image.jpg")
+            image_result = processor.process_image(file_bytes, "uploaded_image.jpg")
 
             if not image_result.get("success"):
                 print(f"Error: {image_result.get('error', 'Image processing failed')}")
@@ -68,8 +61,9 @@ def main():
             # Get the processed image path for VQA
             processed_image_path = image_result.get("backend_processed_path")
             if not processed_image_path or not os.path.exists(processed_image_path):
-                # Fallback to original image path
+                # Fallback to original image path, which is not what image_key describes
                 processed_image_path = image_result.get("backend_orig_path")
+                image_result["image_key"] = None
 
             if not processed_image_path or not os.path.exists(processed_image_path):
                 print("Error: No valid image file found after processing")
@@ -94,10 +88,11 @@ def main():
 """
 
             # Call the AIFT VQA function with image file path
-            result = vqa.generate(
+            result = aift_client.vqa_generate(
                 file=processed_image_path,
                 instruction=image_prompt,
-                return_json=return_json
+                return_json=return_json,
+                image_key=image_result.get("image_key")
             )
             print(result)
 
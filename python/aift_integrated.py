@@ -7,18 +7,23 @@ Combines file processing with AIFT analysis
 
 import sys
 import json
-import io
 import os
 import base64
 import tempfile
 from pathlib import Path
-from aift.multimodal import textqa
 from aift import setting
+import aift_client
 from file_processor import FileProcessor
+from payload_reader import read_payload
+from text_chunker import select_relevant_text
+from metrics import StageTimer, activate, request_timer, stage
 
-# Set UTF-8 encoding for stdout
-sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
-sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
+# Set UTF-8 encoding for stdout; reconfigured in place because the worker
+# imports this module, and a second wrapper would close the stream when freed
+sys.stdout.reconfigure(encoding='utf-8')
+sys.stderr.reconfigure(encoding='utf-8')
+
+SYSTEM_PROMPT = "คุณคือ Pathumma LLM ที่สร้างโดย NECTEC คุณเป็นผู้ช่วยที่เป็นประโยชน์ โปรดตอบคำถามทุกครั้งด้วยภาษาไทยที่ชัดเจนและเข้าใจง่าย"
 
 class AIFTIntegrated:
     def __init__(self, upload_dir="uploads"):
@@ -26,24 +31,27 @@ class AIFTIntegrated:
         # Set API key
         setting.set_api_key('Od2TqqTYP5FEOjtSX0yYcJgxRlSVGfR8')
     
-    def analyze_pdf(self, pdf_data, question, sessionid='default-session', context='', temperature=0.2, return_json=False):
-        """Analyze PDF with AIFT"""
-        try:
-            # First process the PDF
-            pdf_result = self.processor.process_pdf(pdf_data, "uploaded_pdf.pdf")
-            
-            if not pdf_result.get("success"):
-                return pdf_result
-            
-            # Get the extracted text
+    def prepare_pdf(self, pdf_data, question, context=''):
+        """Process the PDF and build its analysis prompt"""
+        # First process the PDF
+        pdf_result = self.processor.process_pdf(pdf_data, "uploaded_pdf.pdf")
+        
+        if not pdf_result.get("success"):
+            return pdf_result
+        
+        with stage("prompt") as prompt_stage:
+            # Get the extracted text; long documents are cut down to the
+            # chunks most relevant to the question
             text_content = pdf_result.get("text_content", "")
+            prompt_text, chunk_info = select_relevant_text(text_content, question)
+            text_label = "เนื้อหา PDF (เฉพาะส่วนที่เกี่ยวข้องกับคำถาม)" if chunk_info["chunked"] else "เนื้อหา PDF"
             
             # Create comprehensive Thai prompt
             prompt = f"""
 กรุณาวิเคราะห์เอกสาร PDF นี้และตอบคำถามต่อไปนี้: {question}
 
-เนื้อหา PDF:
-{text_content}
+{text_label}:
+{prompt_text}
 
 บริบทเพิ่มเติม: {context if context else 'ไม่มีบริบทเพิ่มเติม'}
 
@@ -51,45 +59,31 @@ class AIFTIntegrated:
 หากเป็นเอกสารวิจัยหรือทางวิชาการ กรุณาให้คำอธิบายที่ชัดเจนและสรุปประเด็นสำคัญ
 โปรดตอบคำถามทุกครั้งด้วยภาษาไทยที่ชัดเจนและเข้าใจง่าย
 """
-            
-            # Call AIFT for analysis - use generate for direct model response
-            result = textqa.generate(
-                instruction=prompt,
-                system_prompt="คุณคือ Pathumma LLM ที่สร้างโดย NECTEC คุณเป็นผู้ช่วยที่เป็นประโยชน์ โปรดตอบคำถามทุกครั้งด้วยภาษาไทยที่ชัดเจนและเข้าใจง่าย",
-                max_new_tokens=512,
-                temperature=temperature,
-                return_json=return_json
-            )
-            
-            # Combine results
-            return {
-                "success": True,
-                "analysis": result,
+            prompt_stage.bytes = len(prompt.encode('utf-8'))
+        
+        return {
+            "success": True,
+            "operation": "pdf",
+            "prompt": prompt,
+            "fields": {
                 "text_content": text_content,
+                "chunking": chunk_info,
                 "backend_text_path": pdf_result.get("backend_text_path"),
                 "frontend_text_path": pdf_result.get("frontend_text_path"),
                 "backend_pdf_path": pdf_result.get("backend_pdf_path"),
-                "frontend_pdf_path": pdf_result.get("frontend_pdf_path"),
-                "question": question,
-                "sessionid": sessionid
-            }
-            
-        except Exception as e:
-            return {
-                "success": False,
-                "error": str(e),
-                "question": question
+                "frontend_pdf_path": pdf_result.get("frontend_pdf_path")
             }
+        }
     
-    def analyze_image(self, image_data, question, sessionid='default-session', context='', temperature=0.2, return_json=False):
-        """Analyze image with AIFT"""
-        try:
-            # First process the image
-            image_result = self.processor.process_image(image_data, "uploaded_image.jpg")
-            
-            if not image_result.get("success"):
-                return image_result
-            
+    def prepare_image(self, image_data, question, context=''):
+        """Process the image and build its analysis prompt"""
+        # First process the image
+        image_result = self.processor.process_image(image_data, "uploaded_image.jpg")
+        
+        if not image_result.get("success"):
+            return image_result
+        
+        with stage("prompt") as prompt_stage:
             # Create comprehensive Thai prompt for image analysis
             prompt = f"""
 กรุณาวิเคราะห์ภาพนี้และตอบคำถามต่อไปนี้: {question}
@@ -102,44 +96,30 @@ class AIFTIntegrated:
 หากเป็นภาพที่เกี่ยวข้องกับ AI หรือเทคโนโลยี กรุณาให้คำอธิบายที่ชัดเจน
 โปรดตอบคำถามทุกครั้งด้วยภาษาไทยที่ชัดเจนและเข้าใจง่าย
 """
-            
-            # Call AIFT for analysis - use generate for direct model response
-            result = textqa.generate(
-                instruction=prompt,
-                system_prompt="คุณคือ Pathumma LLM ที่สร้างโดย NECTEC คุณเป็นผู้ช่วยที่เป็นประโยชน์ โปรดตอบคำถามทุกครั้งด้วยภาษาไทยที่ชัดเจนและเข้าใจง่าย",
-                max_new_tokens=512,
-                temperature=temperature,
-                return_json=return_json
-            )
-            
-            # Combine results
-            return {
-                "success": True,
-                "analysis": result,
+            prompt_stage.bytes = len(prompt.encode('utf-8'))
+        
+        return {
+            "success": True,
+            "operation": "image",
+            "prompt": prompt,
+            "fields": {
                 "backend_orig_path": image_result.get("backend_orig_path"),
                 "frontend_orig_path": image_result.get("frontend_orig_path"),
                 "backend_processed_path": image_result.get("backend_processed_path"),
                 "frontend_processed_path": image_result.get("frontend_processed_path"),
-                "question": question,
-                "sessionid": sessionid
-            }
-            
-        except Exception as e:
-            return {
-                "success": False,
-                "error": str(e),
-                "question": question
+                "derivatives": image_result.get("derivatives")
             }
+        }
     
-    def analyze_audio(self, audio_data, question, sessionid='default-session', context='', temperature=0.2, return_json=False):
-        """Analyze audio with AIFT"""
-        try:
-            # First process the audio
-            audio_result = self.processor.process_audio(audio_data, "uploaded_audio.wav")
-            
-            if not audio_result.get("success"):
-                return audio_result
-            
+    def prepare_audio(self, audio_data, question, context=''):
+        """Process the audio and build its analysis prompt"""
+        # First process the audio
+        audio_result = self.processor.process_audio(audio_data, "uploaded_audio.wav")
+        
+        if not audio_result.get("success"):
+            return audio_result
+        
+        with stage("prompt") as prompt_stage:
             # Create comprehensive Thai prompt for audio analysis
             prompt = f"""
 กรุณาวิเคราะห์เนื้อหาออดิโอนี้และตอบคำถามต่อไปนี้: {question}
@@ -152,38 +132,23 @@ class AIFTIntegrated:
 หากเป็นเสียงที่เกี่ยวข้องกับ AI หรือเทคโนโลยี กรุณาให้คำอธิบายที่ชัดเจน
 โปรดตอบคำถามทุกครั้งด้วยภาษาไทยที่ชัดเจนและเข้าใจง่าย
 """
-            
-            # Call AIFT for analysis - use generate for direct model response
-            result = textqa.generate(
-                instruction=prompt,
-                system_prompt="คุณคือ Pathumma LLM ที่สร้างโดย NECTEC คุณเป็นผู้ช่วยที่เป็นประโยชน์ โปรดตอบคำถามทุกครั้งด้วยภาษาไทยที่ชัดเจนและเข้าใจง่าย",
-                max_new_tokens=512,
-                temperature=temperature,
-                return_json=return_json
-            )
-            
-            # Combine results
-            return {
-                "success": True,
-                "analysis": result,
+            prompt_stage.bytes = len(prompt.encode('utf-8'))
+        
+        return {
+            "success": True,
+            "operation": "audio",
+            "prompt": prompt,
+            "fields": {
                 "backend_orig_path": audio_result.get("backend_orig_path"),
                 "frontend_orig_path": audio_result.get("frontend_orig_path"),
                 "backend_processed_path": audio_result.get("backend_processed_path"),
-                "frontend_processed_path": audio_result.get("frontend_processed_path"),
-                "question": question,
-                "sessionid": sessionid
-            }
-            
-        except Exception as e:
-            return {
-                "success": False,
-                "error": str(e),
-                "question": question
+                "frontend_processed_path": audio_result.get("frontend_processed_path")
             }
+        }
     
-    def chat(self, message, sessionid='default-session', context='', temperature=0.2, return_json=False):
-        """Regular chat with AIFT using textqa"""
-        try:
+    def prepare_chat(self, message, context=''):
+        """Build the chat prompt"""
+        with stage("prompt") as prompt_stage:
             # Create Thai language prompt for chat
             thai_prompt = f"""
 กรุณาตอบคำถามหรือช่วยเหลือในเรื่องต่อไปนี้: {message}
@@ -194,29 +159,136 @@ class AIFTIntegrated:
 หากเป็นคำถามเกี่ยวกับ AI หรือเทคโนโลยี กรุณาให้คำอธิบายที่ชัดเจนและมีตัวอย่างประกอบ
 โปรดตอบคำถามทุกครั้งด้วยภาษาไทยที่ชัดเจนและเข้าใจง่าย
 """
-            
-            # Use textqa for chat functionality
-            result = textqa.generate(
-                instruction=thai_prompt,
-                system_prompt="คุณคือ Pathumma LLM ที่สร้างโดย NECTEC คุณเป็นผู้ช่วยที่เป็นประโยชน์ โปรดตอบคำถามทุกครั้งด้วยภาษาไทยที่ชัดเจนและเข้าใจง่าย",
-                max_new_tokens=512,
-                temperature=temperature,
-                return_json=return_json
-            )
-            
+            prompt_stage.bytes = len(thai_prompt.encode('utf-8'))
+        
+        return {
+            "success": True,
+            "operation": "chat",
+            "prompt": thai_prompt,
+            "fields": {}
+        }
+    
+    def prepare(self, operation, data, question, context=''):
+        """Run the local part of an operation: preprocessing and prompt building"""
+        if operation == 'pdf':
+            return self.prepare_pdf(data, question, context)
+        if operation == 'image':
+            return self.prepare_image(data, question, context)
+        if operation == 'audio':
+            return self.prepare_audio(data, question, context)
+        if operation == 'chat':
+            return self.prepare_chat(question, context)
+        return {"success": False, "error": f"Unknown operation '{operation}'"}
+    
+    @staticmethod
+    def combine(prepared, answer, question, sessionid):
+        """Build the final result from a prepared request and the model answer"""
+        if prepared["operation"] == 'chat':
             return {
                 "success": True,
-                "response": result,
-                "message": message,
+                "response": answer,
+                "message": question,
                 "sessionid": sessionid
             }
+        
+        return {
+            "success": True,
+            "analysis": answer,
+            **prepared["fields"],
+            "question": question,
+            "sessionid": sessionid
+        }
+    
+    def run(self, operation, data, question, sessionid='default-session', context='', temperature=0.2, return_json=False):
+        """Prepare the request, call AIFT and combine the results"""
+        with request_timer(operation) as timer:
+            try:
+                prepared = self.prepare(operation, data, question, context)
+                
+                if not prepared.get("success"):
+                    return timer.attach(prepared)
+                
+                # Call AIFT for analysis - use generate for direct model response
+                with stage("upstream") as upstream:
+                    result = aift_client.generate(
+                        instruction=prepared["prompt"],
+                        system_prompt=SYSTEM_PROMPT,
+                        max_new_tokens=512,
+                        temperature=temperature,
+                        return_json=return_json
+                    )
+                    upstream.bytes = len(str(result).encode('utf-8'))
+                
+                return timer.attach(self.combine(prepared, result, question, sessionid))
+            
+            except Exception as e:
+                return timer.attach({
+                    "success": False,
+                    "error": str(e),
+                    "message" if operation == 'chat' else "question": question
+                })
+    
+    def run_stream(self, operation, data, question, sessionid='default-session', context='', temperature=0.2, return_json=False):
+        """Like run(), but yields start/delta/done events as the answer arrives"""
+        question_key = "message" if operation == 'chat' else "question"
+        # The timer is made current only around prepare(), never across a
+        # yield, so it cannot leak into whatever the consumer runs in between
+        timer = StageTimer(operation)
+        yield {"type": "start", question_key: question, "sessionid": sessionid}
+        try:
+            with activate(timer):
+                prepared = self.prepare(operation, data, question, context)
+            
+            if not prepared.get("success"):
+                yield {"type": "error", **timer.attach(prepared)}
+                return
+            
+            parts = []
+            with timer.stage("upstream") as upstream:
+                for piece in aift_client.generate_stream(
+                    instruction=prepared["prompt"],
+                    system_prompt=SYSTEM_PROMPT,
+                    max_new_tokens=512,
+                    temperature=temperature,
+                    return_json=return_json
+                ):
+                    parts.append(piece)
+                    yield {"type": "delta", "text": piece}
+                upstream.bytes = sum(len(piece.encode('utf-8')) for piece in parts)
+            
+            yield {"type": "done", **timer.attach(self.combine(prepared, "".join(parts), question, sessionid))}
             
         except Exception as e:
-            return {
-                "success": False,
-                "error": str(e),
-                "message": message
+            yield {
+                "type": "error",
+                **timer.attach({
+                    "success": False,
+                    "error": str(e),
+                    question_key: question
+                })
             }
+        finally:
+            timer.finish()
+    
+    def analyze_pdf(self, pdf_data, question, sessionid='default-session', context='', temperature=0.2, return_json=False):
+        """Analyze PDF with AIFT"""
+        return self.run('pdf', pdf_data, question, sessionid, context, temperature, return_json)
+    
+    def analyze_image(self, image_data, question, sessionid='default-session', context='', temperature=0.2, return_json=False):
+        """Analyze image with AIFT"""
+        return self.run('image', image_data, question, sessionid, context, temperature, return_json)
+    
+    def analyze_audio(self, audio_data, question, sessionid='default-session', context='', temperature=0.2, return_json=False):
+        """Analyze audio with AIFT"""
+        return self.run('audio', audio_data, question, sessionid, context, temperature, return_json)
+    
+    def chat(self, message, sessionid='default-session', context='', temperature=0.2, return_json=False):
+        """Regular chat with AIFT using textqa"""
+        return self.run('chat', None, message, sessionid, context, temperature, return_json)
+    
+    def chat_stream(self, message, sessionid='default-session', context='', temperature=0.2, return_json=False):
+        """Chat with AIFT, yielding start/delta/done events"""
+        return self.run_stream('chat', None, message, sessionid, context, temperature, return_json)
 
 def main():
     """Main function to handle AIFT integrated requests."""
@@ -227,7 +299,7 @@ def main():
             sys.exit(1)
             
         operation = sys.argv[1]
-        data_file = sys.argv[2]  # Path to file containing base64 data
+        data_file = sys.argv[2]  # Path to raw file, base64 .txt file or "-" for stdin
         question = sys.argv[3] if len(sys.argv) > 3 else ''
         sessionid = sys.argv[4] if len(sys.argv) > 4 else 'default-session'
         context = sys.argv[5] if len(sys.argv) > 5 else ''
@@ -237,21 +309,22 @@ def main():
         # Initialize integrated handler
         handler = AIFTIntegrated()
         
-        # Read base64 data from file
-        try:
-            with open(data_file, 'r') as f:
-                base64_data = f.read().strip()
-        except Exception as e:
-            print(f"Error: Cannot read data file - {str(e)}")
-            sys.exit(1)
+        # Read raw file bytes (binary file, base64 .txt file or stdin stream)
+        file_bytes = None
+        if operation in ['pdf', 'image', 'audio']:
+            try:
+                file_bytes = read_payload(data_file)
+            except Exception as e:
+                print(f"Error: Cannot read data file - {str(e)}")
+                sys.exit(1)
         
         # Process based on operation
         if operation == 'pdf':
-            result = handler.analyze_pdf(base64_data, question, sessionid, context, temperature, return_json)
+            result = handler.analyze_pdf(file_bytes, question, sessionid, context, temperature, return_json)
         elif operation == 'image':
-            result = handler.analyze_image(base64_data, question, sessionid, context, temperature, return_json)
+            result = handler.analyze_image(file_bytes, question, sessionid, context, temperature, return_json)
         elif operation == 'audio':
-            result = handler.analyze_audio(base64_data, question, sessionid, context, temperature, return_json)
+            result = handler.analyze_audio(file_bytes, question, sessionid, context, temperature, return_json)
         elif operation == 'chat':
             result = handler.chat(question, sessionid, context, temperature, return_json)
         else:
@@ -11,6 +11,7 @@ import os
 import base64
 from aift.multimodal import textqa
 from aift import setting
+from payload_reader import read_payload
 
 # Set UTF-8 encoding for stdout
 sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
@@ -27,26 +28,18 @@ def main():
             print("Error: PDF data file path and question parameters are required")
             sys.exit(1)
             
-        pdf_data_file = sys.argv[1]  # Path to file containing base64 PDF data
+        pdf_data_file = sys.argv[1]  # Path to PDF file, base64 .txt file or "-" for stdin
         question = sys.argv[2]
         sessionid = sys.argv[3] if len(sys.argv) > 3 else 'default-session'
         context = sys.argv[4] if len(sys.argv) > 4 else ''
         temperature = float(sys.argv[5]) if len(sys.argv) > 5 else 0.2
         return_json = sys.argv[6].lower() == 'true' if len(sys.argv) > 6 else False
         
-        # Read base64 PDF data from file
+        # Read raw PDF bytes (binary file, base64 .txt file or stdin stream)
         try:
-            with open(pdf_data_file, 'r') as f:
-                pdf_data = f.read().strip()
+            pdf_bytes = read_payload(pdf_data_file)
         except Exception as e:
-            print(f"Error: Cannot read PDF data file - {str(e)}")
-            sys.exit(1)
-        
-        # Decode base64 PDF data
-        try:
-            pdf_bytes = base64.b64decode(pdf_data)
-        except Exception as e:
-            print(f"Error: Invalid PDF data format - {str(e)}")
+            print(f"Error: Cannot read PDF data - {str(e)}")
             sys.exit(1)
         
         # Create a comprehensive Thai prompt for PDF analysis
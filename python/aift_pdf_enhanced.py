@@ -17,6 +17,8 @@ from aift import setting
 # Import file processor
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from file_processor import FileProcessor
+from payload_reader import read_payload
+from text_chunker import select_relevant_text
 
 # Set UTF-8 encoding for stdout
 sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
@@ -33,26 +35,18 @@ def main():
             print("Error: PDF data file path and question parameters are required")
             sys.exit(1)
             
-        pdf_data_file = sys.argv[1]  # Path to file containing base64 PDF data
+        pdf_data_file = sys.argv[1]  # Path to PDF file, base64 .txt file or "-" for stdin
         question = sys.argv[2]
         sessionid = sys.argv[3] if len(sys.argv) > 3 else 'default-session'
         context = sys.argv[4] if len(sys.argv) > 4 else ''
         temperature = float(sys.argv[5]) if len(sys.argv) > 5 else 0.2
         return_json = sys.argv[6].lower() == 'true' if len(sys.argv) > 6 else False
         
-        # Read base64 PDF data from file
+        # Read raw PDF bytes (binary file, base64 .txt file or stdin stream)
         try:
-            with open(pdf_data_file, 'r') as f:
-                pdf_data = f.read().strip()
+            pdf_bytes = read_payload(pdf_data_file)
         except Exception as e:
-            print(f"Error: Cannot read PDF data file - {str(e)}")
-            sys.exit(1)
-        
-        # Decode base64 PDF data
-        try:
-            pdf_bytes = base64.b64decode(pdf_data)
-        except Exception as e:
-            print(f"Error: Invalid PDF data format - {str(e)}")
+            print(f"Error: Cannot read PDF data - {str(e)}")
             sys.exit(1)
         
         # Process PDF using file processor
@@ -77,14 +71,17 @@ def main():
 โปรดให้การวิเคราะห์ทั่วไปตามโครงสร้างเอกสารและข้อมูลที่มีอยู่
 """
         else:
-            # Use extracted text for analysis with Thai prompt
+            # Use extracted text for analysis with Thai prompt; long documents
+            # are cut down to the chunks most relevant to the question
+            prompt_text, chunk_info = select_relevant_text(text_content, question)
+            text_label = "ข้อความที่เกี่ยวข้องซึ่งสกัดจาก PDF" if chunk_info["chunked"] else "ข้อความที่สกัดจาก PDF"
             pdf_prompt = f"""
 กรุณาวิเคราะห์เอกสาร PDF นี้และตอบคำถามต่อไปนี้: {question}
 
 บริบทเพิ่มเติม: {context if context else 'ไม่มีบริบทเพิ่มเติม'}
 
-ข้อความที่สกัดจาก PDF:
-{text_content}
+{text_label}:
+{prompt_text}
 
 โปรดให้การวิเคราะห์รายละเอียดของเนื้อหาใน PDF และตอบคำถามอย่างครบถ้วน
 หากเป็นเอกสารวิจัยหรือทางวิชาการ กรุณาให้คำอธิบายที่ชัดเจนและสรุปประเด็นสำคัญ
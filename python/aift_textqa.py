@@ -9,8 +9,9 @@ import sys
 import json
 import io
 import os
-from aift.multimodal import textqa
 from aift import setting
+import aift_client
+from stream_events import pop_stream_flag, stream_answer, write_events
 
 # Set UTF-8 encoding for stdout
 sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
@@ -22,6 +23,10 @@ def main():
         # Set API key
         setting.set_api_key('Od2TqqTYP5FEOjtSX0yYcJgxRlSVGfR8')
         
+        # --stream prints NDJSON events as the answer arrives, --stream=sse prints SSE frames
+        stream_format, argv = pop_stream_flag(sys.argv[1:])
+        sys.argv = sys.argv[:1] + argv
+        
         # Get parameters from command line arguments
         if len(sys.argv) < 2:
             print("Error: Question parameter is required")
@@ -43,8 +48,19 @@ def main():
 หากเป็นคำถามเกี่ยวกับ AI หรือเทคโนโลยี กรุณาให้คำอธิบายที่ชัดเจนและมีตัวอย่างประกอบ
 """
         
+        if stream_format:
+            pieces = aift_client.generate_stream(
+                instruction=thai_prompt,
+                system_prompt="คุณคือ Pathumma LLM ที่สร้างโดย NECTEC คุณเป็นผู้ช่วยที่เป็นประโยชน์ โปรดตอบคำถามทุกครั้งด้วยภาษาไทยที่ชัดเจนและเข้าใจง่าย",
+                max_new_tokens=512,
+                temperature=temperature,
+                return_json=return_json
+            )
+            write_events(stream_answer(pieces, {"sessionid": sessionid}), sys.stdout, stream_format)
+            return
+        
         # Call the Python textqa function - use generate for direct model response
-        result = textqa.generate(
+        result = aift_client.generate(
             instruction=thai_prompt,
             system_prompt="คุณคือ Pathumma LLM ที่สร้างโดย NECTEC คุณเป็นผู้ช่วยที่เป็นประโยชน์ โปรดตอบคำถามทุกครั้งด้วยภาษาไทยที่ชัดเจนและเข้าใจง่าย",
             max_new_tokens=512,
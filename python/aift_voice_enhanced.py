@@ -11,17 +11,38 @@ import io
 import os
 import base64
 import tempfile
-from aift.multimodal import audioqa
+import asyncio
 from aift import setting
 
 # Import file processor
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from file_processor import FileProcessor
+from payload_reader import read_payload
+from audio_segmenter import merge_answers, format_timestamp
+from aift_async import AsyncAIFTClient
+import aift_client
 
 # Set UTF-8 encoding for stdout
 sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
 sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
 
+# Answer for a recording the segmenter found to be silent
+NO_SPEECH_ANSWER = "ไม่พบเสียงใด ๆ ในไฟล์เสียงนี้ (มีเพียงความเงียบ)"
+
+async def analyze_segments(segments, audio_prompt, return_json):
+    """Run AudioQA on every segment concurrently and merge the answers by timestamp"""
+    async with AsyncAIFTClient() as client:
+        answers = await asyncio.gather(*[
+            client.audioqa_generate(
+                segment["backend_path"],
+                f"{audio_prompt}\nส่วนนี้คือช่วงที่ {segment['index'] + 1} จาก {len(segments)} ของไฟล์เสียง "
+                f"(เวลา {format_timestamp(segment['start'])}-{format_timestamp(segment['end'])})",
+                return_json=return_json
+            )
+            for segment in segments
+        ])
+    return merge_answers(segments, answers)
+
 def main():
     """Main function to handle AIFT audio analysis requests."""
     try:
@@ -33,19 +54,18 @@ def main():
             print("Error: Audio data file path and question parameters are required")
             sys.exit(1)
             
-        audio_data_file = sys.argv[1]  # Path to file containing base64 audio data
+        audio_data_file = sys.argv[1]  # Path to audio file, base64 .txt file or "-" for stdin
         question = sys.argv[2]
         sessionid = sys.argv[3] if len(sys.argv) > 3 else 'default-session'
         context = sys.argv[4] if len(sys.argv) > 4 else ''
         temperature = float(sys.argv[5]) if len(sys.argv) > 5 else 0.2
         return_json = sys.argv[6].lower() == 'true' if len(sys.argv) > 6 else False
         
-        # Read base64 audio data from file
+        # Read raw audio bytes (binary file, base64 .txt file or stdin stream)
         try:
-            with open(audio_data_file, 'r') as f:
-                audio_data = f.read().strip()
+            audio_data = read_payload(audio_data_file)
         except Exception as e:
-            print(f"Error: Cannot read audio data file - {str(e)}")
+            print(f"Error: Cannot read audio data - {str(e)}")
             sys.exit(1)
         
         # Process audio using file processor
@@ -84,12 +104,23 @@ def main():
 โปรดตอบคำถามทุกครั้งด้วยภาษาไทยที่ชัดเจนและเข้าใจง่าย
 """
         
-        # Call the AIFT AudioQA function with audio file path
-        result = audioqa.generate(
-            file=processed_audio_path,
-            instruction=audio_prompt,
-            return_json=return_json
-        )
+        # Long recordings are cut at pauses into bounded chunks that are
+        # analyzed concurrently, so latency follows the longest chunk
+        segments = None
+        if processed_audio_path == audio_result.get("backend_processed_path"):
+            segments = processor.split_audio(processed_audio_path)
+        if segments == []:
+            # Silent recording; nothing worth sending to AudioQA
+            result = NO_SPEECH_ANSWER
+        elif segments and len(segments) > 1:
+            result = asyncio.run(analyze_segments(segments, audio_prompt, return_json))
+        else:
+            # Call the AIFT AudioQA function with audio file path
+            result = aift_client.audioqa_generate(
+                file=processed_audio_path,
+                instruction=audio_prompt,
+                return_json=return_json
+            )
         
         # Print the result
         print(result)
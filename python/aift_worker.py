@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AIFT Worker Script
+Long-lived worker that serves AIFTIntegrated operations over JSON lines.
+
+Requests and responses are one JSON object per line. A request looks like:
+
+    {"id": "1", "op": "pdf", "data": "<base64>" | "data_file": "<path>", "question": "...",
+     "sessionid": "...", "context": "...", "temperature": 0.2, "return_json": false}
+
+and is answered with {"id": "1", "result": {...}} where result is the dict
+returned by the matching AIFTIntegrated method. With "stream": true, the
+answer is preceded by {"id": "1", "event": {...}} lines carrying the
+start/delta/done events of AIFTIntegrated.run_stream.
+
+{"op": "metrics"} returns the Prometheus text of every worker's request and
+stage metrics; --metrics-port also serves it over HTTP at /metrics.
+"""
+
+import os
+import sys
+import io
+import json
+import time
+import threading
+import signal
+import argparse
+import socketserver
+from aift_integrated import AIFTIntegrated
+from payload_reader import read_payload
+from metrics import REGISTRY, CONTENT_TYPE, metrics_server
+
+OPERATIONS = ['pdf', 'image', 'audio', 'chat', 'search', 'ping', 'metrics']
+STREAM_OPERATIONS = ['pdf', 'image', 'audio', 'chat']
+
+def read_request_data(request):
+    """Return the payload of a request: inline base64 or raw bytes from a data file"""
+    if request.get('data') is not None:
+        return request['data']
+
+    data_file = request.get('data_file')
+    if data_file:
+        return read_payload(data_file)
+
+    return ''
+
+def handle_request(handler, request):
+    """Dispatch one decoded request to the warm AIFTIntegrated handler"""
+    operation = request.get('op')
+    question = request.get('question', '')
+    sessionid = request.get('sessionid') or 'default-session'
+    context = request.get('context', '')
+    temperature = float(request.get('temperature', 0.2))
+    return_json = bool(request.get('return_json', False))
+
+    if operation == 'ping':
+        return {"success": True, "pid": os.getpid()}
+    elif operation == 'metrics':
+        return {"success": True, "content_type": CONTENT_TYPE, "metrics": REGISTRY.render()}
+    elif operation == 'chat':
+        return handler.chat(question, sessionid, context, temperature, return_json)
+    elif operation == 'pdf':
+        return handler.analyze_pdf(read_request_data(request), question, sessionid, context, temperature, return_json)
+    elif operation == 'image':
+        return handler.analyze_image(read_request_data(request), question, sessionid, context, temperature, return_json)
+    elif operation == 'audio':
+        return handler.analyze_audio(read_request_data(request), question, sessionid, context, temperature, return_json)
+    elif operation == 'search':
+        top_k = int(request.get('top_k', 10))
+        if request.get('mode') == 'keyword':
+            return {"success": True, "results": handler.processor.keyword_index.search(question, top_k)}
+        index = handler.processor.vector_index
+        if index is None:
+            return {"success": False, "error": "numpy is required for the vector index"}
+        return {"success": True, "results": index.search(question, top_k)}
+    else:
+        return {
+            "success": False,
+            "error": f"Unknown operation '{operation}'. Use one of: {', '.join(OPERATIONS)}"
+        }
+
+def stream_request(handler, request):
+    """Yield start/delta/done events for a request with "stream": true"""
+    operation = request.get('op')
+    data = read_request_data(request) if operation in ['pdf', 'image', 'audio'] else None
+    return handler.run_stream(
+        operation,
+        data,
+        request.get('question', ''),
+        request.get('sessionid') or 'default-session',
+        request.get('context', ''),
+        float(request.get('temperature', 0.2)),
+        bool(request.get('return_json', False))
+    )
+
+def encode_response(request_id, **fields):
+    return json.dumps({"id": request_id, **fields}, ensure_ascii=False, default=str)
+
+def encode_result(request_id, operation, result):
+    """Encode the final result line, timing its serialization as a stage"""
+    start = time.perf_counter()
+    line = encode_response(request_id, result=result)
+    REGISTRY.observe("aift_stage_duration_seconds", time.perf_counter() - start,
+                     operation=operation, stage="serialize")
+    REGISTRY.inc("aift_stage_bytes_total", len(line.encode('utf-8')), operation=operation, stage="serialize")
+    return line
+
+def process_line(handler, line):
+    """Decode a request line, run it and yield the encoded response lines.
+
+    A streaming request gets one {"id", "event"} line per event before its
+    {"id", "result"} line; every other request gets only the result line.
+    """
+    start = time.perf_counter()
+    request_id = None
+    operation = "invalid"
+    result = None
+    try:
+        request = json.loads(line)
+        request_id = request.get('id')
+        operation = str(request.get('op'))
+
+        if not (request.get('stream') and request.get('op') in STREAM_OPERATIONS):
+            result = handle_request(handler, request)
+        else:
+            for event in stream_request(handler, request):
+                yield encode_response(request_id, event=event)
+                if event["type"] in ("done", "error"):
+                    result = {key: value for key, value in event.items() if key != "type"}
+    except Exception as e:
+        result = {
+            "success": False,
+            "error": str(e)
+        }
+
+    # Unknown ops share one label so clients cannot create unbounded series
+    if operation not in OPERATIONS:
+        operation = "invalid"
+    yield encode_result(request_id, operation, result)
+    status = "ok" if isinstance(result, dict) and result.get("success") else "error"
+    REGISTRY.inc("aift_worker_requests_total", op=operation, status=status)
+    REGISTRY.observe("aift_worker_request_duration_seconds", time.perf_counter() - start, op=operation)
+
+def serve_stdio(handler):
+    """Serve requests from stdin and write responses to stdout"""
+    stdin = io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8')
+    for line in stdin:
+        line = line.strip()
+        if not line:
+            continue
+        for response in process_line(handler, line):
+            sys.stdout.write(response + "\n")
+            sys.stdout.flush()
+
+class WorkerRequestHandler(socketserver.StreamRequestHandler):
+    """Serve JSON-lines requests on one client connection"""
+
+    def handle(self):
+        for line in self.rfile:
+            line = line.strip()
+            if not line:
+                continue
+            for response in process_line(self.server.handler, line.decode('utf-8')):
+                self.wfile.write(response.encode('utf-8') + b"\n")
+                self.wfile.flush()
+
+class WorkerServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Threaded Unix socket server shared by all pre-forked workers"""
+    daemon_threads = True
+
+    def __init__(self, socket_path, handler):
+        self.handler = handler
+        super().__init__(socket_path, WorkerRequestHandler)
+        # Every worker polls the same listening socket; losers of an
+        # accept race must not block, so the listener is non-blocking
+        self.socket.setblocking(False)
+
+    def get_request(self):
+        conn, addr = self.socket.accept()
+        conn.setblocking(True)
+        return conn, addr
+
+class WorkerPool:
+    """Pre-forked pool of warm workers listening on one Unix socket"""
+
+    def __init__(self, socket_path, workers=4, upload_dir="uploads", metrics_port=None, metrics_dir=None):
+        self.socket_path = socket_path
+        self.workers = max(1, int(workers))
+        self.upload_dir = upload_dir
+        self.metrics_port = metrics_port
+        # Each worker saves its metrics here, so any process can report the totals
+        self.metrics_dir = metrics_dir or os.path.join(upload_dir, "metrics")
+        self.children = set()
+        self.stopping = False
+        self.server = None
+        self.metrics_server = None
+        self.exporter = None
+
+    def _fork(self, serve):
+        """Fork a child that runs serve() until killed"""
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            try:
+                serve()
+            finally:
+                os._exit(0)
+        return pid
+
+    def _serve_worker(self):
+        REGISTRY.reset()
+        REGISTRY.start_autosave()
+        self.server.serve_forever()
+
+    def _spawn(self):
+        """Fork one worker that serves the shared socket until killed"""
+        self.children.add(self._fork(self._serve_worker))
+
+    def _spawn_exporter(self):
+        """Fork the process that serves /metrics from the saved snapshots"""
+        self.exporter = self._fork(self.metrics_server.serve_forever)
+
+    def _stop(self, signum, frame):
+        self.stopping = True
+        for pid in list(self.children) + ([self.exporter] if self.exporter else []):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def serve(self):
+        """Warm up once, fork the workers and respawn any that exit"""
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+        # Imports, API key and upload directories are set up here, before
+        # forking, so every worker starts warm
+        handler = AIFTIntegrated(self.upload_dir)
+        self.server = WorkerServer(self.socket_path, handler)
+        REGISTRY.persist(self.metrics_dir)
+        REGISTRY.clear_snapshots()
+        if self.metrics_port:
+            self.metrics_server = metrics_server(self.metrics_port)
+
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+
+        for _ in range(self.workers):
+            self._spawn()
+        if self.metrics_server:
+            self._spawn_exporter()
+
+        try:
+            while self.children:
+                try:
+                    pid, _ = os.wait()
+                except ChildProcessError:
+                    break
+                except InterruptedError:
+                    continue
+                if pid == self.exporter:
+                    self.exporter = None
+                    if not self.stopping:
+                        self._spawn_exporter()
+                    continue
+                self.children.discard(pid)
+                if not self.stopping:
+                    self._spawn()
+        finally:
+            self.server.server_close()
+            if self.metrics_server:
+                self.metrics_server.server_close()
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve AIFT operations from warm worker processes')
+    parser.add_argument('--socket', help='Unix socket path to listen on (default: serve stdin/stdout)')
+    parser.add_argument('--workers', type=int, default=4, help='Number of pre-forked workers for --socket')
+    parser.add_argument('--upload-dir', default='uploads', help='Upload directory')
+    parser.add_argument('--metrics-port', type=int, help='Serve Prometheus metrics over HTTP on this port')
+    parser.add_argument('--metrics-dir', help='Directory for per-worker metric snapshots (default: <upload-dir>/metrics)')
+
+    args = parser.parse_args()
+
+    if args.socket:
+        WorkerPool(args.socket, args.workers, args.upload_dir, args.metrics_port, args.metrics_dir).serve()
+        return
+
+    handler = AIFTIntegrated(args.upload_dir)
+    if args.metrics_dir:
+        REGISTRY.persist(args.metrics_dir)
+    if args.metrics_port:
+        threading.Thread(target=metrics_server(args.metrics_port).serve_forever, daemon=True).start()
+    serve_stdio(handler)
+
+if __name__ == "__main__":
+    main()
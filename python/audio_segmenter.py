@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Audio Segmenter
+Energy-based voice activity detection that cuts a recording into chunks of
+bounded length at pauses in the speech.
+
+Frame energies are read block by block, so only one value per 30 ms frame is
+kept in memory. Chunks are returned as sample ranges; each one can be sent to
+AudioQA on its own and the answers merged by their timestamps.
+"""
+
+import os
+from importlib.util import find_spec
+import numpy as np
+
+# soundfile is imported on first use so importing this module stays cheap
+SEGMENTER_AVAILABLE = find_spec("soundfile") is not None
+
+FRAME_MS = 30
+MAX_CHUNK_SECONDS = float(os.environ.get('AIFT_AUDIO_MAX_CHUNK_SECONDS', 30))
+MIN_SILENCE_MS = 300    # shorter pauses are treated as part of the speech
+MIN_SPEECH_MS = 200     # shorter bursts are treated as noise
+SPEECH_PAD_MS = 150     # kept around each speech region so words are not clipped
+FLOOR_MARGIN_DB = 12    # speech is this much louder than the noise floor...
+PEAK_RANGE_DB = 45      # ...and no quieter than this below the loudest frame
+SILENCE_DBFS = -60      # a recording whose loudest frame is below this is silent
+
+def frame_energies(source, frame_ms=FRAME_MS):
+    """Return (energy in dB per frame, frame length in samples, sample rate)"""
+    import soundfile as sf
+    with sf.SoundFile(source) as f:
+        sr = f.samplerate
+        frame_len = max(1, sr * frame_ms // 1000)
+        block_frames = frame_len * 2048
+        energies = []
+        for block in f.blocks(blocksize=block_frames, dtype='float32', always_2d=True):
+            mono = block.mean(axis=1)
+            usable = len(mono) // frame_len * frame_len
+            if usable:
+                frames = mono[:usable].reshape(-1, frame_len)
+                energies.append(np.mean(frames ** 2, axis=1))
+            if usable < len(mono):
+                energies.append(np.array([np.mean(mono[usable:] ** 2)]))
+    power = np.concatenate(energies) if energies else np.zeros(0)
+    return 10 * np.log10(power + 1e-10), frame_len, sr
+
+def _runs(mask):
+    """Return [start, end) frame ranges where mask is True"""
+    edges = np.diff(np.concatenate([[0], mask.astype(np.int8), [0]]))
+    return list(zip(np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)))
+
+def speech_regions(energy_db, frame_ms=FRAME_MS):
+    """Return [start, end) frame ranges that contain speech"""
+    if len(energy_db) == 0:
+        return []
+    threshold = max(np.percentile(energy_db, 10) + FLOOR_MARGIN_DB, energy_db.max() - PEAK_RANGE_DB)
+    mask = energy_db > threshold
+
+    # Bridge short pauses, then drop bursts too short to be speech
+    for start, end in _runs(~mask):
+        if start > 0 and end < len(mask) and (end - start) * frame_ms < MIN_SILENCE_MS:
+            mask[start:end] = True
+    regions = [(s, e) for s, e in _runs(mask) if (e - s) * frame_ms >= MIN_SPEECH_MS]
+
+    pad = SPEECH_PAD_MS // frame_ms
+    return [(max(0, s - pad), min(len(mask), e + pad)) for s, e in regions]
+
+def _split_long(start, end, energy_db, max_frames):
+    """Split a frame range longer than max_frames at its quietest frames"""
+    pieces = []
+    while end - start > max_frames:
+        # Cut at the quietest frame in the last quarter of the allowed length
+        window_start = start + max_frames * 3 // 4
+        cut = window_start + int(np.argmin(energy_db[window_start:start + max_frames]))
+        # With max_frames of 1 the window starts at start itself
+        cut = max(cut, start + 1)
+        pieces.append((start, cut))
+        start = cut
+    pieces.append((start, end))
+    return pieces
+
+def plan_chunks(energy_db, max_seconds=MAX_CHUNK_SECONDS, frame_ms=FRAME_MS):
+    """Group speech regions into [start, end) frame ranges of at most max_seconds;
+    a silent recording has none"""
+    if len(energy_db) == 0 or energy_db.max() < SILENCE_DBFS:
+        return []
+    max_frames = max(1, int(max_seconds * 1000 // frame_ms))
+    regions = speech_regions(energy_db, frame_ms)
+    if not regions:
+        # Sound with no quiet gaps (music, dense speech over noise) has no
+        # floor to stand out from; split the whole recording instead
+        regions = [(0, len(energy_db))]
+
+    chunks = []
+    for start, end in regions:
+        for piece_start, piece_end in _split_long(start, end, energy_db, max_frames):
+            if chunks and piece_end - chunks[-1][0] <= max_frames:
+                # Extend the current chunk across the pause
+                chunks[-1] = (chunks[-1][0], piece_end)
+            else:
+                chunks.append((piece_start, piece_end))
+    return chunks
+
+def segment_audio(source, max_seconds=MAX_CHUNK_SECONDS):
+    """Return chunks of speech as dicts with start/end sample offsets and seconds;
+    an empty list means the recording is silent"""
+    if not SEGMENTER_AVAILABLE:
+        raise ImportError("soundfile is required for audio segmentation")
+    import soundfile as sf
+
+    energy_db, frame_len, sr = frame_energies(source)
+    with sf.SoundFile(source) as f:
+        total = f.frames
+
+    segments = []
+    for start, end in plan_chunks(energy_db, max_seconds):
+        start_sample = int(start) * frame_len
+        end_sample = min(int(end) * frame_len, total)
+        segments.append({
+            "index": len(segments),
+            "start_sample": start_sample,
+            "end_sample": end_sample,
+            "start": round(start_sample / sr, 2),
+            "end": round(end_sample / sr, 2)
+        })
+    return segments
+
+def format_timestamp(seconds):
+    """Format seconds as m:ss, or h:mm:ss for long recordings"""
+    seconds = int(seconds)
+    hours, rest = divmod(seconds, 3600)
+    minutes, secs = divmod(rest, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{secs:02d}"
+    return f"{minutes}:{secs:02d}"
+
+def merge_answers(segments, answers):
+    """Join per-chunk answers in time order, each under its time range"""
+    parts = []
+    for segment, answer in sorted(zip(segments, answers), key=lambda pair: pair[0]["start"]):
+        text = answer if isinstance(answer, str) else str(answer)
+        parts.append(f"[{format_timestamp(segment['start'])}-{format_timestamp(segment['end'])}] {text.strip()}")
+    return "\n\n".join(parts)
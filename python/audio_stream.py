@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Audio Stream
+Block-wise audio preprocessing for recordings of any length.
+
+The source is read twice in fixed-size blocks: once to find the peak level,
+then again to normalize, pre-emphasize and resample each block before it is
+written to the output file. Only a few blocks are held in memory at a time,
+and the result matches processing the whole signal at once.
+
+Resampling uses soxr when it is installed, otherwise scipy's polyphase
+filter; AIFT_AUDIO_RESAMPLER or the resampler argument picks one explicitly.
+"""
+
+import io
+import os
+import math
+from importlib.util import find_spec
+import numpy as np
+
+# soundfile is needed for every path; scipy, soxr and librosa are imported
+# only by the resampler that uses them (librosa alone takes about a second)
+AUDIO_STREAM_AVAILABLE = find_spec("soundfile") is not None
+SOXR_AVAILABLE = find_spec("soxr") is not None
+SCIPY_AVAILABLE = find_spec("scipy") is not None
+LIBROSA_AVAILABLE = find_spec("librosa") is not None
+sf = None
+
+def _load_soundfile():
+    """Import soundfile on first use"""
+    global sf
+    if not AUDIO_STREAM_AVAILABLE:
+        raise ImportError("soundfile is required for audio processing. Install with: pip install soundfile")
+    import soundfile as sf
+    return sf
+
+TARGET_SAMPLE_RATE = 16000
+PREEMPHASIS_COEF = 0.97
+AUDIO_BLOCK_FRAMES = 64 * 1024
+
+# Resampler backends, fastest first; "auto" picks the first one available
+RESAMPLERS = ["soxr", "poly", "librosa"]
+DEFAULT_RESAMPLER = os.environ.get("AIFT_AUDIO_RESAMPLER", "auto")
+
+# Sample rates the Opus encoder accepts; previews go no higher than
+# super-wideband, which is plenty for speech
+OPUS_SAMPLE_RATES = [8000, 12000, 16000, 24000, 48000]
+PREVIEW_MAX_SAMPLE_RATE = 24000
+
+class PolyphaseResampler:
+    """Resamples a signal fed in blocks; the output equals resample_poly on the whole signal"""
+
+    def __init__(self, orig_sr, target_sr):
+        from scipy import signal
+        self._resample_poly = signal.resample_poly
+        rate_gcd = math.gcd(int(orig_sr), int(target_sr))
+        self.up = int(target_sr) // rate_gcd
+        self.down = int(orig_sr) // rate_gcd
+
+        # Same anti-aliasing filter resample_poly designs, computed once
+        half_len = 10 * max(self.up, self.down)
+        self.filter = signal.firwin(2 * half_len + 1, 1.0 / max(self.up, self.down), window=('kaiser', 5.0))
+
+        # Input samples each output sample reaches on either side, rounded up
+        # to a multiple of down so every buffer starts on an output sample
+        reach = half_len // self.up + 1
+        self.context = -(-reach // self.down) * self.down
+
+        self.buffer = np.zeros(0, dtype=np.float32)
+        self.start = 0      # input index of buffer[0]
+        self.received = 0   # input samples fed so far
+        self.emitted = 0    # output samples returned so far
+
+    def _emit(self, end):
+        """Return output samples [emitted, end) and drop input no longer needed"""
+        if end <= self.emitted:
+            return np.zeros(0, dtype=np.float32)
+
+        offset = self.start * self.up // self.down
+        resampled = self._resample_poly(self.buffer, self.up, self.down, window=self.filter)
+        out = resampled[self.emitted - offset:end - offset]
+        self.emitted = end
+
+        keep_from = (self.emitted * self.down // self.up - self.context) // self.down * self.down
+        if keep_from > self.start:
+            self.buffer = self.buffer[keep_from - self.start:]
+            self.start = keep_from
+        return out.astype(np.float32, copy=False)
+
+    def process(self, block):
+        """Feed the next input block and return every output sample it completes"""
+        self.buffer = np.concatenate([self.buffer, block])
+        self.received += len(block)
+        complete = self.received - self.context
+        return self._emit(max(0, complete * self.up // self.down))
+
+    def flush(self):
+        """Return the remaining output once the input has ended"""
+        return self._emit(-(-self.received * self.up // self.down))
+
+class SoxrResampler:
+    """Streaming soxr resampler at the quality librosa uses by default (soxr_hq)"""
+
+    def __init__(self, orig_sr, target_sr, quality='HQ'):
+        import soxr
+        self.stream = soxr.ResampleStream(orig_sr, target_sr, 1, dtype='float32', quality=quality)
+
+    def process(self, block):
+        return self.stream.resample_chunk(np.ascontiguousarray(block, dtype=np.float32))
+
+    def flush(self):
+        return self.stream.resample_chunk(np.zeros(0, dtype=np.float32), last=True)
+
+class LibrosaResampler:
+    """librosa.resample on the whole signal at flush; memory grows with the input"""
+
+    def __init__(self, orig_sr, target_sr):
+        self.orig_sr = orig_sr
+        self.target_sr = target_sr
+        self.blocks = []
+
+    def process(self, block):
+        self.blocks.append(block)
+        return np.zeros(0, dtype=np.float32)
+
+    def flush(self):
+        y = np.concatenate(self.blocks) if self.blocks else np.zeros(0, dtype=np.float32)
+        self.blocks = []
+        import librosa
+        return librosa.resample(y, orig_sr=self.orig_sr, target_sr=self.target_sr)
+
+def available_resamplers():
+    """Return the resampler backends usable in this environment"""
+    installed = {"soxr": SOXR_AVAILABLE, "poly": SCIPY_AVAILABLE, "librosa": LIBROSA_AVAILABLE}
+    return [name for name in RESAMPLERS if installed[name]]
+
+def make_resampler(orig_sr, target_sr, backend=None):
+    """Create a block resampler for backend "auto", "soxr", "poly" or "librosa" (default from the environment)"""
+    backend = backend or DEFAULT_RESAMPLER
+    if backend == "auto":
+        available = available_resamplers()
+        if not available:
+            raise ImportError("soxr or scipy is required to resample audio. Install with: pip install soxr")
+        backend = available[0]
+    if backend == "soxr":
+        if not SOXR_AVAILABLE:
+            raise ImportError("soxr is required for the soxr resampler. Install with: pip install soxr")
+        return SoxrResampler(orig_sr, target_sr)
+    if backend == "poly":
+        if not SCIPY_AVAILABLE:
+            raise ImportError("scipy is required for the poly resampler. Install with: pip install scipy")
+        return PolyphaseResampler(orig_sr, target_sr)
+    if backend == "librosa":
+        if not LIBROSA_AVAILABLE:
+            raise ImportError("librosa is required for the librosa resampler. Install with: pip install librosa")
+        return LibrosaResampler(orig_sr, target_sr)
+    raise ValueError(f"Unknown resampler '{backend}'. Use one of: auto, {', '.join(RESAMPLERS)}")
+
+def preemphasis(block, coef=PREEMPHASIS_COEF, zi=None):
+    """librosa.effects.preemphasis for one block; returns (filtered, state for the next block)"""
+    if zi is None:
+        # Same linear extrapolation librosa starts the filter with
+        zi = 2 * block[0] - block[1] if len(block) > 1 else block[0]
+    out = np.empty_like(block)
+    out[0] = block[0] + zi
+    out[1:] = block[1:] - coef * block[:-1]
+    return out, -coef * block[-1]
+
+def _open(source):
+    """Open a path, raw bytes or a seekable file for reading with soundfile"""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = io.BytesIO(source)
+    elif hasattr(source, 'seek'):
+        source.seek(0)
+    return _load_soundfile().SoundFile(source)
+
+def iter_mono_blocks(source, block_frames=AUDIO_BLOCK_FRAMES):
+    """Yield the source as mono float32 blocks"""
+    with _open(source) as f:
+        for block in f.blocks(blocksize=block_frames, dtype='float32', always_2d=True):
+            yield block[:, 0].copy() if f.channels == 1 else block.mean(axis=1)
+
+def peak_level(source, block_frames=AUDIO_BLOCK_FRAMES):
+    """Return the largest absolute sample of the mono signal"""
+    peak = 0.0
+    for block in iter_mono_blocks(source, block_frames):
+        if len(block):
+            peak = max(peak, float(np.abs(block).max()))
+    return peak
+
+def preprocess_stream(source, output, target_sr=TARGET_SAMPLE_RATE, coef=PREEMPHASIS_COEF,
+                      block_frames=AUDIO_BLOCK_FRAMES, resampler=None, output_format='WAV'):
+    """Peak-normalize, pre-emphasize and resample source into 16-bit WAV or FLAC at output.
+
+    Equivalent to librosa.util.normalize, librosa.effects.preemphasis and a
+    resample of the whole signal with the chosen backend.
+    Returns (frames written, sample rate).
+    """
+    _load_soundfile()
+
+    with _open(source) as f:
+        orig_sr = f.samplerate
+
+    # First pass: peak level for normalization
+    peak = peak_level(source, block_frames)
+    scale = np.float32(1.0 / peak) if peak >= np.finfo(np.float32).tiny else np.float32(1.0)
+
+    # Second pass: filter, resample and write each block as it is read
+    resampler = make_resampler(orig_sr, target_sr, resampler) if orig_sr != target_sr else None
+    zi = None
+    frames = 0
+    with sf.SoundFile(output, 'w', samplerate=target_sr, channels=1, format=output_format, subtype='PCM_16') as out:
+        for block in iter_mono_blocks(source, block_frames):
+            block *= scale
+            block, zi = preemphasis(block, np.float32(coef), zi)
+            if resampler is not None:
+                block = resampler.process(block)
+            out.write(block)
+            frames += len(block)
+
+        if resampler is not None:
+            block = resampler.flush()
+            out.write(block)
+            frames += len(block)
+
+    return frames, target_sr
+
+def opus_available():
+    """True if libsndfile can write Ogg Opus"""
+    return AUDIO_STREAM_AVAILABLE and _load_soundfile().check_format('OGG', 'OPUS')
+
+def encode_preview(source, output, block_frames=AUDIO_BLOCK_FRAMES, resampler=None):
+    """Encode source as a mono Ogg Opus preview for playback, block by block.
+
+    The audio is not filtered; it is only resampled to a rate Opus supports,
+    at most PREVIEW_MAX_SAMPLE_RATE. Returns the preview's sample rate.
+    """
+    with _open(source) as f:
+        orig_sr = f.samplerate
+    target_sr = next(rate for rate in OPUS_SAMPLE_RATES if rate >= min(orig_sr, PREVIEW_MAX_SAMPLE_RATE))
+
+    stream = make_resampler(orig_sr, target_sr, resampler) if orig_sr != target_sr else None
+    with sf.SoundFile(output, 'w', samplerate=target_sr, channels=1, format='OGG', subtype='OPUS') as out:
+        for block in iter_mono_blocks(source, block_frames):
+            out.write(stream.process(block) if stream is not None else block)
+        if stream is not None:
+            out.write(stream.flush())
+    return target_sr
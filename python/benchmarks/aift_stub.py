@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AIFT Stub Server
+Local HTTP server standing in for the AIFT API in benchmarks.
+
+The `aift` package in benchmarks/stub_aift has the same textqa, vqa and
+audioqa functions as the SDK but posts each call to this server, which waits
+a fixed latency and answers with a fixed text. Benchmarks therefore measure
+this repository's code plus a real local round trip, not the remote service.
+
+Usage:
+    python benchmarks/aift_stub.py --port 8765 --latency 0.05
+    PYTHONPATH=benchmarks/stub_aift:. AIFT_STUB_URL=http://127.0.0.1:8765 python aift_integrated.py chat - "hello"
+"""
+
+import os
+import json
+import time
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+PYTHON_DIR = os.path.dirname(BENCH_DIR)
+STUB_PACKAGE_DIR = os.path.join(BENCH_DIR, "stub_aift")
+
+DEFAULT_LATENCY = 0.05
+DEFAULT_ANSWER_WORDS = 64
+
+class StubRequestHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        time.sleep(self.server.latency)
+        self.server.record(self.path.strip("/"))
+
+        body = json.dumps({
+            "content": " ".join(["คำตอบจำลอง"] * self.server.answer_words),
+            "endpoint": self.path.strip("/"),
+            "instruction_chars": len(payload.get("instruction") or ""),
+            "file_bytes": payload.get("file_bytes", 0)
+        }, ensure_ascii=False).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+class StubAIFTServer(ThreadingHTTPServer):
+    """Threaded stub of the AIFT API answering every call after a fixed latency"""
+    daemon_threads = True
+
+    def __init__(self, port=0, latency=DEFAULT_LATENCY, answer_words=DEFAULT_ANSWER_WORDS):
+        super().__init__(("127.0.0.1", port), StubRequestHandler)
+        self.latency = latency
+        self.answer_words = answer_words
+        self.calls = {}
+        self._lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def record(self, endpoint):
+        with self._lock:
+            self.calls[endpoint] = self.calls.get(endpoint, 0) + 1
+
+    def start(self):
+        """Serve from a daemon thread and return self"""
+        threading.Thread(target=self.serve_forever, name="aift-stub", daemon=True).start()
+        return self
+
+def stub_env(url, env=None):
+    """Environment for a process that should call the stub instead of the AIFT API"""
+    env = dict(os.environ if env is None else env)
+    paths = [STUB_PACKAGE_DIR, PYTHON_DIR] + ([env["PYTHONPATH"]] if env.get("PYTHONPATH") else [])
+    env["PYTHONPATH"] = os.pathsep.join(paths)
+    env["AIFT_STUB_URL"] = url
+    # Every call should reach the stub, not the response cache
+    env["AIFT_CACHE_DISABLED"] = "1"
+    return env
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve a local stub of the AIFT API')
+    parser.add_argument('--port', type=int, default=8765, help='Port to listen on')
+    parser.add_argument('--latency', type=float, default=DEFAULT_LATENCY, help='Seconds each call waits')
+    parser.add_argument('--answer-words', type=int, default=DEFAULT_ANSWER_WORDS, help='Words in each answer')
+    args = parser.parse_args()
+
+    server = StubAIFTServer(args.port, args.latency, args.answer_words)
+    print(f"AIFT stub listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Import-Time Benchmark
+Measures the cold start of a fresh Python process that imports file_processor
+and handles one upload of each type, and lists which heavy libraries that
+request loaded. The "eager" rows import every backend up front, as
+file_processor used to, for comparison.
+
+Usage:
+    python benchmarks/bench_imports.py
+    python benchmarks/bench_imports.py --repeat 10 --json
+"""
+
+import os
+import sys
+import io
+import json
+import math
+import time
+import wave
+import struct
+import argparse
+import tempfile
+import subprocess
+import statistics
+
+PYTHON_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ["PyPDF2", "PIL", "cv2", "numpy", "scipy", "librosa", "numba", "soundfile", "soxr"]
+# What importing file_processor used to load, whatever the request
+EAGER_IMPORTS = "import PyPDF2, PIL.Image, PIL.ImageOps, cv2, numpy, librosa, soundfile, audioread, soxr\nfrom scipy import signal\n"
+
+REQUEST_SCRIPT = """
+import sys, json, time
+start = time.perf_counter()
+{eager}from upload_handler import UploadHandler
+imported = time.perf_counter()
+handler = UploadHandler({upload_dir!r})
+if {kind!r} != 'import':
+    with open({path!r}, 'rb') as f:
+        data = f.read()
+    result = handler.process_upload(data, {filename!r}, {file_type!r})
+    assert result.get('success'), result
+done = time.perf_counter()
+print(json.dumps({{
+    "import_ms": (imported - start) * 1000,
+    "total_ms": (done - start) * 1000,
+    "loaded": [name for name in {heavy!r} if name in sys.modules]
+}}))
+"""
+
+def minimal_pdf(pages=3, lines=1, tag=""):
+    """A text PDF built by hand so the harness itself needs no PDF library"""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None,
+               "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for page in range(pages):
+        text = " ".join(f"BT /F1 10 Tf 72 {740 - 14 * line} Td ({tag} Benchmark page {page + 1} line {line + 1} "
+                        f"sample text about rice farming and weather in Thailand) Tj ET".replace("( ", "(")
+                        for line in range(lines))
+        objects.append(f"<< /Length {len(text)} >>\nstream\n{text}\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>")
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {pages} >>"
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(out.tell())
+        out.write(f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1"))
+    xref = out.tell()
+    out.write(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1"))
+    for offset in offsets:
+        out.write(f"{offset:010d} 00000 n \n".encode("latin-1"))
+    out.write(f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("latin-1"))
+    return out.getvalue()
+
+def minimal_png(width=64, height=48):
+    """A small RGB gradient PNG written with zlib only"""
+    import zlib
+    raw = b"".join(b"\x00" + b"".join(bytes((x * 4 % 256, y * 5 % 256, 128)) for x in range(width))
+                   for y in range(height))
+
+    def chunk(kind, payload):
+        return (struct.pack(">I", len(payload)) + kind + payload +
+                struct.pack(">I", zlib.crc32(kind + payload) & 0xffffffff))
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", zlib.compress(raw)) + chunk(b"IEND", b"")
+
+def minimal_wav(seconds=2, sr=44100):
+    """A 16-bit mono sine tone written with the wave module"""
+    out = io.BytesIO()
+    with wave.open(out, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(sr)
+        w.writeframes(b"".join(struct.pack("<h", int(8000 * math.sin(2 * math.pi * 220 * i / sr)))
+                               for i in range(int(seconds * sr))))
+    return out.getvalue()
+
+def run_once(kind, work_dir, eager):
+    files = {
+        "import": (None, "", ""),
+        "text": ("sample.txt", "notes.txt", "text"),
+        "pdf": ("sample.pdf", "paper.pdf", "pdf"),
+        "image": ("sample.png", "photo.png", "image/png"),
+        "audio": ("sample.wav", "voice.wav", "audio/wav")
+    }
+    name, filename, file_type = files[kind]
+    script = REQUEST_SCRIPT.format(
+        eager=EAGER_IMPORTS if eager else "",
+        # A fresh upload directory, so no request is served from a cache
+        upload_dir=tempfile.mkdtemp(prefix="uploads-", dir=work_dir),
+        kind=kind,
+        path=os.path.join(work_dir, name) if name else "",
+        filename=filename,
+        file_type=file_type,
+        heavy=HEAVY_MODULES
+    )
+    start = time.perf_counter()
+    output = subprocess.run([sys.executable, "-c", script], cwd=PYTHON_DIR, capture_output=True,
+                            text=True, check=True).stdout
+    wall_ms = (time.perf_counter() - start) * 1000
+    result = json.loads(output.strip().splitlines()[-1])
+    result["wall_ms"] = wall_ms
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark file_processor cold start per request type')
+    parser.add_argument('--repeat', type=int, default=5, help='Fresh processes per scenario (median is reported)')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        with open(os.path.join(work_dir, "sample.txt"), "w", encoding="utf-8") as f:
+            f.write("ข้อความตัวอย่างสำหรับทดสอบ benchmark text upload\n" * 20)
+        with open(os.path.join(work_dir, "sample.pdf"), "wb") as f:
+            f.write(minimal_pdf())
+        with open(os.path.join(work_dir, "sample.png"), "wb") as f:
+            f.write(minimal_png())
+        with open(os.path.join(work_dir, "sample.wav"), "wb") as f:
+            f.write(minimal_wav())
+
+        # Warm the OS file cache so the first scenario is not penalized
+        run_once("import", work_dir, eager=True)
+
+        results = []
+        for kind in ["import", "text", "pdf", "image", "audio"]:
+            for eager in (False, True):
+                runs = [run_once(kind, work_dir, eager) for _ in range(args.repeat)]
+                results.append({
+                    "request": kind,
+                    "mode": "eager" if eager else "lazy",
+                    "import_ms": round(statistics.median(r["import_ms"] for r in runs), 1),
+                    "total_ms": round(statistics.median(r["total_ms"] for r in runs), 1),
+                    "wall_ms": round(statistics.median(r["wall_ms"] for r in runs), 1),
+                    "loaded": runs[-1]["loaded"]
+                })
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'request':<8}{'mode':<7}{'import ms':>10}{'request ms':>12}{'process ms':>12}  heavy modules loaded")
+    for r in results:
+        print(f"{r['request']:<8}{r['mode']:<7}{r['import_ms']:>10}{r['total_ms']:>12}{r['wall_ms']:>12}  "
+              f"{', '.join(r['loaded']) or '-'}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Resampler Benchmark
+Times each audio resampler backend converting 44.1/48 kHz audio to 16 kHz and
+measures how far its output is from the former librosa.resample result (SNR).
+librosa.resample defaults to soxr_hq from librosa 0.10 and to kaiser_best
+(resampy) before that; --reference-res-type compares against either.
+
+Usage:
+    python benchmarks/bench_resample.py
+    python benchmarks/bench_resample.py --input lecture.wav --repeat 5 --json
+"""
+
+import os
+import sys
+import io
+import json
+import time
+import argparse
+import numpy as np
+import librosa
+import soundfile as sf
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from audio_stream import (make_resampler, available_resamplers, preprocess_stream,
+                          TARGET_SAMPLE_RATE, AUDIO_BLOCK_FRAMES)
+
+def synthetic_voice(sr, seconds, seed=0):
+    """Harmonic signal with a gliding pitch and noise, roughly shaped like speech"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(sr * seconds)) / sr
+    f0 = 160 + 60 * np.sin(2 * np.pi * 0.7 * t)
+    phase = 2 * np.pi * np.cumsum(f0) / sr
+    y = sum(np.sin(k * phase) / k for k in range(1, 40) if k * 220 < 7000)
+    y *= 0.5 + 0.5 * np.sin(2 * np.pi * 3 * t) ** 2
+    y += 0.02 * rng.standard_normal(len(t))
+    return (0.3 * y / np.abs(y).max()).astype(np.float32)
+
+def snr_db(reference, output):
+    """Signal-to-noise ratio of output against reference, in dB"""
+    n = min(len(reference), len(output))
+    noise = reference[:n] - output[:n]
+    return 10 * np.log10(np.sum(reference[:n] ** 2) / max(np.sum(noise ** 2), 1e-20))
+
+def resample_blocks(y, sr, backend):
+    """Resample y through a block resampler as preprocess_stream would"""
+    resampler = make_resampler(sr, TARGET_SAMPLE_RATE, backend)
+    pieces = [resampler.process(y[i:i + AUDIO_BLOCK_FRAMES]) for i in range(0, len(y), AUDIO_BLOCK_FRAMES)]
+    pieces.append(resampler.flush())
+    return np.concatenate(pieces)
+
+def legacy_preprocess(data, res_type=None):
+    """The former whole-signal pipeline: load, normalize, pre-emphasize, librosa.resample"""
+    y, sr = librosa.load(io.BytesIO(data), sr=None)
+    y = librosa.effects.preemphasis(librosa.util.normalize(y))
+    return reference_resample(y, sr, res_type)
+
+def reference_resample(y, sr, res_type=None):
+    kwargs = {"res_type": res_type} if res_type else {}
+    return librosa.resample(y, orig_sr=sr, target_sr=TARGET_SAMPLE_RATE, **kwargs)
+
+def best_time(fn, repeat):
+    """Best of repeat timed runs, after one untimed run that pays for lazy imports and caches"""
+    fn()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark audio resampler backends')
+    parser.add_argument('--input', help='Audio file to use instead of synthetic 44.1/48 kHz signals')
+    parser.add_argument('--seconds', type=float, default=60, help='Length of the synthetic signals')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per measurement (best is reported)')
+    parser.add_argument('--reference-res-type', help='librosa res_type of the reference (default: librosa\'s default)')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args()
+
+    if args.input:
+        y, sr = librosa.load(args.input, sr=None)
+        signals = [(os.path.basename(args.input), y, sr)]
+    else:
+        signals = [(f"synthetic-{sr}", synthetic_voice(sr, args.seconds), sr) for sr in (44100, 48000)]
+
+    results = []
+    for name, y, sr in signals:
+        reference_time, reference = best_time(
+            lambda: reference_resample(y, sr, args.reference_res_type), args.repeat)
+
+        buffer = io.BytesIO()
+        sf.write(buffer, y, sr, format='WAV', subtype='FLOAT')
+        data = buffer.getvalue()
+        legacy_time, _ = best_time(lambda: legacy_preprocess(data, args.reference_res_type), args.repeat)
+
+        for backend in available_resamplers():
+            resample_time, output = best_time(lambda: resample_blocks(y, sr, backend), args.repeat)
+            pipeline_time, _ = best_time(
+                lambda: preprocess_stream(data, io.BytesIO(), resampler=backend), args.repeat)
+            results.append({
+                "signal": name,
+                "sample_rate": sr,
+                "seconds": round(len(y) / sr, 2),
+                "backend": backend,
+                "resample_ms": round(resample_time * 1000, 1),
+                "resample_speedup": round(reference_time / resample_time, 2),
+                "snr_db": round(float(snr_db(reference, output)), 1),
+                "pipeline_ms": round(pipeline_time * 1000, 1),
+                "pipeline_speedup": round(legacy_time / pipeline_time, 2),
+                "legacy_pipeline_ms": round(legacy_time * 1000, 1)
+            })
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'signal':<18}{'backend':<9}{'resample ms':>12}{'x':>9}{'SNR dB':>9}{'pipeline ms':>13}{'x':>9}")
+    for r in results:
+        print(f"{r['signal']:<18}{r['backend']:<9}{r['resample_ms']:>12.1f}{r['resample_speedup']:>9.2f}"
+              f"{r['snr_db']:>9.1f}{r['pipeline_ms']:>13.1f}{r['pipeline_speedup']:>9.2f}")
+    print("x = speedup over librosa.resample / the former whole-signal pipeline; "
+          "SNR is measured against librosa.resample")
+
+if __name__ == "__main__":
+    main()
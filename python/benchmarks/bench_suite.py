@@ -0,0 +1,440 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark Suite
+Latency, throughput and peak memory of the Python processing and analysis
+paths, with a local stub server standing in for the AIFT API.
+
+Every scenario runs in a fresh process. Each iteration gets a new input, so
+nothing is served from the extraction, image or response caches. Warm-up
+iterations are discarded, then p50/p95 latency, throughput and the peak RSS
+of the process and its children are reported. Results are compared with a
+baseline in benchmarks/baselines/, so regressions show up as diffs.
+
+Usage:
+    python benchmarks/bench_suite.py --list
+    python benchmarks/bench_suite.py --filter process_pdf --iterations 20
+    python benchmarks/bench_suite.py --save-baseline
+    python benchmarks/bench_suite.py --baseline default --fail-on-regression
+"""
+
+import os
+import sys
+import io
+import json
+import math
+import time
+import wave
+import argparse
+import platform
+import resource
+import tempfile
+import subprocess
+import statistics
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+PYTHON_DIR = os.path.dirname(BENCH_DIR)
+BASELINE_DIR = os.path.join(BENCH_DIR, "baselines")
+
+from aift_stub import StubAIFTServer, stub_env, DEFAULT_LATENCY
+from bench_imports import minimal_pdf
+
+PDF_LINES_PER_PAGE = 40
+QUESTION = "สรุปเนื้อหาสำคัญให้หน่อย"
+
+# name -> (workload, parameter)
+SCENARIOS = {
+    "process_pdf/1p": ("pdf", 1),
+    "process_pdf/10p": ("pdf", 10),
+    "process_pdf/50p": ("pdf", 50),
+    "process_pdf/200p": ("pdf", 200),
+    "process_image/640x480": ("image", (640, 480)),
+    "process_image/1920x1080": ("image", (1920, 1080)),
+    "process_image/4032x3024": ("image", (4032, 3024)),
+    "process_audio/10s": ("audio", 10),
+    "process_audio/60s": ("audio", 60),
+    "process_audio/300s": ("audio", 300),
+    "analyze/pdf-10p": ("analyze_pdf", 10),
+    "analyze/image-1920x1080": ("analyze_image", (1920, 1080)),
+    "analyze/audio-60s": ("analyze_audio", 60),
+    "analyze/chat": ("chat", None),
+    "spawn/chat": ("spawn", "chat"),
+    "worker/chat": ("worker", "chat"),
+    "spawn/pdf-10p": ("spawn", "pdf"),
+    "worker/pdf-10p": ("worker", "pdf")
+}
+
+# Relative change that counts as a regression, and the latency change
+# below which a difference is treated as noise
+DEFAULT_THRESHOLD = 0.15
+MIN_LATENCY_DELTA_MS = 2.0
+
+def sample_pdf(pages, iteration):
+    return minimal_pdf(pages, PDF_LINES_PER_PAGE, tag=f"run{iteration}")
+
+def sample_image(width, height, iteration, _cache={}):
+    """A JPEG photo stand-in: smooth gradients plus noise, with a corner block varied per iteration"""
+    import numpy as np
+    from PIL import Image
+    key = (width, height)
+    if key not in _cache:
+        rng = np.random.default_rng(0)
+        y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+        base = np.stack([x / width * 255, y / height * 255, (x + y) / (width + height) * 255], axis=-1)
+        base += rng.normal(0, 12, base.shape)
+        _cache[key] = np.clip(base, 0, 255).astype(np.uint8)
+    pixels = _cache[key].copy()
+    # A whole block, since JPEG quantization can erase a one-pixel change
+    pixels[:16, :16] = [iteration * 37 % 256, iteration // 7 * 53 % 256, iteration % 2 * 255]
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, "JPEG", quality=90)
+    return buffer.getvalue()
+
+def sample_audio(seconds, iteration, sr=44100, _cache={}):
+    """16-bit mono WAV of tone bursts and pauses, roughly paced like speech"""
+    import numpy as np
+    if seconds not in _cache:
+        rng = np.random.default_rng(0)
+        t = np.arange(int(seconds * sr)) / sr
+        voiced = (t % 2.0) < 1.5
+        signal = 0.3 * np.sin(2 * np.pi * (160 + 40 * np.sin(2 * np.pi * 0.5 * t)) * t) * voiced
+        signal += 0.01 * rng.standard_normal(len(t))
+        _cache[seconds] = (np.clip(signal, -1, 1) * 32767).astype('<i2')
+    samples = _cache[seconds].copy()
+    samples[0] = iteration % 32768
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(sr)
+        w.writeframes(samples.tobytes())
+    return buffer.getvalue()
+
+class Workload:
+    """One scenario: prepare(i) builds the input of iteration i untimed, run() is timed"""
+    unit = "requests"
+    work = 1
+
+    def prepare(self, iteration):
+        return iteration
+
+    def run(self, payload):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+def _check(result):
+    if not result.get("success"):
+        raise RuntimeError(result.get("error") or "request failed")
+    if result.get("cache_hit"):
+        raise RuntimeError("input repeated an earlier iteration; the cache would be measured instead")
+    return result
+
+class ProcessWorkload(Workload):
+    """FileProcessor.process_pdf / process_image / process_audio"""
+
+    def __init__(self, kind, parameter, work_dir):
+        from file_processor import FileProcessor
+        self.processor = FileProcessor(os.path.join(work_dir, "uploads"))
+        self.kind = kind
+        self.parameter = parameter
+        if kind == "pdf":
+            self.unit, self.work = "pages", parameter
+        elif kind == "image":
+            self.unit, self.work = "megapixels", parameter[0] * parameter[1] / 1e6
+        else:
+            self.unit, self.work = "audio seconds", parameter
+
+    def prepare(self, iteration):
+        if self.kind == "pdf":
+            return sample_pdf(self.parameter, iteration)
+        if self.kind == "image":
+            return sample_image(*self.parameter, iteration)
+        return sample_audio(self.parameter, iteration)
+
+    def run(self, payload):
+        if self.kind == "pdf":
+            return _check(self.processor.process_pdf(payload, "bench.pdf"))
+        if self.kind == "image":
+            return _check(self.processor.process_image(payload, "bench.jpg"))
+        return _check(self.processor.process_audio(payload, "bench.wav"))
+
+class AnalyzeWorkload(ProcessWorkload):
+    """AIFTIntegrated.analyze_* and chat, end to end against the stub"""
+
+    def __init__(self, kind, parameter, work_dir):
+        from aift_integrated import AIFTIntegrated
+        self.handler = AIFTIntegrated(os.path.join(work_dir, "uploads"))
+        self.kind = kind
+        self.parameter = parameter
+
+    def prepare(self, iteration):
+        if self.kind == "chat":
+            return f"{QUESTION} ({iteration})"
+        return super().prepare(iteration)
+
+    def run(self, payload):
+        if self.kind == "pdf":
+            return _check(self.handler.analyze_pdf(payload, QUESTION))
+        if self.kind == "image":
+            return _check(self.handler.analyze_image(payload, QUESTION))
+        if self.kind == "audio":
+            return _check(self.handler.analyze_audio(payload, QUESTION))
+        return _check(self.handler.chat(payload))
+
+class SpawnWorkload(Workload):
+    """One `python aift_integrated.py` process per request, as the TS layer used to run it"""
+
+    def __init__(self, operation, work_dir):
+        self.operation = operation
+        self.work_dir = work_dir
+
+    def prepare(self, iteration):
+        if self.operation == "chat":
+            return "-", f"{QUESTION} ({iteration})"
+        path = os.path.join(self.work_dir, f"input_{iteration}.pdf")
+        with open(path, "wb") as f:
+            f.write(sample_pdf(10, iteration))
+        return path, QUESTION
+
+    def run(self, payload):
+        data_file, question = payload
+        output = subprocess.run([sys.executable, os.path.join(PYTHON_DIR, "aift_integrated.py"),
+                                 self.operation, data_file, question],
+                                cwd=self.work_dir, capture_output=True, check=True).stdout
+        return _check(json.loads(output.decode("utf-8")))
+
+class WorkerWorkload(SpawnWorkload):
+    """The same requests sent to one warm aift_worker.py process over stdin/stdout"""
+
+    def __init__(self, operation, work_dir):
+        super().__init__(operation, work_dir)
+        self.worker = subprocess.Popen([sys.executable, os.path.join(PYTHON_DIR, "aift_worker.py")],
+                                       cwd=work_dir, stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        self.requests = 0
+
+    def run(self, payload):
+        data_file, question = payload
+        self.requests += 1
+        request = {"id": str(self.requests), "op": self.operation, "question": question}
+        if self.operation != "chat":
+            request["data_file"] = data_file
+        self.worker.stdin.write(json.dumps(request, ensure_ascii=False).encode("utf-8") + b"\n")
+        self.worker.stdin.flush()
+        line = self.worker.stdout.readline()
+        if not line:
+            raise RuntimeError("worker exited")
+        return _check(json.loads(line)["result"])
+
+    def close(self):
+        self.worker.stdin.close()
+        self.worker.wait(timeout=30)
+
+def make_workload(name, work_dir):
+    kind, parameter = SCENARIOS[name]
+    if kind in ("pdf", "image", "audio"):
+        return ProcessWorkload(kind, parameter, work_dir)
+    if kind.startswith("analyze_"):
+        return AnalyzeWorkload(kind[len("analyze_"):], parameter, work_dir)
+    if kind == "chat":
+        return AnalyzeWorkload("chat", parameter, work_dir)
+    if kind == "spawn":
+        return SpawnWorkload(parameter, work_dir)
+    return WorkerWorkload(parameter, work_dir)
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+def peak_rss_mb():
+    """Peak resident set size of this process or any finished child, in MB"""
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+def run_scenario(name, iterations, warmup, work_dir):
+    """Run one scenario in this process and return its statistics"""
+    workload = make_workload(name, work_dir)
+    latencies = []
+    try:
+        for iteration in range(warmup + iterations):
+            payload = workload.prepare(iteration)
+            start = time.perf_counter()
+            workload.run(payload)
+            elapsed = time.perf_counter() - start
+            if iteration >= warmup:
+                latencies.append(elapsed)
+            del payload
+    finally:
+        workload.close()
+
+    total = sum(latencies)
+    return {
+        "scenario": name,
+        "iterations": iterations,
+        "p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "mean_ms": round(total / len(latencies) * 1000, 2),
+        "throughput_rps": round(len(latencies) / total, 2),
+        "work_rate": round(workload.work * len(latencies) / total, 2),
+        "work_unit": f"{workload.unit}/s",
+        "peak_rss_mb": round(peak_rss_mb(), 1)
+    }
+
+def run_in_subprocess(name, args, env):
+    """Run one scenario in a fresh interpreter so its imports and peak RSS are its own"""
+    with tempfile.TemporaryDirectory(prefix="bench-") as work_dir:
+        command = [sys.executable, os.path.abspath(__file__), "--run", name,
+                   "--iterations", str(args.iterations), "--warmup", str(args.warmup), "--work-dir", work_dir]
+        completed = subprocess.run(command, env=env, cwd=work_dir, capture_output=True, text=True)
+    if completed.returncode != 0:
+        error = (completed.stderr.strip().splitlines() or ["failed"])[-1]
+        return {"scenario": name, "error": error}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+def machine_info():
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpus": os.cpu_count()
+    }
+
+def baseline_path(name):
+    return os.path.join(BASELINE_DIR, f"{name}.json")
+
+def load_baseline(name):
+    path = baseline_path(name)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def save_baseline(name, results, settings):
+    """Write results to the baseline, keeping scenarios this run did not cover"""
+    stored = (load_baseline(name) or {}).get("results", {})
+    for result in results:
+        if "error" not in result:
+            stored[result["scenario"]] = result
+    order = list(SCENARIOS)
+    baseline = {
+        "machine": machine_info(),
+        "settings": settings,
+        "results": dict(sorted(stored.items(), key=lambda item: order.index(item[0]) if item[0] in order else len(order)))
+    }
+    os.makedirs(BASELINE_DIR, exist_ok=True)
+    with open(baseline_path(name), "w", encoding="utf-8") as f:
+        json.dump(baseline, f, indent=2, ensure_ascii=False)
+        f.write("\n")
+
+def change(current, previous):
+    return (current - previous) / previous if previous else 0.0
+
+def compare(result, previous, threshold):
+    """Return the relative changes against the baseline and the metrics that regressed"""
+    changes = {
+        "p50_ms": change(result["p50_ms"], previous["p50_ms"]),
+        "p95_ms": change(result["p95_ms"], previous["p95_ms"]),
+        "throughput_rps": change(result["throughput_rps"], previous["throughput_rps"]),
+        "peak_rss_mb": change(result["peak_rss_mb"], previous["peak_rss_mb"])
+    }
+    regressed = [key for key in ("p50_ms", "p95_ms")
+                 if changes[key] > threshold and result[key] - previous[key] > MIN_LATENCY_DELTA_MS]
+    if changes["throughput_rps"] < -threshold and "p50_ms" in regressed:
+        regressed.append("throughput_rps")
+    if changes["peak_rss_mb"] > threshold:
+        regressed.append("peak_rss_mb")
+    return changes, regressed
+
+def format_change(value):
+    return f"{value * 100:+.0f}%"
+
+def print_report(results, baseline, settings, threshold):
+    previous_results = baseline["results"] if baseline else {}
+    print(f"{'scenario':<26}{'p50 ms':>10}{'p95 ms':>10}{'req/s':>9}{'rate':>12}  {'unit':<17}{'RSS MB':>8}"
+          + ("   vs baseline (p50 / p95 / req/s / RSS)" if baseline else ""))
+    regressions = []
+    for result in results:
+        if "error" in result:
+            print(f"{result['scenario']:<26}  failed: {result['error']}")
+            continue
+        line = (f"{result['scenario']:<26}{result['p50_ms']:>10.1f}{result['p95_ms']:>10.1f}"
+                f"{result['throughput_rps']:>9.2f}{result['work_rate']:>12.1f}  {result['work_unit']:<17}"
+                f"{result['peak_rss_mb']:>8.1f}")
+        previous = previous_results.get(result["scenario"])
+        if previous:
+            changes, regressed = compare(result, previous, threshold)
+            line += "   " + " / ".join(format_change(changes[key]) for key in
+                                      ("p50_ms", "p95_ms", "throughput_rps", "peak_rss_mb"))
+            if regressed:
+                line += "  REGRESSION: " + ", ".join(regressed)
+                regressions.append(result["scenario"])
+        elif baseline:
+            line += "   (new)"
+        print(line)
+
+    if baseline and baseline.get("machine") != machine_info():
+        print("Note: the baseline was recorded on a different machine or Python version")
+    if baseline and baseline.get("settings") != settings:
+        print(f"Note: the baseline used different settings: {baseline.get('settings')}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the Python processing and analysis paths')
+    parser.add_argument('--filter', action='append', help='Only run scenarios whose name contains this (repeatable)')
+    parser.add_argument('--iterations', type=int, default=10, help='Measured iterations per scenario')
+    parser.add_argument('--warmup', type=int, default=1, help='Discarded iterations before measuring')
+    parser.add_argument('--latency', type=float, default=DEFAULT_LATENCY, help='Seconds the stub AIFT server waits per call')
+    parser.add_argument('--baseline', default='default', help='Baseline name in benchmarks/baselines/')
+    parser.add_argument('--save-baseline', action='store_true', help='Store these results as the baseline')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD, help='Relative change counted as a regression')
+    parser.add_argument('--fail-on-regression', action='store_true', help='Exit with status 1 if anything regressed')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    parser.add_argument('--list', action='store_true', help='List scenarios and exit')
+    parser.add_argument('--run', help=argparse.SUPPRESS)
+    parser.add_argument('--work-dir', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        # Child process; PYTHONPATH from the parent puts the stub aift package first
+        print(json.dumps(run_scenario(args.run, args.iterations, args.warmup, args.work_dir)))
+        return
+
+    names = [name for name in SCENARIOS if not args.filter or any(f in name for f in args.filter)]
+    if args.list:
+        print("\n".join(names))
+        return
+
+    server = StubAIFTServer(latency=args.latency).start()
+    env = stub_env(server.url)
+    results = []
+    try:
+        for name in names:
+            if not args.json:
+                print(f"running {name}...", file=sys.stderr)
+            results.append(run_in_subprocess(name, args, env))
+    finally:
+        server.shutdown()
+
+    settings = {"iterations": args.iterations, "warmup": args.warmup, "latency": args.latency}
+    baseline = None if args.save_baseline else load_baseline(args.baseline)
+    if args.json:
+        print(json.dumps({"machine": machine_info(), "settings": settings, "results": results}, indent=2))
+        regressions = [r["scenario"] for r in results
+                       if baseline and r["scenario"] in baseline["results"] and "error" not in r
+                       and compare(r, baseline["results"][r["scenario"]], args.threshold)[1]]
+    else:
+        regressions = print_report(results, baseline, settings, args.threshold)
+
+    if args.save_baseline:
+        save_baseline(args.baseline, results, settings)
+        print(f"Saved baseline {baseline_path(args.baseline)}", file=sys.stderr)
+
+    if args.fail_on_regression and (regressions or any("error" in r for r in results)):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,6 @@
+# -*- coding: utf-8 -*-
+"""
+AIFT Stub Package
+Stand-in for the aift SDK used by the benchmarks; calls go to the local stub
+server at AIFT_STUB_URL (see benchmarks/aift_stub.py)
+"""
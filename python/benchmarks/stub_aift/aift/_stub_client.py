@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+"""HTTP calls from the stub SDK to the stub server"""
+
+import os
+import json
+import urllib.request
+
+def post(endpoint, payload, file=None, return_json=False):
+    """POST a call to the stub server and return its answer like the SDK does"""
+    if file is not None:
+        # Read the file as the SDK does before uploading it
+        with open(file, 'rb') as f:
+            payload["file_bytes"] = len(f.read())
+
+    url = os.environ.get("AIFT_STUB_URL", "http://127.0.0.1:8765")
+    request = urllib.request.Request(f"{url}/{endpoint}", data=json.dumps(payload).encode('utf-8'),
+                                     headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(request, timeout=120) as response:
+        result = json.loads(response.read())
+    return result if return_json else result["content"]
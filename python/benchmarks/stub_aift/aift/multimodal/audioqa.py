@@ -0,0 +1,7 @@
+# -*- coding: utf-8 -*-
+"""Stub of aift.multimodal.audioqa"""
+
+from aift._stub_client import post
+
+def generate(file, instruction, return_json=False):
+    return post("audioqa/generate", {"instruction": instruction}, file=file, return_json=return_json)
@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+"""Stub of aift.multimodal.textqa"""
+
+from aift._stub_client import post
+
+def generate(instruction, system_prompt='', max_new_tokens=512, temperature=0.2, return_json=False):
+    return post("textqa/generate", {
+        "instruction": instruction,
+        "system_prompt": system_prompt,
+        "max_new_tokens": max_new_tokens,
+        "temperature": temperature
+    }, return_json=return_json)
+
+def chat(instruction, sessionid='default-session', context='', temperature=0.2, return_json=False):
+    return post("textqa/chat", {
+        "instruction": instruction,
+        "sessionid": sessionid,
+        "context": context,
+        "temperature": temperature
+    }, return_json=return_json)
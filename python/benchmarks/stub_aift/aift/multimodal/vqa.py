@@ -0,0 +1,7 @@
+# -*- coding: utf-8 -*-
+"""Stub of aift.multimodal.vqa"""
+
+from aift._stub_client import post
+
+def generate(file, instruction, return_json=False):
+    return post("vqa/generate", {"instruction": instruction}, file=file, return_json=return_json)
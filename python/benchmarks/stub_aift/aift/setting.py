@@ -0,0 +1,8 @@
+# -*- coding: utf-8 -*-
+"""Stub of aift.setting"""
+
+_api_key = None
+
+def set_api_key(api_key):
+    global _api_key
+    _api_key = api_key
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Blob Store
+Content-addressed single-copy storage for uploaded and processed files
+"""
+
+import os
+import shutil
+import hashlib
+import tempfile
+from pathlib import Path
+
+CHUNK_SIZE = 1024 * 1024
+
+class BlobStore:
+    """Stores each distinct file once under blobs/<aa>/<sha256><suffix>"""
+
+    def __init__(self, base_dir="uploads"):
+        self.blob_dir = Path(base_dir) / "blobs"
+        self.blob_dir.mkdir(parents=True, exist_ok=True)
+
+    def path_for(self, digest, suffix=""):
+        """Return the blob path for a SHA-256 hex digest"""
+        return self.blob_dir / digest[:2] / f"{digest}{suffix}"
+
+    def put_bytes(self, data, suffix=""):
+        """Store bytes once and return (digest, blob_path)"""
+        digest, blob_path, _ = self.add_bytes(data, suffix)
+        return digest, blob_path
+
+    def add_bytes(self, data, suffix=""):
+        """Store bytes once and return (digest, blob_path, created), where created
+        is False when the blob was already in the store"""
+        digest = hashlib.sha256(data).hexdigest()
+        blob_path = self.path_for(digest, suffix)
+
+        if blob_path.exists():
+            return digest, blob_path, False
+
+        blob_path.parent.mkdir(exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=self.blob_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(temp_path, blob_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+
+        return digest, blob_path, True
+
+    def discard(self, blob_path):
+        """Remove a blob nothing refers to, e.g. an upload that failed to process"""
+        Path(blob_path).unlink(missing_ok=True)
+
+    def put_text(self, text, suffix=".txt"):
+        """Store UTF-8 text once and return (digest, blob_path)"""
+        return self.put_bytes(text.encode('utf-8'), suffix)
+
+    def put_file(self, file_path, suffix=""):
+        """Move an existing file into the store and return (digest, blob_path)"""
+        sha = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                sha.update(chunk)
+
+        digest = sha.hexdigest()
+        blob_path = self.path_for(digest, suffix)
+
+        if blob_path.exists():
+            os.unlink(file_path)
+        else:
+            blob_path.parent.mkdir(exist_ok=True)
+            shutil.move(str(file_path), str(blob_path))
+
+        return digest, blob_path
+
+    def open_writer(self, suffix=""):
+        """Return a BlobWriter that streams a new blob into the store"""
+        return BlobWriter(self, suffix)
+
+    def link(self, blob_path, view_path):
+        """Expose a blob at view_path as a hardlink, copying only if linking fails"""
+        view_path = Path(view_path)
+        if view_path.exists():
+            if os.path.samefile(blob_path, view_path):
+                return view_path
+            view_path.unlink()
+
+        view_path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            os.link(blob_path, view_path)
+        except OSError:
+            shutil.copyfile(blob_path, view_path)
+
+        return view_path
+
+class BlobWriter:
+    """Streams a blob to a temporary file, hashing it as it is written"""
+
+    def __init__(self, store, suffix=""):
+        self.store = store
+        self.suffix = suffix
+        self.sha = hashlib.sha256()
+        self.digest = None
+        self.path = None
+        fd, self.temp_path = tempfile.mkstemp(dir=store.blob_dir, suffix=".tmp")
+        self.file = os.fdopen(fd, 'wb')
+
+    def write(self, data):
+        self.file.write(data)
+        self.sha.update(data)
+
+    def tell(self):
+        return self.file.tell()
+
+    def commit(self):
+        """Move the finished file into the store and return (digest, blob_path)"""
+        self.file.close()
+        self.digest = self.sha.hexdigest()
+        self.path = self.store.path_for(self.digest, self.suffix)
+
+        if self.path.exists():
+            os.unlink(self.temp_path)
+        else:
+            self.path.parent.mkdir(exist_ok=True)
+            os.replace(self.temp_path, self.path)
+
+        return self.digest, self.path
+
+    def abort(self):
+        self.file.close()
+        if os.path.exists(self.temp_path):
+            os.unlink(self.temp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.abort()
+        return False
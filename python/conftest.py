@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+"""
+Test Configuration
+Tests run against the real aift SDK when it is installed, otherwise against
+the stub package the benchmarks use, so no suite is skipped for lack of it.
+"""
+
+import os
+import sys
+from importlib.util import find_spec
+import pytest
+
+PYTHON_DIR = os.path.dirname(os.path.abspath(__file__))
+STUB_PACKAGE_DIR = os.path.join(PYTHON_DIR, "benchmarks", "stub_aift")
+
+if find_spec("aift") is None:
+    sys.path.insert(0, STUB_PACKAGE_DIR)
+
+@pytest.fixture
+def aift_stub(monkeypatch):
+    """Local stub AIFT server that SDK stub calls in this process are sent to"""
+    import aift
+    if not os.path.abspath(aift.__file__).startswith(STUB_PACKAGE_DIR):
+        pytest.skip("the real aift SDK is installed; not calling the live API")
+    from benchmarks.aift_stub import StubAIFTServer
+    server = StubAIFTServer(latency=0.01).start()
+    monkeypatch.setenv("AIFT_STUB_URL", server.url)
+    monkeypatch.setenv("AIFT_CACHE_DISABLED", "1")
+    yield server
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Disk Cache
+Size-bounded on-disk JSON cache with LRU eviction and hit/miss counters
+"""
+
+import os
+import json
+import tempfile
+import threading
+from pathlib import Path
+
+class DiskCache:
+    """Stores one JSON file per key; least recently used entries are evicted first"""
+
+    def __init__(self, cache_dir, max_bytes=64 * 1024 * 1024):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._size = sum(size for _, _, size in self._entries())
+
+    def _path(self, key):
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def _entries(self):
+        """Yield (mtime, path, size) for every cache entry"""
+        for path in self.cache_dir.glob("*/*.json"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            yield stat.st_mtime, path, stat.st_size
+
+    def get(self, key):
+        """Return the cached value or None; a hit refreshes the entry's LRU position"""
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                value = json.load(f)
+            os.utime(path)
+        except (FileNotFoundError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        return value
+
+    def put(self, key, value):
+        """Store a JSON-serializable value, evicting old entries if over budget"""
+        path = self._path(key)
+        path.parent.mkdir(exist_ok=True)
+        data = json.dumps(value, ensure_ascii=False).encode('utf-8')
+
+        fd, temp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            with self._lock:
+                # An overwritten entry no longer counts towards the budget
+                previous = self._file_size(path)
+                os.replace(temp_path, path)
+                self._size += len(data) - previous
+                if self._size > self.max_bytes:
+                    self._evict()
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+
+    def delete(self, key):
+        path = self._path(key)
+        with self._lock:
+            size = self._file_size(path)
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                return
+            self._size -= size
+
+    @staticmethod
+    def _file_size(path):
+        try:
+            return path.stat().st_size
+        except FileNotFoundError:
+            return 0
+
+    def _evict(self):
+        """Delete least recently used entries until the cache fits its budget"""
+        entries = sorted(self._entries())
+        self._size = sum(size for _, _, size in entries)
+
+        for _, path, size in entries:
+            if self._size <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            self._size -= size
+            self.evictions += 1
+
+    def stats(self):
+        """Return hit/miss counters and current size"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "bytes": self._size,
+                "max_bytes": self.max_bytes
+            }
@@ -7,43 +7,193 @@ Handles PDF to text conversion, image preprocessing, and audio preprocessing
 
 import os
 import sys
+import io
 import base64
 import tempfile
 import json
-import shutil
+import math
+import hashlib
+from importlib.util import find_spec
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
 import argparse
+from blob_store import BlobStore
+from disk_cache import DiskCache
+from vector_index import VectorIndex, VECTOR_AVAILABLE
+from keyword_index import KeywordIndex
+from payload_reader import read_payload
+from metrics import stage, timed
+
+# Heavy optional backends are imported on first use of their file type, so a
+# text or PDF request does not pay for the image and audio stacks; only their
+# presence is checked here
+def _installed(*modules):
+    return all(find_spec(module) is not None for module in modules)
+
+PyPDF2 = None
+Image = ImageOps = cv2 = np = None
+sf = audio_stream = audio_segmenter = None
 
 # PDF processing
-try:
-    import PyPDF2
-    PDF_AVAILABLE = True
-except ImportError:
-    PDF_AVAILABLE = False
+PDF_AVAILABLE = _installed("PyPDF2")
+if not PDF_AVAILABLE:
     print("Warning: PyPDF2 not available. Install with: pip install PyPDF2")
 
 # Image processing
-try:
-    from PIL import Image, ImageEnhance, ImageFilter
-    import cv2
-    import numpy as np
-    IMAGE_AVAILABLE = True
-except ImportError:
-    IMAGE_AVAILABLE = False
+IMAGE_AVAILABLE = _installed("PIL", "cv2", "numpy")
+WEBP_AVAILABLE = None
+if not IMAGE_AVAILABLE:
     print("Warning: PIL/OpenCV not available. Install with: pip install Pillow opencv-python")
 
 # Audio processing
-try:
-    import librosa
+AUDIO_AVAILABLE = _installed("numpy", "soundfile")
+if not AUDIO_AVAILABLE:
+    print("Warning: numpy/soundfile not available. Install with: pip install numpy soundfile")
+
+def _load_pdf_backend():
+    """Import PyPDF2 on first use"""
+    global PyPDF2
+    if not PDF_AVAILABLE:
+        raise ImportError("PyPDF2 is required for PDF processing")
+    import PyPDF2
+
+def _load_image_backend():
+    """Import PIL, OpenCV and NumPy on first use"""
+    global Image, ImageOps, cv2, np, WEBP_AVAILABLE
+    if not IMAGE_AVAILABLE:
+        raise ImportError("PIL/OpenCV is required for image processing")
+    from PIL import Image, ImageOps, features
+    import cv2
+    import numpy as np
+    if WEBP_AVAILABLE is None:
+        WEBP_AVAILABLE = features.check('webp')
+
+def _load_audio_backend():
+    """Import soundfile, NumPy and the audio modules on first use (audioread only when a file needs it)"""
+    global sf, np, audio_stream, audio_segmenter
+    if not AUDIO_AVAILABLE:
+        raise ImportError("numpy/soundfile is required for audio processing")
     import soundfile as sf
-    AUDIO_AVAILABLE = True
-except ImportError:
-    AUDIO_AVAILABLE = False
-    print("Warning: librosa/soundfile not available. Install with: pip install librosa soundfile")
+    import numpy as np
+    import audio_stream
+    import audio_segmenter
+
+# Bump when extraction output changes so cached results are not reused
+PDF_EXTRACTOR_VERSION = "2"
+EXTRACTION_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# PDFs with at least this many pages are extracted in a process pool
+PDF_PARALLEL_MIN_PAGES = 32
+PDF_PAGES_PER_TASK = 8
+
+# Image preprocessing parameters (same effect as the former PIL chain:
+# Contrast(1.2) -> Sharpness(1.1) -> GaussianBlur(0.5))
+IMAGE_MAX_SIZE = 1024
+IMAGE_CONTRAST = 1.2
+IMAGE_SHARPNESS = 1.1
+IMAGE_BLUR_RADIUS = 0.5
+
+# Image derivatives written by process_image: (name, max size, format, suffix, save options)
+IMAGE_THUMBNAIL_SIZE = 256
+IMAGE_PREVIEW_SIZE = 640
+IMAGE_DERIVATIVES = [
+    ("thumbnail", IMAGE_THUMBNAIL_SIZE, "WEBP", "_thumb.webp", {"quality": 75}),
+    ("preview", IMAGE_PREVIEW_SIZE, "WEBP", "_preview.webp", {"quality": 80}),
+    ("model_input", IMAGE_MAX_SIZE, "JPEG", "_processed.jpg", {"quality": 85})
+]
+IMAGE_CACHE_MAX_BYTES = 16 * 1024 * 1024
+
+_pdf_worker_reader = None
+
+def _init_pdf_worker(pdf_bytes):
+    """Open the PDF once per pool process"""
+    global _pdf_worker_reader
+    _load_pdf_backend()
+    _pdf_worker_reader = PyPDF2.PdfReader(io.BytesIO(pdf_bytes))
+
+def _extract_pdf_page_range(page_range):
+    """Extract the text of pages [start, stop) in a pool process"""
+    start, stop = page_range
+    return [_pdf_worker_reader.pages[i].extract_text() or "" for i in range(start, stop)]
+
+def _contrast_lut(mean, factor=IMAGE_CONTRAST):
+    """Lookup table equal to PIL's ImageEnhance.Contrast blend against the mean gray"""
+    values = np.arange(256, dtype=np.float32)
+    blended = np.float32(mean) + np.float32(factor) * (values - np.float32(mean))
+    # PIL truncates rather than rounds the blended value
+    return np.clip(blended, 0, 255).astype(np.uint8)
+
+def _sharpen_kernel(factor=IMAGE_SHARPNESS):
+    """3x3 kernel equal to PIL's ImageEnhance.Sharpness blend against ImageFilter.SMOOTH"""
+    smooth = np.array([[1, 1, 1], [1, 5, 1], [1, 1, 1]], dtype=np.float32) / 13
+    identity = np.zeros((3, 3), dtype=np.float32)
+    identity[1, 1] = 1
+    return factor * identity + (1 - factor) * smooth
+
+def _gaussian_blur_kernel(radius=IMAGE_BLUR_RADIUS, passes=3):
+    """1-D kernel of PIL's GaussianBlur, which runs `passes` extended box blurs"""
+    sigma2 = radius * radius / passes
+    length = math.sqrt(12 * sigma2 + 1)
+    whole = math.floor((length - 1) / 2)
+    fraction = (2 * whole + 1) * (whole * (whole + 1) - 3 * sigma2) / (6 * (sigma2 - (whole + 1) ** 2))
+
+    box = np.ones(2 * whole + 3, dtype=np.float64)
+    box[0] = box[-1] = fraction
+    box /= box.sum()
+
+    kernel = np.ones(1)
+    for _ in range(passes):
+        kernel = np.convolve(kernel, box)
+    return kernel.astype(np.float32)
+
+# Processed audio is stored losslessly as FLAC (or WAV for consumers that need
+# it). An Ogg Opus preview for playback is opt-in, since encoding it costs
+# about a second per minute of audio
+AUDIO_FORMAT = os.environ.get('AIFT_AUDIO_FORMAT', 'FLAC').upper()
+AUDIO_PREVIEW = os.environ.get('AIFT_AUDIO_PREVIEW', '0') == '1'
+AUDIO_SUFFIXES = {"FLAC": ".flac", "WAV": ".wav"}
+
+def detect_audio_extension(data):
+    """Return the file extension of an audio container from its magic bytes, or None"""
+    head = bytes(data[:64])
+    if head[:4] == b'RIFF' and head[8:12] == b'WAVE':
+        return '.wav'
+    if head[:4] == b'fLaC':
+        return '.flac'
+    if head[:4] == b'OggS':
+        return '.opus' if b'OpusHead' in head else '.ogg'
+    if head[:4] == b'\x1aE\xdf\xa3':
+        return '.webm'
+    if head[4:8] == b'ftyp':
+        return '.m4a'
+    if head[:4] == b'FORM' and head[8:12] in (b'AIFF', b'AIFC'):
+        return '.aiff'
+    if head[:3] == b'ID3':
+        return '.mp3'
+    if len(head) > 1 and head[0] == 0xFF and head[1] & 0xE0 == 0xE0:
+        # MPEG frame sync; layer bits of 00 mean an AAC ADTS stream
+        return '.aac' if head[1] & 0x06 == 0 else '.mp3'
+    return None
+
+def _fit_within(pixels, max_size):
+    """Area-downscale an image array so its longer side is at most max_size (always a new array)"""
+    height, width = pixels.shape[:2]
+    if max(width, height) <= max_size:
+        return pixels.copy()
+    ratio = max_size / max(width, height)
+    size = (max(1, int(width * ratio)), max(1, int(height * ratio)))
+    return cv2.resize(pixels, size, interpolation=cv2.INTER_AREA)
 
 class FileProcessor:
-    def __init__(self, base_dir="uploads"):
+    def __init__(self, base_dir="uploads", pdf_workers=None, resampler=None, audio_format=None, audio_preview=None):
         self.base_dir = Path(base_dir)
+        self.pdf_workers = pdf_workers or os.cpu_count() or 1
+        # Audio resampler backend ("auto", "soxr", "poly" or "librosa"); None uses AIFT_AUDIO_RESAMPLER
+        self.resampler = resampler
+        self.audio_format = (audio_format or AUDIO_FORMAT).upper()
+        if self.audio_format not in AUDIO_SUFFIXES:
+            raise ValueError(f"Unsupported audio format '{self.audio_format}'. Use FLAC or WAV")
+        self.audio_preview = AUDIO_PREVIEW if audio_preview is None else audio_preview
         self.backend_dir = self.base_dir / "backend"
         self.frontend_dir = self.base_dir / "frontend"
         
@@ -55,277 +205,609 @@ class FileProcessor:
         for subdir in ["pdf", "images", "audio", "text"]:
             (self.backend_dir / subdir).mkdir(exist_ok=True)
             (self.frontend_dir / subdir).mkdir(exist_ok=True)
+        
+        # Every artifact is written once to the blob store; the backend and
+        # frontend directories only hold hardlinks to it
+        self.store = BlobStore(self.base_dir)
+        
+        # Extraction results keyed by document hash and extractor version
+        self.extraction_cache = DiskCache(self.base_dir / "cache" / "extract", EXTRACTION_CACHE_MAX_BYTES)
+        
+        # Preprocessed image derivatives keyed by image hash and pipeline settings
+        self.image_cache = DiskCache(self.base_dir / "cache" / "images", IMAGE_CACHE_MAX_BYTES)
+        
+        # Search indexes over saved document text
+        self.vector_index = VectorIndex(self.base_dir / "index" / "vectors") if VECTOR_AVAILABLE else None
+        self.keyword_index = KeywordIndex(self.base_dir / "index" / "keywords.sqlite3")
+    
+    def publish(self, blob_path, subdir, name):
+        """Expose a stored blob in the backend and frontend directories"""
+        backend_path = self.store.link(blob_path, self.backend_dir / subdir / name)
+        frontend_path = self.store.link(blob_path, self.frontend_dir / subdir / name)
+        return backend_path, frontend_path
     
+    def save_artifact(self, data, subdir, name):
+        """Store bytes once and publish them; returns (digest, backend_path, frontend_path)"""
+        digest, blob_path = self.store.put_bytes(data, Path(name).suffix)
+        backend_path, frontend_path = self.publish(blob_path, subdir, name)
+        return digest, backend_path, frontend_path
+    
+    def index_text(self, doc_id, text, filename, path):
+        """Add saved document text to the search index; never fails the upload"""
+        if not text.strip():
+            return
+        try:
+            self.keyword_index.add_document(doc_id, text, filename, path)
+            if self.vector_index is not None:
+                self.vector_index.add_document(doc_id, text, filename, path)
+        except Exception as e:
+            print(f"Warning: could not index {filename}: {e}", file=sys.stderr)
+    
+    def _decode_payload(self, data):
+        """Return raw bytes for a payload given as bytes or base64 text"""
+        with stage("decode") as decode:
+            if not isinstance(data, (bytes, bytearray, memoryview)):
+                data = base64.b64decode(data)
+            decode.bytes = memoryview(data).nbytes
+        return data
+    
+    @timed("pdf")
     def process_pdf(self, pdf_data, filename, output_format="text"):
         """Convert PDF to text and save to appropriate directories"""
+        new_blob = None
         try:
-            # Decode base64 data
-            pdf_bytes = base64.b64decode(pdf_data)
+            # Save original PDF once, named by its content hash; it is
+            # published only once the text has been extracted
+            pdf_bytes = self._decode_payload(pdf_data)
+            base_name = Path(filename).stem
+            with stage("store_original", len(pdf_bytes)):
+                digest, pdf_blob, created = self.store.add_bytes(pdf_bytes, '.pdf')
+                new_blob = pdf_blob if created else None
+                artifact_name = f"{base_name}_{digest[:16]}"
             
-            # Create temporary PDF file
-            with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as temp_pdf:
-                temp_pdf.write(pdf_bytes)
-                temp_pdf_path = temp_pdf.name
+            with stage("cache_lookup"):
+                extraction = self._cached_extraction(digest)
+            cache_hit = extraction is not None
+            if not cache_hit:
+                extraction = self._extract_pdf(pdf_bytes, digest)
+            
+            new_blob = None
+            
+            with stage("publish"):
+                backend_pdf_path, frontend_pdf_path = self.publish(pdf_blob, "pdf", f"{artifact_name}.pdf")
+                text_blob = self.store.path_for(extraction["text_sha256"], '.txt')
+                index_blob = self.store.path_for(extraction["index_sha256"], '.json')
+                backend_text_path, frontend_text_path = self.publish(text_blob, "text", f"{artifact_name}.txt")
+                backend_index_path, frontend_index_path = self.publish(index_blob, "text", f"{artifact_name}.pages.json")
+            with stage("index", len(extraction["text_content"].encode('utf-8'))):
+                self.index_text(digest, extraction["text_content"], filename, backend_text_path)
+            
+            return {
+                "success": True,
+                "sha256": digest,
+                "cache_hit": cache_hit,
+                "text_content": extraction["text_content"],
+                "page_count": extraction["page_count"],
+                "metadata": extraction["metadata"],
+                "backend_text_path": str(backend_text_path),
+                "frontend_text_path": str(frontend_text_path),
+                "backend_page_index_path": str(backend_index_path),
+                "frontend_page_index_path": str(frontend_index_path),
+                "backend_pdf_path": str(backend_pdf_path),
+                "frontend_pdf_path": str(frontend_pdf_path),
+                "filename": filename
+            }
             
-            try:
-                # Extract text from PDF
-                text_content = self._extract_pdf_text(temp_pdf_path)
-                
-                # Generate output filename
-                base_name = Path(filename).stem
-                timestamp = int(os.path.getmtime(temp_pdf_path))
-                
-                # Save text to backend
-                backend_text_path = self.backend_dir / "text" / f"{base_name}_{timestamp}.txt"
-                with open(backend_text_path, 'w', encoding='utf-8') as f:
-                    f.write(text_content)
-                
-                # Save text to frontend
-                frontend_text_path = self.frontend_dir / "text" / f"{base_name}_{timestamp}.txt"
-                with open(frontend_text_path, 'w', encoding='utf-8') as f:
-                    f.write(text_content)
-                
-                # Save original PDF to backend
-                backend_pdf_path = self.backend_dir / "pdf" / f"{base_name}_{timestamp}.pdf"
-                with open(backend_pdf_path, 'wb') as f:
-                    f.write(pdf_bytes)
-                
-                # Save original PDF to frontend
-                frontend_pdf_path = self.frontend_dir / "pdf" / f"{base_name}_{timestamp}.pdf"
-                with open(frontend_pdf_path, 'wb') as f:
-                    f.write(pdf_bytes)
-                
-                return {
-                    "success": True,
-                    "text_content": text_content,
-                    "backend_text_path": str(backend_text_path),
-                    "frontend_text_path": str(frontend_text_path),
-                    "backend_pdf_path": str(backend_pdf_path),
-                    "frontend_pdf_path": str(frontend_pdf_path),
-                    "filename": filename
-                }
-                
-            finally:
-                # Clean up temporary file
-                os.unlink(temp_pdf_path)
-                
         except Exception as e:
+            if new_blob is not None:
+                self.store.discard(new_blob)
             return {
                 "success": False,
                 "error": str(e),
                 "filename": filename
             }
     
-    def _extract_pdf_text(self, pdf_path):
-        """Extract text from PDF file"""
-        if not PDF_AVAILABLE:
-            raise ImportError("PyPDF2 is required for PDF processing")
+    def _extraction_cache_key(self, digest):
+        return f"{digest}-pdf{PDF_EXTRACTOR_VERSION}"
+    
+    def _cached_extraction(self, digest):
+        """Return a cached extraction whose text and index blobs still exist"""
+        entry = self.extraction_cache.get(self._extraction_cache_key(digest))
+        if entry is None:
+            return None
+        
+        text_blob = self.store.path_for(entry["text_sha256"], '.txt')
+        if not text_blob.exists() or not self.store.path_for(entry["index_sha256"], '.json').exists():
+            self.extraction_cache.delete(self._extraction_cache_key(digest))
+            return None
+        
+        with open(text_blob, 'r', encoding='utf-8') as f:
+            entry["text_content"] = f.read()
+        return entry
+    
+    def _extract_pdf(self, pdf_bytes, digest):
+        """Extract text, page index and metadata, store them and cache the result"""
+        # Pages are written to the text blob as they are extracted, so this
+        # stage includes that write
+        with stage("extract") as extract:
+            text_content, text_blob, page_offsets = self._write_pdf_text(self.iter_pdf_pages(pdf_bytes))
+            extract.bytes = text_blob.stat().st_size
+        
+        page_index = json.dumps({"pages": len(page_offsets), "offsets": page_offsets}).encode('utf-8')
+        with stage("store_page_index", len(page_index)):
+            index_sha256, _ = self.store.put_bytes(page_index, '.json')
+        
+        with stage("metadata"):
+            metadata = self._pdf_metadata(pdf_bytes)
+        entry = {
+            "text_sha256": text_blob.stem,
+            "index_sha256": index_sha256,
+            "page_count": len(page_offsets),
+            "metadata": metadata
+        }
+        self.extraction_cache.put(self._extraction_cache_key(digest), entry)
+        
+        entry["text_content"] = text_content
+        return entry
+    
+    def _pdf_metadata(self, pdf_bytes):
+        """Return the PDF document information as plain strings"""
+        try:
+            _load_pdf_backend()
+            info = PyPDF2.PdfReader(io.BytesIO(pdf_bytes)).metadata or {}
+            return {str(key).lstrip('/'): str(value) for key, value in info.items()}
+        except Exception:
+            return {}
+    
+    def iter_pdf_pages(self, pdf_source):
+        """Yield (page_number, text) in page order as pages are extracted"""
+        _load_pdf_backend()
+        
+        if isinstance(pdf_source, (bytes, bytearray, memoryview)):
+            pdf_bytes = pdf_source
+        else:
+            with open(pdf_source, 'rb') as f:
+                pdf_bytes = f.read()
         
-        text_content = ""
+        pdf_reader = PyPDF2.PdfReader(io.BytesIO(pdf_bytes))
+        page_count = len(pdf_reader.pages)
         
-        with open(pdf_path, 'rb') as file:
-            pdf_reader = PyPDF2.PdfReader(file)
+        if page_count < PDF_PARALLEL_MIN_PAGES or self.pdf_workers < 2:
+            for page_num, page in enumerate(pdf_reader.pages):
+                yield page_num, page.extract_text() or ""
+            return
+        
+        # Large PDF: spread page ranges over a process pool; map() hands the
+        # ranges back in order, each as soon as it and its predecessors are done
+        page_ranges = [(start, min(start + PDF_PAGES_PER_TASK, page_count))
+                       for start in range(0, page_count, PDF_PAGES_PER_TASK)]
+        workers = min(self.pdf_workers, len(page_ranges))
+        
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_pdf_worker,
+                                 initargs=(bytes(pdf_bytes),)) as executor:
+            for (start, _), texts in zip(page_ranges, executor.map(_extract_pdf_page_range, page_ranges)):
+                for offset, text in enumerate(texts):
+                    yield start + offset, text
+    
+    def _write_pdf_text(self, pages):
+        """Stream pages into a text blob; returns (text, blob_path, page_offsets)
+        
+        The file holds the pages joined by newlines with surrounding whitespace
+        stripped. page_offsets[i] is the [start, end) byte range of page i in it.
+        """
+        texts = []
+        spans = []
+        position = 0
+        lead = None
+        pending = ""
+        
+        with self.store.open_writer('.txt') as writer:
+            for page_num, text in pages:
+                chunk = ("\n" if page_num else "") + text
+                chunk_start = position + (1 if page_num else 0)
+                position += len(chunk.encode('utf-8'))
+                spans.append((chunk_start, position))
+                texts.append(text)
+                
+                # Drop leading whitespace of the document
+                if lead is None:
+                    stripped = chunk.lstrip()
+                    if not stripped:
+                        continue
+                    lead = position - len(stripped.encode('utf-8'))
+                    chunk = stripped
+                
+                # Hold back trailing whitespace until more text follows it
+                body = chunk.rstrip()
+                if body:
+                    writer.write((pending + body).encode('utf-8'))
+                    pending = chunk[len(body):]
+                else:
+                    pending += chunk
             
-            for page_num in range(len(pdf_reader.pages)):
-                page = pdf_reader.pages[page_num]
-                text_content += page.extract_text() + "\n"
+            size = writer.tell()
+        
+        lead = lead or 0
+        page_offsets = [[min(max(start - lead, 0), size), min(max(end - lead, 0), size)]
+                        for start, end in spans]
         
-        return text_content.strip()
+        return "\n".join(texts).strip(), writer.path, page_offsets
     
+    def _extract_pdf_text(self, pdf_source):
+        """Extract text from PDF bytes or a PDF file path"""
+        return "\n".join(text for _, text in self.iter_pdf_pages(pdf_source)).strip()
+    
+    def read_pdf_page(self, text_path, page_index_path, page_num):
+        """Read the text of a single page using the page-offset index"""
+        with open(page_index_path, 'r', encoding='utf-8') as f:
+            start, end = json.load(f)["offsets"][page_num]
+        
+        with open(text_path, 'rb') as f:
+            f.seek(start)
+            return f.read(end - start).decode('utf-8')
+    
+    @timed("image")
     def process_image(self, image_data, filename, output_format="processed"):
         """Preprocess image and save to appropriate directories"""
+        new_blob = None
         try:
-            # Decode base64 data
-            image_bytes = base64.b64decode(image_data)
+            _load_image_backend()
             
-            # Create temporary image file
-            with tempfile.NamedTemporaryFile(suffix='.jpg', delete=False) as temp_image:
-                temp_image.write(image_bytes)
-                temp_image_path = temp_image.name
+            # Save original image once, named by its content hash; it is
+            # published only once the image has been decoded
+            image_bytes = self._decode_payload(image_data)
+            base_name = Path(filename).stem
+            with stage("store_original", len(image_bytes)):
+                digest, orig_blob, created = self.store.add_bytes(image_bytes, '.jpg')
+                new_blob = orig_blob if created else None
+                artifact_name = f"{base_name}_{digest[:16]}"
+            
+            # Reuse the derivatives of an identical image run through the
+            # same pipeline; otherwise decode and encode them now
+            image_key = self._image_cache_key(digest)
+            with stage("cache_lookup"):
+                derivatives = self._cached_image(image_key)
+            cache_hit = derivatives is not None
+            if not cache_hit:
+                derivatives = self._render_image(image_bytes, image_key)
+            new_blob = None
+            
+            # Publish the original, thumbnail, preview and model input under this upload's name
+            with stage("publish"):
+                backend_orig_path, frontend_orig_path = self.publish(orig_blob, "images", f"{artifact_name}_original.jpg")
+                for meta in derivatives.values():
+                    suffix = meta.pop("suffix")
+                    blob_path = self.store.path_for(meta["sha256"], Path(suffix).suffix)
+                    backend_path, frontend_path = self.publish(blob_path, "images", f"{artifact_name}{suffix}")
+                    meta["backend_path"] = str(backend_path)
+                    meta["frontend_path"] = str(frontend_path)
+            
+            return {
+                "success": True,
+                "sha256": digest,
+                "image_key": image_key,
+                "cache_hit": cache_hit,
+                "backend_orig_path": str(backend_orig_path),
+                "frontend_orig_path": str(frontend_orig_path),
+                "backend_processed_path": derivatives["model_input"]["backend_path"],
+                "frontend_processed_path": derivatives["model_input"]["frontend_path"],
+                "derivatives": derivatives,
+                "filename": filename
+            }
             
-            try:
-                # Process image
-                processed_image = self._preprocess_image(temp_image_path)
-                
-                # Generate output filename
-                base_name = Path(filename).stem
-                timestamp = int(os.path.getmtime(temp_image_path))
-                
-                # Save original image to backend
-                backend_orig_path = self.backend_dir / "images" / f"{base_name}_{timestamp}_original.jpg"
-                with open(backend_orig_path, 'wb') as f:
-                    f.write(image_bytes)
-                
-                # Save original image to frontend
-                frontend_orig_path = self.frontend_dir / "images" / f"{base_name}_{timestamp}_original.jpg"
-                with open(frontend_orig_path, 'wb') as f:
-                    f.write(image_bytes)
-                
-                # Save processed image to backend
-                backend_processed_path = self.backend_dir / "images" / f"{base_name}_{timestamp}_processed.jpg"
-                processed_image.save(backend_processed_path, 'JPEG', quality=85)
-                
-                # Save processed image to frontend
-                frontend_processed_path = self.frontend_dir / "images" / f"{base_name}_{timestamp}_processed.jpg"
-                processed_image.save(frontend_processed_path, 'JPEG', quality=85)
-                
-                return {
-                    "success": True,
-                    "backend_orig_path": str(backend_orig_path),
-                    "frontend_orig_path": str(frontend_orig_path),
-                    "backend_processed_path": str(backend_processed_path),
-                    "frontend_processed_path": str(frontend_processed_path),
-                    "filename": filename
-                }
-                
-            finally:
-                # Clean up temporary file
-                os.unlink(temp_image_path)
-                
         except Exception as e:
+            if new_blob is not None:
+                self.store.discard(new_blob)
             return {
                 "success": False,
                 "error": str(e),
                 "filename": filename
             }
     
-    def _preprocess_image(self, image_path):
-        """Preprocess image for better analysis"""
-        if not IMAGE_AVAILABLE:
-            raise ImportError("PIL/OpenCV is required for image processing")
+    def _image_cache_key(self, digest):
+        """Key an image by its hash and every setting that affects the derivatives"""
+        pipeline = json.dumps({
+            "max_size": IMAGE_MAX_SIZE,
+            "contrast": IMAGE_CONTRAST,
+            "sharpness": IMAGE_SHARPNESS,
+            "blur_radius": IMAGE_BLUR_RADIUS,
+            "derivatives": IMAGE_DERIVATIVES,
+            "webp": WEBP_AVAILABLE
+        }, sort_keys=True)
+        return f"{digest}-img{hashlib.sha256(pipeline.encode('utf-8')).hexdigest()[:16]}"
+    
+    def _cached_image(self, image_key):
+        """Return cached derivative metadata whose blobs still exist"""
+        entry = self.image_cache.get(image_key)
+        if entry is None:
+            return None
+        
+        for meta in entry.values():
+            if not self.store.path_for(meta["sha256"], Path(meta["suffix"]).suffix).exists():
+                self.image_cache.delete(image_key)
+                return None
+        return entry
+    
+    def _render_image(self, image_bytes, image_key):
+        """Encode every derivative once, store the blobs and cache their metadata"""
+        with stage("preprocess"):
+            images = self._image_derivatives(image_bytes)
+        
+        derivatives = {}
+        for name, _, image_format, suffix, options in IMAGE_DERIVATIVES:
+            if image_format == "WEBP" and not WEBP_AVAILABLE:
+                image_format, suffix = "JPEG", suffix.replace(".webp", ".jpg")
+            with stage(f"encode_{name}"):
+                image = Image.fromarray(images[name])
+                buffer = io.BytesIO()
+                image.save(buffer, image_format, **options)
+            with stage(f"store_{name}", buffer.getbuffer().nbytes):
+                derivative_digest, _ = self.store.put_bytes(buffer.getbuffer(), Path(suffix).suffix)
+            derivatives[name] = {
+                "width": image.width,
+                "height": image.height,
+                "bytes": buffer.getbuffer().nbytes,
+                "sha256": derivative_digest,
+                "format": image_format.lower(),
+                "suffix": suffix
+            }
+        
+        self.image_cache.put(image_key, derivatives)
+        return derivatives
+    
+    def _load_image(self, image_source):
+        """Decode image bytes or an image file into an upright RGB array of at most 1024px"""
+        _load_image_backend()
         
         # Load image
-        image = Image.open(image_path)
+        if isinstance(image_source, (bytes, bytearray, memoryview)):
+            image_source = io.BytesIO(image_source)
+        image = Image.open(image_source)
+        
+        # Large JPEGs are decoded straight at 1/2, 1/4 or 1/8 scale, never
+        # below the final size, instead of decoding every pixel and then
+        # throwing most of them away
+        if image.format == 'JPEG' and max(image.size) > IMAGE_MAX_SIZE:
+            ratio = IMAGE_MAX_SIZE / max(image.size)
+            image.draft('RGB', (int(image.width * ratio), int(image.height * ratio)))
+        
+        # Apply the EXIF orientation so photos are not analyzed sideways
+        image = ImageOps.exif_transpose(image)
         
         # Convert to RGB if necessary
         if image.mode != 'RGB':
             image = image.convert('RGB')
         
-        # Resize if too large (max 1024x1024)
-        max_size = 1024
-        if max(image.size) > max_size:
-            ratio = max_size / max(image.size)
-            new_size = tuple(int(dim * ratio) for dim in image.size)
-            image = image.resize(new_size, Image.Resampling.LANCZOS)
-        
-        # Enhance contrast
-        enhancer = ImageEnhance.Contrast(image)
-        image = enhancer.enhance(1.2)
-        
-        # Enhance sharpness
-        enhancer = ImageEnhance.Sharpness(image)
-        image = enhancer.enhance(1.1)
+        # Resize if too large (max 1024x1024); area interpolation is the
+        # cheap, alias-free choice for downscaling
+        return _fit_within(np.asarray(image), IMAGE_MAX_SIZE)
+    
+    def _enhance_image(self, pixels):
+        """Enhance contrast and sharpness and reduce noise, in place on an RGB array"""
+        # Enhance contrast around the mean gray level
+        mean = int(cv2.mean(cv2.cvtColor(pixels, cv2.COLOR_RGB2GRAY))[0] + 0.5)
+        cv2.LUT(pixels, _contrast_lut(mean), dst=pixels)
         
-        # Apply slight Gaussian blur to reduce noise
-        image = image.filter(ImageFilter.GaussianBlur(radius=0.5))
+        # Enhance sharpness, then apply slight Gaussian blur to reduce noise
+        cv2.filter2D(pixels, -1, _sharpen_kernel(), dst=pixels, borderType=cv2.BORDER_REPLICATE)
+        blur = _gaussian_blur_kernel()
+        cv2.sepFilter2D(pixels, -1, blur, blur, dst=pixels, borderType=cv2.BORDER_REPLICATE)
         
-        return image
+        return pixels
+    
+    def _image_derivatives(self, image_source):
+        """Decode an image once and return the arrays of every derivative by name.
+
+        The thumbnail and preview are scaled from the decoded image as is;
+        only the model input goes through enhancement.
+        """
+        pixels = self._load_image(image_source)
+        images = {}
+        for name, max_size, _, _, _ in IMAGE_DERIVATIVES:
+            if name != "model_input":
+                images[name] = _fit_within(pixels, max_size)
+        images["model_input"] = self._enhance_image(pixels)
+        return images
     
+    @timed("audio")
     def process_audio(self, audio_data, filename, output_format="processed"):
         """Preprocess audio and save to appropriate directories"""
+        new_blob = None
         try:
-            # Decode base64 data
-            audio_bytes = base64.b64decode(audio_data)
+            # Save original audio once in its own container, named by its content
+            # hash; it is published only once it has been decoded
+            audio_bytes = self._decode_payload(audio_data)
+            base_name = Path(filename).stem
+            extension = detect_audio_extension(audio_bytes) or Path(filename).suffix.lower() or '.bin'
+            with stage("store_original", len(audio_bytes)):
+                digest, orig_blob, created = self.store.add_bytes(audio_bytes, extension)
+                new_blob = orig_blob if created else None
+                artifact_name = f"{base_name}_{digest[:16]}"
             
-            # Create temporary audio file
-            with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_audio:
-                temp_audio.write(audio_bytes)
-                temp_audio_path = temp_audio.name
+            # Preprocess block by block from the stored original
+            processed, preview = self._preprocess_audio(orig_blob, preview=self.audio_preview)
+            new_blob = None
+            suffix = AUDIO_SUFFIXES[self.audio_format]
+            with stage("publish"):
+                backend_orig_path, frontend_orig_path = self.publish(orig_blob, "audio", f"{artifact_name}_original{extension}")
+                backend_processed_path, frontend_processed_path = self.publish(
+                    processed[1], "audio", f"{artifact_name}_processed{suffix}")
+            
+            result = {
+                "success": True,
+                "sha256": digest,
+                "format": extension.lstrip('.'),
+                "backend_orig_path": str(backend_orig_path),
+                "frontend_orig_path": str(frontend_orig_path),
+                "backend_processed_path": str(backend_processed_path),
+                "frontend_processed_path": str(frontend_processed_path),
+                "filename": filename
+            }
+            
+            if preview is not None:
+                with stage("publish"):
+                    backend_preview_path, frontend_preview_path = self.publish(
+                        preview[1], "audio", f"{artifact_name}_preview.opus")
+                result["backend_preview_path"] = str(backend_preview_path)
+                result["frontend_preview_path"] = str(frontend_preview_path)
+            
+            return result
             
-            try:
-                # Process audio
-                processed_audio_path = self._preprocess_audio(temp_audio_path)
-                
-                # Generate output filename
-                base_name = Path(filename).stem
-                timestamp = int(os.path.getmtime(temp_audio_path))
-                
-                # Save original audio to backend
-                backend_orig_path = self.backend_dir / "audio" / f"{base_name}_{timestamp}_original.wav"
-                with open(backend_orig_path, 'wb') as f:
-                    f.write(audio_bytes)
-                
-                # Save original audio to frontend
-                frontend_orig_path = self.frontend_dir / "audio" / f"{base_name}_{timestamp}_original.wav"
-                with open(frontend_orig_path, 'wb') as f:
-                    f.write(audio_bytes)
-                
-                # Copy processed audio to backend
-                backend_processed_path = self.backend_dir / "audio" / f"{base_name}_{timestamp}_processed.wav"
-                shutil.copy2(processed_audio_path, backend_processed_path)
-                
-                # Copy processed audio to frontend
-                frontend_processed_path = self.frontend_dir / "audio" / f"{base_name}_{timestamp}_processed.wav"
-                shutil.copy2(processed_audio_path, frontend_processed_path)
-                
-                # Clean up temporary processed file
-                os.unlink(processed_audio_path)
-                
-                return {
-                    "success": True,
-                    "backend_orig_path": str(backend_orig_path),
-                    "frontend_orig_path": str(frontend_orig_path),
-                    "backend_processed_path": str(backend_processed_path),
-                    "frontend_processed_path": str(frontend_processed_path),
-                    "filename": filename
-                }
-                
-            finally:
-                # Clean up temporary file
-                os.unlink(temp_audio_path)
-                
         except Exception as e:
+            if new_blob is not None:
+                self.store.discard(new_blob)
             return {
                 "success": False,
                 "error": str(e),
                 "filename": filename
             }
     
-    def _preprocess_audio(self, audio_path):
-        """Preprocess audio for better analysis"""
-        if not AUDIO_AVAILABLE:
-            raise ImportError("librosa/soundfile is required for audio processing")
+    def _preprocess_audio(self, audio_source, preview=False):
+        """Preprocess an audio file or bytes into the blob store
         
-        # Load audio
-        y, sr = librosa.load(audio_path, sr=None)
+        Normalization, pre-emphasis and resampling to 16kHz run over fixed-size
+        blocks, so memory use does not grow with the length of the recording.
+        Returns ((digest, blob_path) of the processed audio, (digest, blob_path)
+        of the Opus preview or None).
+        """
+        _load_audio_backend()
         
-        # Normalize audio
-        y = librosa.util.normalize(y)
+        suffix = AUDIO_SUFFIXES[self.audio_format]
+        fd, output_path = tempfile.mkstemp(dir=self.store.blob_dir, suffix=suffix)
+        os.close(fd)
+        preview_path = None
+        decoded_path = None
+        try:
+            try:
+                with stage("preprocess"):
+                    audio_stream.preprocess_stream(audio_source, output_path, audio_stream.TARGET_SAMPLE_RATE,
+                                                   resampler=self.resampler, output_format=self.audio_format)
+            except RuntimeError:
+                # Containers libsndfile cannot read (e.g. m4a) are decoded to a
+                # temporary WAV first, which is then processed the same way
+                with stage("transcode") as transcode:
+                    decoded_path = self._decode_to_wav(audio_source)
+                    transcode.bytes = os.path.getsize(decoded_path)
+                audio_source = decoded_path
+                with stage("preprocess"):
+                    audio_stream.preprocess_stream(audio_source, output_path, audio_stream.TARGET_SAMPLE_RATE,
+                                                   resampler=self.resampler, output_format=self.audio_format)
+            with stage("store_processed", os.path.getsize(output_path)):
+                processed = self.store.put_file(output_path, suffix)
+            
+            if not preview or not audio_stream.opus_available():
+                return processed, None
+            fd, preview_path = tempfile.mkstemp(dir=self.store.blob_dir, suffix=".opus")
+            os.close(fd)
+            with stage("encode_preview"):
+                audio_stream.encode_preview(audio_source, preview_path, resampler=self.resampler)
+            with stage("store_preview", os.path.getsize(preview_path)):
+                return processed, self.store.put_file(preview_path, ".opus")
+        finally:
+            for path in (output_path, preview_path, decoded_path):
+                if path and os.path.exists(path):
+                    os.unlink(path)
+    
+    def _decode_to_wav(self, audio_source):
+        """Decode audio libsndfile cannot read into a temporary WAV file, block by block"""
+        if not _installed("audioread"):
+            raise ValueError("Unsupported audio format (install audioread and ffmpeg to decode it)")
+        import audioread
         
-        # Apply noise reduction (simple high-pass filter)
-        y = librosa.effects.preemphasis(y)
+        if isinstance(audio_source, (bytes, bytearray, memoryview)):
+            with tempfile.NamedTemporaryFile(dir=self.store.blob_dir, suffix='.audio', delete=False) as temp_audio:
+                temp_audio.write(audio_source)
+            audio_source = temp_audio.name
+            cleanup = temp_audio.name
+        else:
+            cleanup = None
         
-        # Resample to 16kHz if necessary
-        if sr != 16000:
-            y = librosa.resample(y, orig_sr=sr, target_sr=16000)
-            sr = 16000
+        fd, wav_path = tempfile.mkstemp(dir=self.store.blob_dir, suffix=".wav")
+        os.close(fd)
+        try:
+            with audioread.audio_open(str(audio_source)) as decoder:
+                with sf.SoundFile(wav_path, 'w', samplerate=decoder.samplerate, channels=decoder.channels,
+                                  format='WAV', subtype='PCM_16') as out:
+                    for buffer in decoder:
+                        samples = np.frombuffer(buffer, dtype='<i2')
+                        out.write(samples.reshape(-1, decoder.channels))
+            return wav_path
+        except audioread.DecodeError:
+            os.unlink(wav_path)
+            raise ValueError("Unsupported or corrupt audio file")
+        except BaseException:
+            os.unlink(wav_path)
+            raise
+        finally:
+            if cleanup:
+                os.unlink(cleanup)
+    
+    def split_audio(self, audio_path, max_seconds=None):
+        """Cut processed audio into speech chunks of at most max_seconds (default
+        AIFT_AUDIO_MAX_CHUNK_SECONDS), cut at pauses
         
-        # Create temporary processed file
-        processed_path = tempfile.mktemp(suffix='.wav')
-        sf.write(processed_path, y, sr)
+        Returns the segments from audio_segmenter, each with the backend and
+        frontend paths of its own file in the configured audio format. A
+        recording that fits in one chunk is returned as a single segment
+        pointing at the file itself, and a silent one as no segments.
+        """
+        _load_audio_backend()
+        audio_path = Path(audio_path)
+        if max_seconds is None:
+            max_seconds = audio_segmenter.MAX_CHUNK_SECONDS
+        segments = audio_segmenter.segment_audio(audio_path, max_seconds)
+        if len(segments) == 1:
+            info = sf.info(str(audio_path))
+            return [{
+                "index": 0,
+                "start_sample": 0,
+                "end_sample": info.frames,
+                "start": 0.0,
+                "end": round(info.duration, 2),
+                "backend_path": str(audio_path)
+            }]
+        if not segments:
+            return []
         
-        return processed_path
+        with sf.SoundFile(str(audio_path)) as source:
+            for segment in segments:
+                source.seek(segment["start_sample"])
+                samples = source.read(segment["end_sample"] - segment["start_sample"], dtype='int16')
+                buffer = io.BytesIO()
+                sf.write(buffer, samples, source.samplerate, format=self.audio_format, subtype='PCM_16')
+                suffix = AUDIO_SUFFIXES[self.audio_format]
+                _, backend_path, frontend_path = self.save_artifact(
+                    buffer.getbuffer(), "audio", f"{audio_path.stem}_part{segment['index']:03d}{suffix}")
+                segment["backend_path"] = str(backend_path)
+                segment["frontend_path"] = str(frontend_path)
+        return segments
 
 def main():
+    from audio_stream import RESAMPLERS
+    
     parser = argparse.ArgumentParser(description='Process files for AI analysis')
     parser.add_argument('--type', required=True, choices=['pdf', 'image', 'audio'], 
                        help='Type of file to process')
-    parser.add_argument('--input', required=True, help='Input file path or base64 data')
+    parser.add_argument('--input', required=True,
+                       help='Input file (raw binary, or base64 if .txt/.b64), "-" for a length-prefixed stdin stream, or base64 data')
     parser.add_argument('--filename', required=True, help='Original filename')
     parser.add_argument('--output-dir', default='uploads', help='Output directory')
     parser.add_argument('--format', default='text', choices=['text', 'processed'], 
                        help='Output format')
+    parser.add_argument('--resampler', choices=['auto'] + RESAMPLERS,
+                       help='Audio resampler backend (default: AIFT_AUDIO_RESAMPLER or auto)')
+    parser.add_argument('--audio-format', choices=list(AUDIO_SUFFIXES),
+                       help='Processed audio format (default: AIFT_AUDIO_FORMAT or FLAC)')
     
     args = parser.parse_args()
     
     # Initialize processor
-    processor = FileProcessor(args.output_dir)
+    processor = FileProcessor(args.output_dir, resampler=args.resampler, audio_format=args.audio_format)
     
     # Read input data
-    if os.path.exists(args.input):
-        # Input is a file path
-        with open(args.input, 'r') as f:
-            data = f.read().strip()
+    if args.input == '-' or os.path.exists(args.input):
+        # Input is a file path or stdin stream
+        data = read_payload(args.input)
     else:
         # Input is base64 data
         data = args.input
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Keyword Index Script
+Incremental BM25 inverted index over uploaded document text.
+
+Thai text is tokenized into dictionary words when pythainlp is installed and
+into character bigrams otherwise (see text_chunker.tokenize). Postings are
+stored in SQLite, clustered by term, so a query reads only the posting lists
+of its own terms instead of scanning every document.
+"""
+
+import json
+import math
+import heapq
+import sqlite3
+import argparse
+import threading
+from pathlib import Path
+from collections import Counter, defaultdict
+from text_chunker import tokenize, BM25_K1, BM25_B
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS docs (
+    doc_num INTEGER PRIMARY KEY,
+    doc_id TEXT UNIQUE NOT NULL,
+    filename TEXT,
+    path TEXT,
+    length INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS terms (
+    term TEXT PRIMARY KEY,
+    df INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS postings (
+    term TEXT NOT NULL,
+    doc_num INTEGER NOT NULL,
+    tf INTEGER NOT NULL,
+    PRIMARY KEY (term, doc_num)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS stats (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+class KeywordIndex:
+    """BM25 inverted index persisted in a single SQLite file"""
+
+    def __init__(self, db_path="uploads/index/keywords.sqlite3"):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+
+        # Schema setup uses its own connection so that none is left open
+        # to be inherited by forked worker processes
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+        finally:
+            conn.close()
+
+    def _connect(self):
+        """Return this thread's connection (sqlite3 connections are per thread)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def contains(self, doc_id):
+        row = self._connect().execute("SELECT 1 FROM docs WHERE doc_id = ?", (doc_id,)).fetchone()
+        return row is not None
+
+    def add_document(self, doc_id, text, filename="", path=""):
+        """Index a document's text; returns False if it was already indexed"""
+        # Checked again inside the transaction; this one only spares
+        # tokenizing the text of a document indexed earlier
+        if self.contains(doc_id):
+            return False
+
+        counts = Counter(tokenize(text))
+        length = sum(counts.values())
+
+        conn = self._connect()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            if conn.execute("SELECT 1 FROM docs WHERE doc_id = ?", (doc_id,)).fetchone():
+                return False
+
+            cursor = conn.execute(
+                "INSERT INTO docs (doc_id, filename, path, length) VALUES (?, ?, ?, ?)",
+                (doc_id, filename, str(path), length))
+            doc_num = cursor.lastrowid
+
+            conn.executemany(
+                "INSERT INTO postings (term, doc_num, tf) VALUES (?, ?, ?)",
+                ((term, doc_num, tf) for term, tf in counts.items()))
+            conn.executemany(
+                "INSERT INTO terms (term, df) VALUES (?, 1) ON CONFLICT(term) DO UPDATE SET df = df + 1",
+                ((term,) for term in counts))
+            conn.executemany(
+                "INSERT INTO stats (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = value + excluded.value",
+                [("doc_count", 1), ("total_length", length)])
+
+        return True
+
+    def _stats(self, conn):
+        stats = dict(conn.execute("SELECT key, value FROM stats").fetchall())
+        return stats.get("doc_count", 0), stats.get("total_length", 0)
+
+    def search(self, query, top_k=10):
+        """Return the top_k documents for a query ranked by BM25"""
+        query_terms = set(tokenize(query))
+        if not query_terms:
+            return []
+
+        conn = self._connect()
+        doc_count, total_length = self._stats(conn)
+        if doc_count == 0:
+            return []
+        avg_length = total_length / doc_count
+
+        # Only the posting lists of the query terms are read
+        scores = defaultdict(float)
+        for term in query_terms:
+            row = conn.execute("SELECT df FROM terms WHERE term = ?", (term,)).fetchone()
+            if row is None:
+                continue
+            df = row[0]
+            idf = math.log(1 + (doc_count - df + 0.5) / (df + 0.5))
+            postings = conn.execute(
+                "SELECT p.doc_num, p.tf, d.length FROM postings p JOIN docs d ON d.doc_num = p.doc_num "
+                "WHERE p.term = ?", (term,))
+            for doc_num, tf, length in postings:
+                length_norm = 1 - BM25_B + BM25_B * length / avg_length
+                scores[doc_num] += idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * length_norm)
+
+        best = heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+        results = []
+        for doc_num, score in best:
+            doc_id, filename, path = conn.execute(
+                "SELECT doc_id, filename, path FROM docs WHERE doc_num = ?", (doc_num,)).fetchone()
+            results.append({
+                "doc_id": doc_id,
+                "filename": filename,
+                "path": path,
+                "score": round(score, 4)
+            })
+
+        return results
+
+def main():
+    parser = argparse.ArgumentParser(description='Search or extend the BM25 keyword index')
+    parser.add_argument('command', choices=['search', 'add'], help='Operation')
+    parser.add_argument('text', help='Query for search, or path of a UTF-8 text file for add')
+    parser.add_argument('--db', default='uploads/index/keywords.sqlite3', help='Index database')
+    parser.add_argument('--top-k', type=int, default=10, help='Number of documents to return')
+    parser.add_argument('--doc-id', help='Document ID for add (defaults to the file name)')
+
+    args = parser.parse_args()
+    index = KeywordIndex(args.db)
+
+    if args.command == 'search':
+        result = {"success": True, "results": index.search(args.text, args.top_k)}
+    else:
+        with open(args.text, 'r', encoding='utf-8') as f:
+            text = f.read()
+        doc_id = args.doc_id or Path(args.text).name
+        result = {"success": True, "added": index.add_document(doc_id, text, Path(args.text).name, args.text)}
+
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+if __name__ == "__main__":
+    main()
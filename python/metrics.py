@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Metrics
+Per-stage request timings and Prometheus-style counters and histograms.
+
+A request opened with request_timer() records how long each of its stages
+takes and how many bytes it handles; the totals are returned in the "timings"
+field of its result. Every stage is also added to the process-wide REGISTRY,
+which renders the Prometheus text format. Pre-forked workers each keep their
+own registry and save a snapshot of it to a shared directory, so whichever
+process is asked reports the totals of all of them.
+"""
+
+import os
+import json
+import time
+import threading
+import tempfile
+import functools
+import contextvars
+from contextlib import contextmanager
+from pathlib import Path
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+# Histogram buckets in seconds, from a hash of a small file to a slow upstream answer
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+SNAPSHOT_INTERVAL = 1.0
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+METRICS = {
+    "aift_requests_total": ("counter", "Requests handled, by operation and status"),
+    "aift_request_duration_seconds": ("histogram", "Time to handle a request, by operation"),
+    "aift_stage_duration_seconds": ("histogram", "Time spent in each stage of a request"),
+    "aift_stage_bytes_total": ("counter", "Bytes handled by each stage of a request"),
+    "aift_worker_requests_total": ("counter", "Worker request lines answered, by op and status"),
+    "aift_worker_request_duration_seconds": ("histogram", "Time from reading a request line to writing its result")
+}
+
+def _key(name, labels):
+    return name, tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+class MetricsRegistry:
+    """Thread-safe counters and histograms keyed by metric name and labels"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {}
+        # Cumulative bucket counts followed by the sum and count of observations
+        self.histograms = {}
+        self.snapshot_dir = None
+        self._dirty = False
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+            self._dirty = False
+
+    def inc(self, name, value=1, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+            self._dirty = True
+
+    def observe(self, name, value, **labels):
+        key = _key(name, labels)
+        with self._lock:
+            values = self.histograms.get(key)
+            if values is None:
+                values = self.histograms[key] = [0] * len(LATENCY_BUCKETS) + [0.0, 0]
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if value <= bound:
+                    values[i] += 1
+            values[-2] += value
+            values[-1] += 1
+            self._dirty = True
+
+    def snapshot(self):
+        """Return the current values as a JSON-serializable dict"""
+        with self._lock:
+            return {
+                "counters": [[name, list(map(list, labels)), value] for (name, labels), value in self.counters.items()],
+                "histograms": [[name, list(map(list, labels)), list(values)]
+                               for (name, labels), values in self.histograms.items()]
+            }
+
+    def persist(self, directory):
+        """Save snapshots to directory so other processes can report this one"""
+        self.snapshot_dir = Path(directory)
+        self.snapshot_dir.mkdir(parents=True, exist_ok=True)
+
+    def save_snapshot(self):
+        """Write this process's snapshot atomically, if a directory is set"""
+        if self.snapshot_dir is None:
+            return
+        with self._lock:
+            self._dirty = False
+        fd, temp_path = tempfile.mkstemp(dir=self.snapshot_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(self.snapshot(), f)
+            os.replace(temp_path, self.snapshot_dir / f"metrics-{os.getpid()}.json")
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+    def start_autosave(self, interval=SNAPSHOT_INTERVAL):
+        """Save the snapshot from a daemon thread whenever it has changed"""
+        def autosave():
+            while True:
+                time.sleep(interval)
+                if self._dirty:
+                    try:
+                        self.save_snapshot()
+                    except OSError:
+                        pass
+
+        threading.Thread(target=autosave, name="metrics-autosave", daemon=True).start()
+
+    def clear_snapshots(self):
+        """Remove snapshots left by earlier runs"""
+        if self.snapshot_dir is not None:
+            for path in self.snapshot_dir.glob("metrics-*.json"):
+                path.unlink(missing_ok=True)
+
+    def collect(self):
+        """Return the totals of this process and every saved snapshot"""
+        if self.snapshot_dir is None:
+            return self.snapshot()
+        self.save_snapshot()
+        snapshots = []
+        for path in sorted(self.snapshot_dir.glob("metrics-*.json")):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    snapshots.append(json.load(f))
+            except (OSError, ValueError):
+                # Being replaced or removed right now
+                continue
+        return merge_snapshots(snapshots)
+
+    def render(self):
+        """Return the collected metrics in the Prometheus text format"""
+        return render_prometheus(self.collect())
+
+def merge_snapshots(snapshots):
+    """Add up the counters and histograms of several snapshots"""
+    counters = {}
+    histograms = {}
+    for snapshot in snapshots:
+        for name, labels, value in snapshot.get("counters", []):
+            key = _key(name, dict(labels))
+            counters[key] = counters.get(key, 0) + value
+        for name, labels, values in snapshot.get("histograms", []):
+            key = _key(name, dict(labels))
+            merged = histograms.get(key)
+            histograms[key] = values if merged is None else [a + b for a, b in zip(merged, values)]
+    return {
+        "counters": [[name, list(map(list, labels)), value] for (name, labels), value in counters.items()],
+        "histograms": [[name, list(map(list, labels)), values] for (name, labels), values in histograms.items()]
+    }
+
+def render_prometheus(snapshot):
+    """Format a snapshot in the Prometheus text exposition format"""
+    series = {}
+    for name, labels, value in snapshot["counters"]:
+        series.setdefault(name, []).append((tuple(map(tuple, labels)), value))
+    for name, labels, values in snapshot["histograms"]:
+        series.setdefault(name, []).append((tuple(map(tuple, labels)), values))
+
+    lines = []
+    for name in sorted(series):
+        kind, description = METRICS.get(name, ("untyped", name))
+        lines.append(f"# HELP {name} {description}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in sorted(series[name]):
+            if kind != "histogram":
+                lines.append(f"{name}{_format_labels(labels)} {value}")
+                continue
+            for bound, count in zip(LATENCY_BUCKETS, value):
+                lines.append(f"{name}_bucket{_format_labels(labels, [('le', bound)])} {count}")
+            lines.append(f"{name}_bucket{_format_labels(labels, [('le', '+Inf')])} {value[-1]}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {value[-2]}")
+            lines.append(f"{name}_count{_format_labels(labels)} {value[-1]}")
+    return "\n".join(lines) + "\n"
+
+REGISTRY = MetricsRegistry()
+
+class StageTimer:
+    """Durations and byte counts of the stages of one request"""
+
+    def __init__(self, operation, registry=REGISTRY):
+        self.operation = operation
+        self.registry = registry
+        self.started = time.perf_counter()
+        self.stages = {}
+        self.status = "ok"
+
+    def add(self, name, seconds, nbytes=None):
+        """Record one run of a stage; repeated stages add up"""
+        entry = self.stages.setdefault(name, {"ms": 0.0})
+        entry["ms"] += seconds * 1000
+        self.registry.observe("aift_stage_duration_seconds", seconds, operation=self.operation, stage=name)
+        if nbytes is not None:
+            entry["bytes"] = entry.get("bytes", 0) + int(nbytes)
+            self.registry.inc("aift_stage_bytes_total", int(nbytes), operation=self.operation, stage=name)
+
+    @contextmanager
+    def stage(self, name, nbytes=None):
+        """Time a block as one stage; set .bytes on the yielded object if the size is known only after it"""
+        record = _StageRecord(nbytes)
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            self.add(name, time.perf_counter() - start, record.bytes)
+
+    def as_dict(self):
+        return {
+            "total_ms": round((time.perf_counter() - self.started) * 1000, 2),
+            "stages": {name: {key: round(value, 2) if key == "ms" else value for key, value in entry.items()}
+                       for name, entry in self.stages.items()}
+        }
+
+    def attach(self, result):
+        """Add the "timings" field to a result dict and take its status from it"""
+        if isinstance(result, dict):
+            if not result.get("success", True):
+                self.status = "error"
+            result["timings"] = self.as_dict()
+        return result
+
+    def finish(self):
+        """Count the request once it is complete"""
+        self.registry.inc("aift_requests_total", operation=self.operation, status=self.status)
+        self.registry.observe("aift_request_duration_seconds", time.perf_counter() - self.started,
+                              operation=self.operation)
+
+class _StageRecord:
+    def __init__(self, nbytes=None):
+        self.bytes = nbytes
+
+_current_timer = contextvars.ContextVar("aift_stage_timer", default=None)
+
+def current_timer():
+    """Return the StageTimer of the request being handled, or None"""
+    return _current_timer.get()
+
+@contextmanager
+def activate(timer):
+    """Make timer the current one, so stage() calls in this block record into it"""
+    token = _current_timer.set(timer)
+    try:
+        yield timer
+    finally:
+        _current_timer.reset(token)
+
+@contextmanager
+def request_timer(operation):
+    """Time a request; one opened inside another request joins the outer timer"""
+    timer = current_timer()
+    if timer is not None:
+        yield timer
+        return
+
+    timer = StageTimer(operation)
+    try:
+        with activate(timer):
+            yield timer
+    except BaseException:
+        timer.status = "error"
+        raise
+    finally:
+        timer.finish()
+
+@contextmanager
+def stage(name, nbytes=None):
+    """Time a block as a stage of the current request; does nothing outside a request"""
+    timer = current_timer()
+    if timer is None:
+        yield _StageRecord(nbytes)
+        return
+    with timer.stage(name, nbytes) as record:
+        yield record
+
+def timed(operation):
+    """Decorate a method returning a result dict: time it as a request and add "timings" to the result"""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with request_timer(operation) as timer:
+                return timer.attach(fn(*args, **kwargs))
+        return wrapper
+    return decorate
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = self.server.registry.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def metrics_server(port, host="127.0.0.1", registry=REGISTRY):
+    """Bind an HTTP server that serves registry.render() at /metrics; call serve_forever() on it"""
+    server = HTTPServer((host, port), _MetricsHandler)
+    server.registry = registry
+    return server
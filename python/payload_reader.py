@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Payload Reader
+Reads upload payloads handed to the AIFT scripts as raw bytes.
+
+A payload source is one of:
+- "-": a length-prefixed stream on stdin (8-byte big-endian length, then the raw bytes)
+- a path ending in .txt or .b64: a legacy text file containing base64
+- any other path: the original binary file
+"""
+
+import sys
+import base64
+import struct
+
+LENGTH_PREFIX = struct.Struct('>Q')
+BASE64_SUFFIXES = ('.txt', '.b64')
+
+def read_length_prefixed(stream):
+    """Read one length-prefixed payload from a binary stream"""
+    header = stream.read(LENGTH_PREFIX.size)
+    if len(header) != LENGTH_PREFIX.size:
+        raise ValueError("Payload stream ended before the length prefix")
+
+    (length,) = LENGTH_PREFIX.unpack(header)
+    payload = bytearray(length)
+    view = memoryview(payload)
+    received = 0
+    while received < length:
+        count = stream.readinto(view[received:])
+        if not count:
+            raise ValueError(f"Payload stream ended after {received} of {length} bytes")
+        received += count
+
+    return payload
+
+def write_length_prefixed(stream, payload):
+    """Write one length-prefixed payload to a binary stream"""
+    stream.write(LENGTH_PREFIX.pack(len(payload)))
+    stream.write(payload)
+    stream.flush()
+
+def read_payload(source):
+    """Return the raw payload bytes for a source argument"""
+    if source == '-':
+        return read_length_prefixed(sys.stdin.buffer)
+
+    with open(source, 'rb') as f:
+        data = f.read()
+
+    if str(source).lower().endswith(BASE64_SUFFIXES):
+        return base64.b64decode(data)
+
+    return data
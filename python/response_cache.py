@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Response Cache
+SQLite-backed cache of AIFT responses shared by every worker process
+"""
+
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+import unicodedata
+from pathlib import Path
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    expires_at REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access);
+"""
+
+def normalize_prompt(text):
+    """Normalize Unicode form and whitespace so trivially different prompts share a key"""
+    return " ".join(unicodedata.normalize('NFC', text or '').split())
+
+class ResponseCache:
+    """Response cache bounded by entry count and bytes, with per-entry TTL"""
+
+    def __init__(self, db_path="uploads/cache/responses.sqlite3", max_entries=10000,
+                 max_bytes=64 * 1024 * 1024, ttl=24 * 3600, skip_sampled=False):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        # When set, calls with temperature > 0 always go upstream
+        self.skip_sampled = skip_sampled
+        self.hits = 0
+        self.misses = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+        finally:
+            conn.close()
+
+    @classmethod
+    def from_env(cls):
+        """Build the cache from AIFT_CACHE_* environment variables"""
+        return cls(
+            db_path=os.environ.get('AIFT_CACHE_PATH', 'uploads/cache/responses.sqlite3'),
+            max_entries=int(os.environ.get('AIFT_CACHE_MAX_ENTRIES', 10000)),
+            max_bytes=int(os.environ.get('AIFT_CACHE_MAX_BYTES', 64 * 1024 * 1024)),
+            ttl=float(os.environ.get('AIFT_CACHE_TTL', 24 * 3600)),
+            skip_sampled=os.environ.get('AIFT_CACHE_SKIP_SAMPLED', '').lower() in ('1', 'true')
+        )
+
+    def _connect(self):
+        """Return a connection for this thread, reopened after a fork"""
+        pid, conn = getattr(self._local, 'conn', (None, None))
+        if conn is None or pid != os.getpid():
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = (os.getpid(), conn)
+        return conn
+
+    @staticmethod
+    def make_key(prompt, system_prompt='', temperature=0.2, max_new_tokens=512, model='textqa', **extra):
+        """Hash the normalized request fields into a cache key"""
+        fields = {
+            "prompt": normalize_prompt(prompt),
+            "system_prompt": normalize_prompt(system_prompt),
+            "temperature": round(float(temperature), 4),
+            "max_new_tokens": int(max_new_tokens),
+            "model": model
+        }
+        fields.update(extra)
+        encoded = json.dumps(fields, ensure_ascii=False, sort_keys=True, default=str)
+        return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+    def enabled_for(self, temperature):
+        return not (self.skip_sampled and float(temperature) > 0)
+
+    def get(self, key):
+        """Return the cached response or None"""
+        now = time.time()
+        conn = self._connect()
+        row = conn.execute("SELECT value, expires_at FROM responses WHERE key = ?", (key,)).fetchone()
+
+        if row is None or row[1] < now:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+        with self._lock:
+            self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, key, value, ttl=None):
+        """Store a JSON-serializable response and evict down to the bounds"""
+        now = time.time()
+        encoded = json.dumps(value, ensure_ascii=False, default=str)
+        size = len(encoded.encode('utf-8'))
+        if size > self.max_bytes:
+            return
+
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, size, expires_at, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, encoded, size, now + (self.ttl if ttl is None else ttl), now))
+            self._evict(conn, now)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _evict(self, conn, now):
+        """Drop expired entries, then least recently used ones until within bounds"""
+        conn.execute("DELETE FROM responses WHERE expires_at < ?", (now,))
+        count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+
+        while count > self.max_entries or total > self.max_bytes:
+            batch = max(count - self.max_entries, 1)
+            rows = conn.execute(
+                "SELECT key, size FROM responses ORDER BY last_access LIMIT ?", (batch,)).fetchall()
+            if not rows:
+                break
+            conn.executemany("DELETE FROM responses WHERE key = ?", [(key,) for key, _ in rows])
+            count -= len(rows)
+            total -= sum(size for _, size in rows)
+
+    def stats(self):
+        count, total = self._connect().execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": count,
+                "bytes": total
+            }
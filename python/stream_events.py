@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Stream Events
+Incremental output of model answers as newline-delimited JSON events or
+Server-Sent Events frames.
+
+A stream is a "start" event, any number of "delta" events carrying the next
+piece of text, and a final "done" event with the full answer (or an "error"
+event). When the upstream call returns a complete answer instead of an
+iterator, the whole answer is a single delta, so the first text arrives no
+sooner than without streaming.
+"""
+
+import json
+
+def iter_upstream(result):
+    """Yield text pieces from an upstream result, streamed or complete"""
+    if isinstance(result, (str, bytes, dict, list)) or result is None:
+        if isinstance(result, bytes):
+            result = result.decode('utf-8', errors='replace')
+        elif not isinstance(result, str):
+            result = json.dumps(result, ensure_ascii=False) if result is not None else ''
+        if result:
+            yield result
+        return
+
+    for piece in result:
+        if isinstance(piece, bytes):
+            piece = piece.decode('utf-8', errors='replace')
+        if piece:
+            yield str(piece)
+
+def stream_answer(pieces, start_fields=None, done_fields=None):
+    """Wrap text pieces in start/delta/done events"""
+    yield {"type": "start", **(start_fields or {})}
+    parts = []
+    try:
+        for piece in pieces:
+            parts.append(piece)
+            yield {"type": "delta", "text": piece}
+    except Exception as e:
+        yield {"type": "error", "success": False, "error": str(e)}
+        return
+    yield {"type": "done", "success": True, "response": "".join(parts), **(done_fields or {})}
+
+def pop_stream_flag(argv):
+    """Remove --stream / --stream=sse from argv; returns (format or None, remaining argv)"""
+    stream_format = None
+    remaining = []
+    for arg in argv:
+        if arg == '--stream':
+            stream_format = 'ndjson'
+        elif arg.startswith('--stream='):
+            stream_format = arg.split('=', 1)[1] or 'ndjson'
+        else:
+            remaining.append(arg)
+    return stream_format, remaining
+
+def format_ndjson(event):
+    return json.dumps(event, ensure_ascii=False, default=str) + "\n"
+
+def format_sse(event):
+    data = json.dumps(event, ensure_ascii=False, default=str)
+    return f"event: {event['type']}\ndata: {data}\n\n"
+
+def write_events(events, stream, fmt='ndjson'):
+    """Write events to a text stream, flushing after each so readers see them at once"""
+    formatter = format_sse if fmt == 'sse' else format_ndjson
+    for event in events:
+        stream.write(formatter(event))
+        stream.flush()
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""Tests for aift_async.AsyncAIFTClient"""
+
+import time
+import asyncio
+import threading
+import pytest
+import aift_client
+from aift_async import AsyncAIFTClient
+
+class BlockingCall:
+    """Stands in for an SDK call: sleeps, and records how many run at once"""
+
+    def __init__(self, seconds=0.05):
+        self.seconds = seconds
+        self.running = 0
+        self.peak = 0
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, value):
+        with self._lock:
+            self.running += 1
+            self.calls += 1
+            self.peak = max(self.peak, self.running)
+        try:
+            time.sleep(self.seconds)
+            return value
+        finally:
+            with self._lock:
+                self.running -= 1
+
+def test_concurrency_is_bounded():
+    call = BlockingCall()
+
+    async def main():
+        async with AsyncAIFTClient(max_concurrency=3) as client:
+            return await asyncio.gather(*(client.run(call, i) for i in range(12)))
+
+    assert asyncio.run(main()) == list(range(12))
+    assert call.calls == 12
+    assert call.peak == 3
+
+def test_timeout_releases_the_caller_and_the_slot():
+    slow = BlockingCall(seconds=1.0)
+    fast = BlockingCall(seconds=0)
+
+    async def main():
+        async with AsyncAIFTClient(max_concurrency=1) as client:
+            started = time.perf_counter()
+            with pytest.raises(asyncio.TimeoutError):
+                await client.run(slow, "late", timeout=0.05)
+            assert time.perf_counter() - started < 0.5
+            # The semaphore slot is free again for the next call
+            return await client.run(fast, "next", timeout=5)
+
+    assert asyncio.run(main()) == "next"
+
+def test_cancellation_releases_the_slot():
+    slow = BlockingCall(seconds=0.5)
+    fast = BlockingCall(seconds=0)
+
+    async def main():
+        async with AsyncAIFTClient(max_concurrency=1) as client:
+            task = asyncio.create_task(client.run(slow, "cancelled"))
+            await asyncio.sleep(0.05)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            return await asyncio.wait_for(client.run(fast, "next"), 5)
+
+    assert asyncio.run(main()) == "next"
+
+def test_operations_go_through_aift_client(monkeypatch):
+    seen = []
+    monkeypatch.setattr(aift_client, "generate", lambda instruction, **kwargs: seen.append(kwargs) or "ok")
+    monkeypatch.setattr(aift_client, "chat", lambda instruction, **kwargs: "chat:" + kwargs["sessionid"])
+
+    async def main():
+        async with AsyncAIFTClient(max_concurrency=2) as client:
+            return (await client.generate("q", temperature=0.7),
+                    await client.chat("q", sessionid="s1"))
+
+    assert asyncio.run(main()) == ("ok", "chat:s1")
+    assert seen[0]["temperature"] == 0.7 and seen[0]["max_new_tokens"] == 512
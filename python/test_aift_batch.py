@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""Tests for aift_batch against the stub AIFT server"""
+
+import json
+from aift_batch import run_manifest, load_manifest
+
+def write_manifest(path, items):
+    path.write_text("".join(json.dumps(item, ensure_ascii=False) + "\n" for item in items), encoding='utf-8')
+
+def read_results(path):
+    return [json.loads(line) for line in path.read_text(encoding='utf-8').splitlines()]
+
+def run(tmp_path, manifest):
+    return run_manifest(manifest, tmp_path / "out.jsonl", tmp_path / "done.txt",
+                        upload_dir=tmp_path / "uploads", workers=1, concurrency=2)
+
+def test_load_manifest_defaults_ids_and_resolves_files(tmp_path):
+    manifest = tmp_path / "batch" / "manifest.jsonl"
+    manifest.parent.mkdir()
+    write_manifest(manifest, [{"operation": "chat"}, {"id": "x", "operation": "pdf", "file": "a.pdf"}])
+    with open(manifest, 'a', encoding='utf-8') as f:
+        f.write("\n")
+    items = load_manifest(manifest)
+    assert [(index, item["id"]) for index, item in items] == [(0, "0"), (1, "x")]
+    assert items[1][1]["file"] == str(manifest.parent / "a.pdf")
+
+def test_partial_failure_and_resume(tmp_path, aift_stub):
+    (tmp_path / "broken.pdf").write_bytes(b"not a pdf")
+    manifest = tmp_path / "manifest.jsonl"
+    write_manifest(manifest, [
+        {"id": "q1", "operation": "chat", "question": "สวัสดี"},
+        {"id": "bad", "operation": "pdf", "file": "broken.pdf", "question": "สรุป"},
+        {"id": "q2", "operation": "chat", "question": "ขอบคุณ"},
+        {"id": "gone", "operation": "image", "file": "missing.jpg"}
+    ])
+
+    summary = run(tmp_path, manifest)
+    assert summary == {"total": 4, "succeeded": 2, "failed": 2, "skipped": 0}
+    results = read_results(tmp_path / "out.jsonl")
+    # Written as they complete; index ties each line back to the manifest
+    assert sorted(result["index"] for result in results) == [0, 1, 2, 3]
+    by_id = {result["id"]: result for result in results}
+    assert all(by_id[item_id]["index"] == index for index, item_id in enumerate(["q1", "bad", "q2", "gone"]))
+    assert by_id["q1"]["result"]["success"] and by_id["q1"]["result"]["message"] == "สวัสดี"
+    assert not by_id["bad"]["result"]["success"] and by_id["bad"]["result"]["error"]
+    assert not by_id["gone"]["result"]["success"]
+    assert sorted((tmp_path / "done.txt").read_text().split()) == ["q1", "q2"]
+
+    # Only the failed items run again
+    (tmp_path / "out.jsonl").unlink()
+    summary = run(tmp_path, manifest)
+    assert summary == {"total": 4, "succeeded": 0, "failed": 2, "skipped": 2}
+    assert sorted(result["id"] for result in read_results(tmp_path / "out.jsonl")) == ["bad", "gone"]
+    assert summary["succeeded"] + summary["failed"] + summary["skipped"] == summary["total"]
+
+def test_checkpoint_ids_outside_the_manifest_are_not_counted(tmp_path, aift_stub):
+    manifest = tmp_path / "manifest.jsonl"
+    write_manifest(manifest, [{"id": "a", "operation": "chat", "question": "hi"},
+                              {"id": "b", "operation": "chat", "question": "hello"}])
+    (tmp_path / "done.txt").write_text("a\nfrom-another-batch\n")
+    summary = run(tmp_path, manifest)
+    assert summary == {"total": 2, "succeeded": 1, "failed": 0, "skipped": 1}
+    assert aift_stub.calls == {"textqa/generate": 1}
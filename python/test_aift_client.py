@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+"""Tests for the streaming wrappers in aift_client"""
+
+import pytest
+import aift_client
+
+@pytest.fixture(autouse=True)
+def no_cache(monkeypatch):
+    monkeypatch.setenv("AIFT_CACHE_DISABLED", "1")
+
+def test_supports_streaming():
+    assert aift_client.supports_streaming(lambda instruction, stream=False: None)
+    assert not aift_client.supports_streaming(lambda instruction, **kwargs: None)
+    assert not aift_client.supports_streaming(len)
+
+def test_generate_stream_relays_upstream_pieces(monkeypatch):
+    calls = []
+
+    def generate(instruction, system_prompt='', max_new_tokens=512, temperature=0.2, return_json=False,
+                 stream=False):
+        calls.append(stream)
+        return iter(["คำ", "ตอบ"]) if stream else "คำตอบ"
+
+    monkeypatch.setattr(aift_client.textqa, "generate", generate)
+    assert list(aift_client.generate_stream("q")) == ["คำ", "ตอบ"]
+    assert calls == [True]
+
+def test_generate_stream_without_sdk_support_is_one_piece(monkeypatch):
+    def generate(instruction, system_prompt='', max_new_tokens=512, temperature=0.2, return_json=False):
+        return "คำตอบ"
+
+    monkeypatch.setattr(aift_client.textqa, "generate", generate)
+    assert list(aift_client.generate_stream("q")) == ["คำตอบ"]
+
+def test_calls_reach_the_sdk(aift_stub):
+    answer = aift_client.generate("สวัสดี")
+    assert answer.startswith("คำตอบจำลอง")
+    assert list(aift_client.chat_stream("สวัสดี")) == [answer]
+    assert aift_stub.calls == {"textqa/generate": 1, "textqa/chat": 1}
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""Tests for the JSON-lines protocol of aift_worker"""
+
+import json
+import socket
+import threading
+from aift_worker import process_line, WorkerServer
+from stream_events import stream_answer
+
+ANSWER = "คำตอบภาษาไทย " * 200
+
+class EchoHandler:
+    """Stands in for AIFTIntegrated: answers chat with a fixed Thai text"""
+
+    def chat(self, question, sessionid, context, temperature, return_json):
+        return {"success": True, "response": ANSWER, "question": question, "sessionid": sessionid}
+
+    def run_stream(self, operation, data, question, sessionid, context, temperature, return_json):
+        return stream_answer(iter(["คำ", "ตอบ"]), {"sessionid": sessionid})
+
+def responses(line):
+    return [json.loads(response) for response in process_line(EchoHandler(), line)]
+
+def test_request_gets_one_result_line():
+    [response] = responses(json.dumps({"id": "7", "op": "chat", "question": "สวัสดี"}))
+    assert response["id"] == "7"
+    assert response["result"]["question"] == "สวัสดี"
+    assert response["result"]["sessionid"] == "default-session"
+
+def test_stream_events_precede_the_result():
+    lines = responses(json.dumps({"id": "s", "op": "chat", "stream": True}))
+    assert [line["event"]["type"] for line in lines[:-1]] == ["start", "delta", "delta", "done"]
+    assert lines[-1]["result"] == {"success": True, "response": "คำตอบ"}
+    assert all(line["id"] == "s" for line in lines)
+
+def test_errors_are_results():
+    [bad_json] = responses("{not json")
+    assert bad_json == {"id": None, "result": {"success": False, "error": bad_json["result"]["error"]}}
+    [unknown] = responses(json.dumps({"id": "u", "op": "fly"}))
+    assert not unknown["result"]["success"]
+    assert json.loads(next(process_line(EchoHandler(), '{"op": "ping"}')))["result"]["success"]
+
+def test_socket_round_trip_keeps_thai_text(tmp_path):
+    server = WorkerServer(str(tmp_path / "worker.sock"), EchoHandler())
+    threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.connect(str(tmp_path / "worker.sock"))
+            reader = client.makefile('rb')
+            for i in range(3):
+                client.sendall(json.dumps({"id": str(i), "op": "chat", "question": "ถาม"}).encode('utf-8') + b"\n")
+                response = json.loads(reader.readline().decode('utf-8'))
+                assert response["id"] == str(i)
+                assert response["result"]["response"] == ANSWER
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""Tests for audio_segmenter"""
+
+import numpy as np
+import pytest
+from audio_segmenter import (FRAME_MS, _split_long, plan_chunks, segment_audio, merge_answers,
+                             format_timestamp)
+
+SR = 16000
+
+def speech_like(seconds, pauses=(), seed=0):
+    """Noise bursts at speech level with quiet pauses at the given (start, end) seconds"""
+    rng = np.random.default_rng(seed)
+    audio = rng.normal(0, 0.3, int(seconds * SR)).astype(np.float32)
+    for start, end in pauses:
+        audio[int(start * SR):int(end * SR)] *= 0.001
+    return audio
+
+def frames(audio):
+    frame_len = SR * FRAME_MS // 1000
+    usable = len(audio) // frame_len * frame_len
+    power = np.mean(audio[:usable].reshape(-1, frame_len) ** 2, axis=1)
+    return 10 * np.log10(power + 1e-10)
+
+def test_split_long_terminates_with_one_frame_chunks():
+    energy_db = np.zeros(10)
+    assert _split_long(0, 10, energy_db, 1) == [(i, i + 1) for i in range(10)]
+
+def test_tiny_max_seconds_terminates():
+    energy_db = frames(speech_like(1.0, [(0.0, 0.3)]))
+    chunks = plan_chunks(energy_db, max_seconds=0.01)
+    assert chunks and all(end - start == 1 for start, end in chunks)
+
+def test_silence_has_no_chunks():
+    assert plan_chunks(frames(np.zeros(SR * 5, dtype=np.float32))) == []
+    hiss = np.random.default_rng(1).normal(0, 1e-4, SR * 5).astype(np.float32)
+    assert plan_chunks(frames(hiss)) == []
+    assert plan_chunks(np.zeros(0)) == []
+
+def test_continuous_sound_is_still_chunked():
+    # Music and dense speech have no quiet gaps for a noise floor
+    t = np.arange(SR * 20) / SR
+    music = (0.3 * np.sin(2 * np.pi * 220 * t) * (1 + 0.5 * np.sin(2 * np.pi * 0.5 * t))).astype(np.float32)
+    dense = speech_like(20.0, seed=2)
+    max_frames = 6 * 1000 // FRAME_MS
+    for audio in (music, dense):
+        energy_db = frames(audio)
+        chunks = plan_chunks(energy_db, max_seconds=6)
+        assert chunks[0][0] == 0 and chunks[-1][1] == len(energy_db)
+        assert all(end - start <= max_frames for start, end in chunks)
+        assert all(a[1] == b[0] for a, b in zip(chunks, chunks[1:]))
+
+def test_chunks_respect_max_seconds_and_cut_at_pauses():
+    pauses = [(4.0, 5.0), (9.0, 10.0), (14.0, 15.0)]
+    energy_db = frames(speech_like(20.0, pauses))
+    chunks = plan_chunks(energy_db, max_seconds=6)
+    max_frames = 6 * 1000 // FRAME_MS
+    assert len(chunks) > 1
+    assert all(end - start <= max_frames for start, end in chunks)
+    for start, end in chunks[:-1]:
+        # Every cut falls inside a pause, not mid-speech
+        assert any(a * 1000 // FRAME_MS <= end <= b * 1000 // FRAME_MS for a, b in pauses)
+
+def test_segment_audio(tmp_path):
+    sf = pytest.importorskip("soundfile")
+    speech = tmp_path / "speech.wav"
+    sf.write(speech, speech_like(10.0, [(0.0, 0.5), (5.0, 6.0)]), SR)
+    segments = segment_audio(speech, max_seconds=6)
+    assert [segment["index"] for segment in segments] == list(range(len(segments)))
+    assert all(segment["end"] - segment["start"] <= 6 for segment in segments)
+    assert segments[-1]["end_sample"] <= 10 * SR
+
+    silent = tmp_path / "silent.wav"
+    sf.write(silent, np.zeros(SR * 3, dtype=np.float32), SR)
+    assert segment_audio(silent) == []
+
+def test_format_timestamp():
+    assert format_timestamp(0) == "0:00"
+    assert format_timestamp(75.9) == "1:15"
+    assert format_timestamp(3725) == "1:02:05"
+
+def test_merge_answers_in_time_order():
+    segments = [{"start": 30.0, "end": 60.0}, {"start": 0.0, "end": 30.0}]
+    assert merge_answers(segments, [" second ", "first"]) == "[0:00-0:30] first\n\n[0:30-1:00] second"
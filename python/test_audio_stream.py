@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""Tests for audio_stream"""
+
+import numpy as np
+import pytest
+from audio_stream import (preemphasis, peak_level, preprocess_stream, available_resamplers, make_resampler,
+                          PolyphaseResampler)
+
+sf = pytest.importorskip("soundfile")
+
+def tone(seconds, sr, freq=440.0, amplitude=0.25):
+    t = np.arange(int(seconds * sr)) / sr
+    return (amplitude * np.sin(2 * np.pi * freq * t)).astype(np.float32)
+
+def test_blockwise_preemphasis_matches_whole_signal():
+    y = np.random.default_rng(0).normal(0, 0.1, 10000).astype(np.float32)
+    whole, _ = preemphasis(y)
+    parts, zi = [], None
+    for block in np.array_split(y, 7):
+        out, zi = preemphasis(block, zi=zi)
+        parts.append(out)
+    np.testing.assert_allclose(np.concatenate(parts), whole, atol=1e-6)
+
+def test_preemphasis_matches_librosa():
+    librosa = pytest.importorskip("librosa")
+    y = np.random.default_rng(1).normal(0, 0.1, 4000).astype(np.float32)
+    np.testing.assert_allclose(preemphasis(y)[0], librosa.effects.preemphasis(y), atol=1e-6)
+
+def test_peak_level_reads_every_block(tmp_path):
+    y = tone(1.0, 16000)
+    y[12345] = -0.9
+    path = tmp_path / "tone.wav"
+    sf.write(path, y, 16000, subtype='FLOAT')
+    assert peak_level(path, block_frames=1000) == pytest.approx(0.9)
+
+def test_preprocess_stream_normalizes_and_keeps_length(tmp_path):
+    source = tmp_path / "in.wav"
+    sf.write(source, tone(2.0, 16000), 16000)
+    output = tmp_path / "out.wav"
+    frames, sr = preprocess_stream(source, output, block_frames=4096)
+    data, out_sr = sf.read(output)
+    assert (frames, sr, out_sr) == (len(data), 16000, 16000)
+    assert frames == 32000
+    # Peak-normalized before pre-emphasis
+    assert np.abs(data).max() > 0.1
+
+def test_poly_resampler_matches_resample_poly():
+    signal = pytest.importorskip("scipy.signal")
+    y = np.random.default_rng(2).normal(0, 0.1, 44100).astype(np.float32)
+    resampler = PolyphaseResampler(44100, 16000)
+    out = np.concatenate([resampler.process(block) for block in np.array_split(y, 13)] + [resampler.flush()])
+    expected = signal.resample_poly(y, resampler.up, resampler.down, window=resampler.filter)
+    assert len(out) == len(expected)
+    np.testing.assert_allclose(out, expected, atol=1e-5)
+
+@pytest.mark.parametrize("backend", ["soxr", "poly", "librosa"])
+def test_resamplers_keep_duration_and_tone(backend):
+    if backend not in available_resamplers():
+        pytest.skip(f"{backend} not installed")
+    y = tone(1.0, 48000, freq=1000.0)
+    resampler = make_resampler(48000, 16000, backend)
+    out = np.concatenate([resampler.process(block) for block in np.array_split(y, 5)] + [resampler.flush()])
+    assert abs(len(out) - 16000) <= 1
+    expected = tone(1.0, 16000, freq=1000.0)[:len(out)]
+    # Ignore the filter edges
+    np.testing.assert_allclose(out[500:-500], expected[500:-500], atol=0.02)
+
+def test_unknown_resampler_is_rejected():
+    with pytest.raises(ValueError):
+        make_resampler(48000, 16000, "fast")
@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+"""Tests for blob_store.BlobStore"""
+
+from blob_store import BlobStore
+
+def test_add_bytes_reports_new_blobs(tmp_path):
+    store = BlobStore(tmp_path)
+    digest, blob_path, created = store.add_bytes(b"data", ".bin")
+    assert created and blob_path.read_bytes() == b"data"
+    assert blob_path == store.path_for(digest, ".bin")
+    assert store.add_bytes(b"data", ".bin") == (digest, blob_path, False)
+    assert store.put_bytes(b"data", ".bin") == (digest, blob_path)
+
+def test_discard(tmp_path):
+    store = BlobStore(tmp_path)
+    _, blob_path, _ = store.add_bytes(b"data")
+    store.discard(blob_path)
+    store.discard(blob_path)
+    assert not blob_path.exists()
+
+def test_link_shares_content(tmp_path):
+    store = BlobStore(tmp_path)
+    _, blob_path = store.put_bytes(b"data", ".txt")
+    view = store.link(blob_path, tmp_path / "view" / "a.txt")
+    assert view.read_bytes() == b"data"
+    assert store.link(blob_path, view) == view
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+"""Tests for disk_cache.DiskCache"""
+
+from disk_cache import DiskCache
+
+def disk_bytes(cache):
+    return sum(path.stat().st_size for path in cache.cache_dir.glob("*/*.json"))
+
+def test_round_trip_and_counters(tmp_path):
+    cache = DiskCache(tmp_path)
+    assert cache.get("abc") is None
+    cache.put("abc", {"text": "ข้อความ"})
+    assert cache.get("abc") == {"text": "ข้อความ"}
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+def test_overwrite_replaces_size(tmp_path):
+    cache = DiskCache(tmp_path)
+    for i in range(50):
+        cache.put("same-key", {"value": "x" * 100, "i": i})
+    assert cache.stats()["bytes"] == disk_bytes(cache)
+
+def test_delete_subtracts_size(tmp_path):
+    cache = DiskCache(tmp_path)
+    cache.put("aa1", {"value": "x" * 100})
+    cache.put("bb2", {"value": "y" * 200})
+    cache.delete("aa1")
+    cache.delete("missing")
+    assert cache.get("aa1") is None
+    assert cache.stats()["bytes"] == disk_bytes(cache)
+
+def test_overwrites_do_not_trigger_eviction(tmp_path):
+    cache = DiskCache(tmp_path, max_bytes=1000)
+    cache.put("keep", {"value": "k" * 100})
+    for i in range(100):
+        cache.put("busy", {"value": "b" * 100, "i": i})
+    assert cache.stats()["evictions"] == 0
+    assert cache.get("keep") is not None
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = DiskCache(tmp_path, max_bytes=300)
+    cache.put("old", {"value": "o" * 100})
+    cache.put("new", {"value": "n" * 100})
+    cache.put("newest", {"value": "w" * 100})
+    assert cache.stats()["evictions"] >= 1
+    assert cache.get("newest") is not None
+    assert cache.stats()["bytes"] == disk_bytes(cache) <= 300
+
+def test_size_is_recomputed_on_open(tmp_path):
+    DiskCache(tmp_path).put("abc", {"value": 1})
+    assert DiskCache(tmp_path).stats()["bytes"] == disk_bytes(DiskCache(tmp_path))
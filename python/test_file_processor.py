@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""Tests for the upload paths of file_processor.FileProcessor"""
+
+import io
+import pytest
+from pathlib import Path
+from file_processor import FileProcessor
+
+def stored_files(processor):
+    return sorted(path for path in processor.store.blob_dir.rglob("*") if path.is_file())
+
+def published_files(processor):
+    return [path for root in (processor.backend_dir, processor.frontend_dir)
+            for path in root.rglob("*") if path.is_file()]
+
+def test_corrupt_image_leaves_nothing_behind(tmp_path):
+    pytest.importorskip("cv2")
+    processor = FileProcessor(tmp_path)
+    result = processor.process_image(b"not an image", "broken.jpg")
+    assert not result["success"]
+    assert stored_files(processor) == []
+    assert published_files(processor) == []
+
+def test_corrupt_audio_leaves_nothing_behind(tmp_path):
+    pytest.importorskip("soundfile")
+    processor = FileProcessor(tmp_path)
+    result = processor.process_audio(b"RIFF\x00\x00\x00\x00WAVEjunk", "broken.wav")
+    assert not result["success"]
+    assert stored_files(processor) == []
+    assert published_files(processor) == []
+
+def test_failed_upload_keeps_blob_stored_earlier(tmp_path):
+    pytest.importorskip("cv2")
+    processor = FileProcessor(tmp_path)
+    _, blob_path = processor.store.put_bytes(b"not an image", ".jpg")
+    assert not processor.process_image(b"not an image", "broken.jpg")["success"]
+    assert blob_path.exists()
+
+def test_image_derivatives_are_published(tmp_path):
+    pytest.importorskip("cv2")
+    from PIL import Image
+    buffer = io.BytesIO()
+    Image.new("RGB", (640, 480), "red").save(buffer, "JPEG")
+    processor = FileProcessor(tmp_path)
+    result = processor.process_image(buffer.getvalue(), "photo.jpg")
+    assert result["success"], result.get("error")
+    assert set(result["derivatives"]) >= {"model_input"}
+    for path in [result["backend_orig_path"], result["backend_processed_path"], result["frontend_processed_path"]]:
+        assert Path(path).exists()
+
+@pytest.mark.parametrize("head, extension", [
+    (b"RIFF\x24\x00\x00\x00WAVEfmt ", ".wav"),
+    (b"fLaC\x00\x00\x00\x22", ".flac"),
+    (b"OggS\x00\x02" + bytes(22) + b"\x01\x13OpusHead", ".opus"),
+    (b"OggS\x00\x02" + bytes(22) + b"\x01\x1e\x01vorbis", ".ogg"),
+    (b"\x1aE\xdf\xa3\x9fB\x86\x81\x01", ".webm"),
+    (b"\x00\x00\x00\x20ftypM4A \x00\x00\x00\x00", ".m4a"),
+    (b"FORM\x00\x00\x10\x00AIFFCOMM", ".aiff"),
+    (b"ID3\x04\x00\x00\x00\x00\x00\x00", ".mp3"),
+    (b"\xff\xfb\x90\x64\x00", ".mp3"),
+    (b"\xff\xf1\x50\x80\x02", ".aac"),
+    (b"%PDF-1.7\n", None),
+    (b"RIFF\x24\x00\x00\x00AVI LIST", None),
+    (b"", None),
+])
+def test_detect_audio_extension(head, extension):
+    from file_processor import detect_audio_extension
+    assert detect_audio_extension(head) == extension
+    assert detect_audio_extension(memoryview(head + bytes(100))) == extension
+
+def test_processed_audio_is_16_bit_flac_at_target_rate(tmp_path):
+    sf = pytest.importorskip("soundfile")
+    np = pytest.importorskip("numpy")
+    import audio_stream
+    
+    t = np.arange(44100 * 2) / 44100
+    tone = 0.3 * np.sin(2 * np.pi * 440 * t)
+    buffer = io.BytesIO()
+    sf.write(buffer, np.stack([tone, tone], axis=1), 44100, format="WAV", subtype="FLOAT")
+    
+    processor = FileProcessor(tmp_path, audio_format="FLAC", audio_preview=False)
+    result = processor.process_audio(buffer.getvalue(), "tone.wav")
+    assert result["success"], result.get("error")
+    assert result["format"] == "wav"
+    assert result["backend_orig_path"].endswith("_original.wav")
+    
+    processed = result["backend_processed_path"]
+    assert processed.endswith("_processed.flac")
+    with open(processed, "rb") as f:
+        assert f.read(4) == b"fLaC"
+    info = sf.info(processed)
+    assert info.format == "FLAC"
+    assert info.subtype == "PCM_16"
+    assert info.samplerate == audio_stream.TARGET_SAMPLE_RATE
+    assert info.channels == 1
+    assert abs(info.duration - 2.0) < 0.05
+    
+    samples, _ = sf.read(processed)
+    assert np.abs(samples).max() > 0.01
+
+def test_split_audio_parts_are_flac(tmp_path):
+    sf = pytest.importorskip("soundfile")
+    np = pytest.importorskip("numpy")
+    
+    rng = np.random.default_rng(0)
+    processed = tmp_path / "long_processed.flac"
+    sf.write(str(processed), 0.2 * rng.standard_normal(16000 * 3), 16000, format="FLAC", subtype="PCM_16")
+    
+    processor = FileProcessor(tmp_path / "uploads", audio_format="FLAC")
+    segments = processor.split_audio(processed, max_seconds=1)
+    assert len(segments) > 1
+    for segment in segments:
+        assert segment["backend_path"].endswith(".flac")
+        info = sf.info(segment["backend_path"])
+        assert (info.format, info.subtype, info.samplerate) == ("FLAC", "PCM_16", 16000)
@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+"""Tests for keyword_index.KeywordIndex"""
+
+from keyword_index import KeywordIndex
+
+def test_search_ranks_matching_documents(tmp_path):
+    index = KeywordIndex(tmp_path / "keywords.sqlite3")
+    assert index.add_document("a", "รายงานการประชุม งบประมาณ ประจำปี", "a.pdf", "/a.txt")
+    assert index.add_document("b", "quarterly budget review and forecast", "b.pdf", "/b.txt")
+    assert index.add_document("c", "team lunch menu", "c.pdf", "/c.txt")
+
+    [top] = index.search("งบประมาณ", top_k=1)
+    assert top["doc_id"] == "a" and top["filename"] == "a.pdf" and top["path"] == "/a.txt"
+    assert [result["doc_id"] for result in index.search("budget forecast")] == ["b"]
+    assert index.search("nothing matches this") == []
+    assert index.search("") == []
+
+def test_documents_are_indexed_once(tmp_path):
+    index = KeywordIndex(tmp_path / "keywords.sqlite3")
+    assert index.add_document("a", "budget")
+    assert not index.add_document("a", "budget")
+    assert index.contains("a") and not index.contains("b")
+    assert len(index.search("budget")) == 1
+
+def test_index_persists(tmp_path):
+    KeywordIndex(tmp_path / "keywords.sqlite3").add_document("a", "ข้อมูลสำคัญ")
+    assert KeywordIndex(tmp_path / "keywords.sqlite3").search("ข้อมูล")[0]["doc_id"] == "a"
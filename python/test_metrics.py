@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""Tests for metrics"""
+
+import json
+from metrics import (MetricsRegistry, StageTimer, merge_snapshots, render_prometheus, request_timer, stage,
+                     current_timer, LATENCY_BUCKETS)
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry()
+    registry.observe("aift_request_duration_seconds", 0.003, operation="pdf")
+    registry.observe("aift_request_duration_seconds", 2.0, operation="pdf")
+    (_, _, values), = registry.snapshot()["histograms"]
+    buckets = dict(zip(LATENCY_BUCKETS, values))
+    assert buckets[0.001] == 0 and buckets[0.005] == 1 and buckets[2.5] == 2
+    assert values[-2:] == [2.003, 2]
+
+def test_render_prometheus():
+    registry = MetricsRegistry()
+    registry.inc("aift_requests_total", operation="chat", status="ok")
+    registry.inc("aift_requests_total", 2, operation="chat", status="ok")
+    registry.observe("aift_request_duration_seconds", 0.2, operation='say "hi"')
+    text = registry.render()
+    assert "# TYPE aift_requests_total counter" in text
+    assert 'aift_requests_total{operation="chat",status="ok"} 3' in text
+    assert 'aift_request_duration_seconds_bucket{operation="say \\"hi\\"",le="+Inf"} 1' in text
+    assert 'aift_request_duration_seconds_count{operation="say \\"hi\\""} 1' in text
+
+def test_snapshots_from_several_processes_add_up(tmp_path):
+    first, second = MetricsRegistry(), MetricsRegistry()
+    for registry in (first, second):
+        registry.inc("aift_requests_total", operation="chat", status="ok")
+        registry.observe("aift_request_duration_seconds", 0.1, operation="chat")
+    merged = merge_snapshots([first.snapshot(), second.snapshot()])
+    assert merged["counters"][0][2] == 2
+    assert merged["histograms"][0][2][-1] == 2
+    assert "aift_requests_total" in render_prometheus(merged)
+
+def test_collect_reads_saved_snapshots(tmp_path):
+    # Snapshot left by another worker process
+    other = MetricsRegistry()
+    other.inc("aift_requests_total", operation="pdf", status="ok")
+    (tmp_path / "metrics-1.json").write_text(json.dumps(other.snapshot()))
+
+    registry = MetricsRegistry()
+    registry.persist(tmp_path)
+    registry.inc("aift_requests_total", operation="pdf", status="ok")
+    assert registry.collect()["counters"][0][2] == 2
+
+def test_stage_timer_attaches_timings():
+    timer = StageTimer("pdf", registry=MetricsRegistry())
+    with timer.stage("extract", 100):
+        pass
+    with timer.stage("extract") as record:
+        record.bytes = 50
+    result = timer.attach({"success": False})
+    assert result["timings"]["stages"]["extract"]["bytes"] == 150
+    assert timer.status == "error"
+
+def test_nested_request_joins_outer_timer():
+    with request_timer("pdf") as outer:
+        with request_timer("chat") as inner:
+            with stage("upstream", 10):
+                pass
+        assert inner is outer
+        assert "upstream" in outer.stages
+    assert current_timer() is None
+    with stage("outside") as record:
+        assert record.bytes is None
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+"""Tests for payload_reader"""
+
+import io
+import sys
+import base64
+import pytest
+from payload_reader import read_length_prefixed, write_length_prefixed, read_payload
+
+class Trickle(io.BytesIO):
+    """Binary stream that returns at most a few bytes per read, like a pipe"""
+
+    def readinto(self, buffer):
+        return super().readinto(memoryview(buffer)[:3])
+
+def test_length_prefixed_round_trip():
+    stream = io.BytesIO()
+    write_length_prefixed(stream, b"\x00\xffPDF")
+    write_length_prefixed(stream, b"")
+    stream.seek(0)
+    assert read_length_prefixed(stream) == b"\x00\xffPDF"
+    assert read_length_prefixed(stream) == b""
+
+def test_short_reads_are_reassembled():
+    payload = bytes(range(256)) * 10
+    stream = io.BytesIO()
+    write_length_prefixed(stream, payload)
+    assert read_length_prefixed(Trickle(stream.getvalue())) == payload
+
+def test_truncated_stream_is_an_error():
+    stream = io.BytesIO()
+    write_length_prefixed(stream, b"0123456789")
+    with pytest.raises(ValueError, match="after 4 of 10 bytes"):
+        read_length_prefixed(io.BytesIO(stream.getvalue()[:12]))
+    with pytest.raises(ValueError, match="before the length prefix"):
+        read_length_prefixed(io.BytesIO(b"\x00\x00"))
+
+def test_base64_rule_follows_the_suffix(tmp_path):
+    raw = b"\x89PNG\r\n\x1a\n" + bytes(100)
+    encoded = base64.b64encode(raw)
+    for name in ("upload.txt", "upload.B64"):
+        (tmp_path / name).write_bytes(encoded)
+        assert read_payload(str(tmp_path / name)) == raw
+    # Any other file is taken as the original bytes, even if it looks like base64
+    (tmp_path / "upload.png").write_bytes(encoded)
+    assert read_payload(tmp_path / "upload.png") == encoded
+
+def test_stdin(monkeypatch):
+    stream = io.BytesIO()
+    write_length_prefixed(stream, "ไฟล์".encode('utf-8'))
+    stream.seek(0)
+    monkeypatch.setattr(sys, "stdin", io.TextIOWrapper(stream))
+    assert read_payload("-").decode('utf-8') == "ไฟล์"
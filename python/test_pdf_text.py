@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""Tests for PDF text extraction and the page-offset index in file_processor"""
+
+import pytest
+from file_processor import FileProcessor, PDF_PARALLEL_MIN_PAGES
+
+pytest.importorskip("PyPDF2")
+
+def make_pdf(page_texts):
+    """Minimal PDF with one line of Helvetica text per page"""
+    count = len(page_texts)
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [" + b" ".join(b"%d 0 R" % (4 + 2 * i) for i in range(count))
+        + b"] /Count %d >>" % count,
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"
+    ]
+    for i, text in enumerate(page_texts):
+        stream = b"BT /F1 12 Tf 72 720 Td (" + text.encode('latin-1') + b") Tj ET"
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % (5 + 2 * i))
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+
+    pdf = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(pdf))
+        pdf += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(pdf)
+    pdf += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    pdf += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    pdf += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(pdf)
+
+PAGES = [f"Page {i} of the report" for i in range(PDF_PARALLEL_MIN_PAGES + 8)]
+
+def test_parallel_extraction_matches_sequential(tmp_path):
+    pdf = make_pdf(PAGES)
+    sequential = list(FileProcessor(tmp_path / "a", pdf_workers=1).iter_pdf_pages(pdf))
+    parallel = list(FileProcessor(tmp_path / "b", pdf_workers=3).iter_pdf_pages(pdf))
+    assert parallel == sequential
+    assert [number for number, _ in parallel] == list(range(len(PAGES)))
+    assert [text.strip() for _, text in parallel] == PAGES
+
+def test_page_offsets_line_up_with_pages(tmp_path):
+    processor = FileProcessor(tmp_path)
+    pages = ["  \n", "สวัสดี ครับ  ", "", "second page\n\n", "ท้าย\n"]
+    text, blob_path, offsets = processor._write_pdf_text(enumerate(pages))
+    data = blob_path.read_bytes()
+    assert data.decode('utf-8') == text == "\n".join(pages).strip()
+    assert len(offsets) == len(pages)
+    for (start, end), page in zip(offsets, pages):
+        assert data[start:end].decode('utf-8').strip() == page.strip()
+    # Ranges are in order and never overlap
+    assert all(a[1] <= b[0] for a, b in zip(offsets, offsets[1:]))
+
+def test_read_pdf_page(tmp_path):
+    processor = FileProcessor(tmp_path)
+    result = processor.process_pdf(make_pdf(PAGES[:5]), "report.pdf")
+    assert result["success"], result.get("error")
+    assert result["page_count"] == 5
+    for number in (0, 2, 4):
+        page = processor.read_pdf_page(result["backend_text_path"], result["backend_page_index_path"], number)
+        assert page.strip() == PAGES[number]
+
+    # A second upload is served from the extraction cache with the same index
+    again = processor.process_pdf(make_pdf(PAGES[:5]), "copy.pdf")
+    assert again["cache_hit"]
+    assert processor.read_pdf_page(again["backend_text_path"], again["backend_page_index_path"], 3).strip() == PAGES[3]
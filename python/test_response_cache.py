@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+"""Tests for response_cache.ResponseCache"""
+
+import time
+from response_cache import ResponseCache, normalize_prompt
+
+def test_equivalent_prompts_share_a_key():
+    assert normalize_prompt("  สวัสดี \n ครับ ") == "สวัสดี ครับ"
+    # NFC and NFD spellings of the same text
+    assert ResponseCache.make_key("café") == ResponseCache.make_key("café")
+    assert ResponseCache.make_key("a", temperature=0.2) != ResponseCache.make_key("a", temperature=0.7)
+    assert ResponseCache.make_key("a", sessionid="x") != ResponseCache.make_key("a", sessionid="y")
+
+def test_round_trip_and_stats(tmp_path):
+    cache = ResponseCache(tmp_path / "responses.sqlite3")
+    key = ResponseCache.make_key("q")
+    assert cache.get(key) is None
+    cache.put(key, {"answer": "ใช่"})
+    assert cache.get(key) == {"answer": "ใช่"}
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+
+def test_expired_entries_miss(tmp_path):
+    cache = ResponseCache(tmp_path / "responses.sqlite3")
+    cache.put("k", "old", ttl=-1)
+    assert cache.get("k") is None
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = ResponseCache(tmp_path / "responses.sqlite3", max_entries=2)
+    for action in [lambda: cache.put("a", "1"), lambda: cache.put("b", "2"), lambda: cache.get("a")]:
+        action()
+        # Keep last_access strictly ordered
+        time.sleep(0.002)
+    cache.put("c", "3")
+    assert cache.get("b") is None
+    assert cache.get("a") == "1" and cache.get("c") == "3"
+
+def test_skip_sampled(tmp_path):
+    cache = ResponseCache(tmp_path / "responses.sqlite3", skip_sampled=True)
+    assert cache.enabled_for(0)
+    assert not cache.enabled_for(0.7)
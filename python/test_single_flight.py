@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""Tests for single_flight.SingleFlight"""
+
+import threading
+import pytest
+from single_flight import SingleFlight
+
+def run_concurrently(flight, key, fn, count):
+    results = [None] * count
+    errors = [None] * count
+
+    def worker(i):
+        try:
+            results[i] = flight.do(key, fn)
+        except Exception as e:
+            errors[i] = e
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, results, errors
+
+def test_identical_calls_share_one_upstream_call():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        release.wait(5)
+        return "answer"
+
+    threads, results, errors = run_concurrently(flight, "k", fetch, 8)
+    while flight.stats()["coalesced"] < 7:
+        threading.Event().wait(0.01)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert calls == [1]
+    assert results == ["answer"] * 8
+    assert flight.stats() == {"calls": 1, "coalesced": 7, "in_flight": 0}
+
+def test_error_reaches_every_waiter():
+    flight = SingleFlight()
+    release = threading.Event()
+
+    def fetch():
+        release.wait(5)
+        raise RuntimeError("upstream down")
+
+    threads, results, errors = run_concurrently(flight, "k", fetch, 4)
+    while flight.stats()["coalesced"] < 3:
+        threading.Event().wait(0.01)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert all(isinstance(e, RuntimeError) for e in errors)
+
+def test_finished_calls_are_not_reused():
+    flight = SingleFlight()
+    assert flight.do("k", lambda: 1) == 1
+    assert flight.do("k", lambda: 2) == 2
+    with pytest.raises(ValueError):
+        flight.do("k", lambda: int("x"))
+    assert flight.stats() == {"calls": 3, "coalesced": 0, "in_flight": 0}
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""Tests for stream_events"""
+
+import io
+import json
+from stream_events import iter_upstream, stream_answer, pop_stream_flag, format_ndjson, format_sse, write_events
+
+def test_complete_answer_is_one_piece():
+    assert list(iter_upstream("สวัสดีครับ")) == ["สวัสดีครับ"]
+    assert list(iter_upstream("สวัสดี".encode('utf-8'))) == ["สวัสดี"]
+    assert list(iter_upstream({"answer": "ใช่"})) == ['{"answer": "ใช่"}']
+    assert list(iter_upstream("")) == []
+    assert list(iter_upstream(None)) == []
+
+def test_iterator_is_relayed_as_it_arrives():
+    produced = []
+
+    def upstream():
+        for piece in ["สวัส", b"\xe0\xb8\x94\xe0\xb8\xb5", "", "ครับ"]:
+            produced.append(piece)
+            yield piece
+
+    pieces = iter_upstream(upstream())
+    assert next(pieces) == "สวัส"
+    # Nothing is read ahead of what has been yielded
+    assert len(produced) == 1
+    assert list(pieces) == ["ดี", "ครับ"]
+
+def test_stream_answer_events():
+    events = list(stream_answer(iter(["a", "b"]), {"sessionid": "s"}, {"cached": False}))
+    assert events == [
+        {"type": "start", "sessionid": "s"},
+        {"type": "delta", "text": "a"},
+        {"type": "delta", "text": "b"},
+        {"type": "done", "success": True, "response": "ab", "cached": False}
+    ]
+
+def test_stream_answer_reports_upstream_error():
+    def failing():
+        yield "partial"
+        raise RuntimeError("upstream closed")
+
+    events = list(stream_answer(failing()))
+    assert [event["type"] for event in events] == ["start", "delta", "error"]
+    assert events[-1] == {"type": "error", "success": False, "error": "upstream closed"}
+
+def test_pop_stream_flag():
+    assert pop_stream_flag(["chat", "--stream", "hi"]) == ("ndjson", ["chat", "hi"])
+    assert pop_stream_flag(["--stream=sse", "hi"]) == ("sse", ["hi"])
+    assert pop_stream_flag(["--stream=", "hi"]) == ("ndjson", ["hi"])
+    assert pop_stream_flag(["hi"]) == (None, ["hi"])
+
+def test_framing():
+    event = {"type": "delta", "text": "ไทย\nline"}
+    line = format_ndjson(event)
+    assert line.endswith("\n") and line.count("\n") == 1
+    assert json.loads(line) == event
+
+    frame = format_sse(event)
+    assert frame.startswith("event: delta\ndata: ")
+    assert frame.endswith("\n\n")
+    assert json.loads(frame.split("data: ", 1)[1]) == event
+
+def test_write_events_flushes_each_event():
+    class Recorder(io.StringIO):
+        flushes = 0
+
+        def flush(self):
+            self.flushes += 1
+
+    out = Recorder()
+    write_events(stream_answer(iter(["x"])), out)
+    assert out.flushes == 3
+    assert [json.loads(line)["type"] for line in out.getvalue().splitlines()] == ["start", "delta", "done"]
@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+"""Tests for text_chunker"""
+
+from text_chunker import THAI_COMBINING, estimate_tokens, chunk_text, select_relevant_text
+
+def test_chunks_are_bounded_and_cover_the_text():
+    text = "\n\n".join(f"ย่อหน้าที่ {i} เกี่ยวกับเรื่องทั่วไป. Paragraph {i} text." for i in range(200))
+    chunks = chunk_text(text, max_tokens=100, overlap_tokens=20)
+    assert len(chunks) > 1
+    assert all(estimate_tokens(chunk) <= 100 for chunk in chunks)
+    for i in range(200):
+        assert any(f"Paragraph {i} " in chunk for chunk in chunks)
+
+def test_long_thai_run_is_not_cut_inside_a_cluster():
+    # No spaces or punctuation, so the run must be split by length
+    text = "ที่นี่น้ำใส" * 200
+    chunks = chunk_text(text, max_tokens=50, overlap_tokens=0)
+    assert "".join(chunks) == text
+    assert all(not THAI_COMBINING.match(chunk[0]) for chunk in chunks)
+
+def test_short_text_is_sent_whole():
+    prompt_text, info = select_relevant_text("สั้น ๆ", "อะไร")
+    assert prompt_text == "สั้น ๆ"
+    assert not info["chunked"]
+
+def test_long_text_keeps_the_relevant_chunk():
+    filler = [f"Section {i}: routine notes about inventory and staffing." for i in range(400)]
+    filler[250] = "Section 250: the reactor coolant pressure limit is 155 bar."
+    prompt_text, info = select_relevant_text("\n\n".join(filler), "What is the coolant pressure limit?",
+                                             max_tokens=400, chunk_tokens=100, overlap_tokens=10)
+    assert info["chunked"]
+    assert "155 bar" in prompt_text
+    assert estimate_tokens(prompt_text) <= 400 + 20
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""Tests for vector_index.VectorIndex"""
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from vector_index import VectorIndex, EMBEDDING_DIM
+
+def build(index_dir):
+    index = VectorIndex(index_dir)
+    assert index.add_document("a", "รายงานการประชุม งบประมาณ ประจำปี", "a.pdf", "/a.txt") == 1
+    assert index.add_document("b", "quarterly budget review and forecast", "b.pdf", "/b.txt") == 1
+    assert index.add_document("c", "team lunch menu", "c.pdf", "/c.txt") == 1
+    return index
+
+def test_search_ranks_matching_documents(tmp_path):
+    index = build(tmp_path)
+    [top] = index.search("งบประมาณ", top_k=1)
+    assert top["doc_id"] == "a" and top["filename"] == "a.pdf" and top["path"] == "/a.txt"
+    assert index.search("budget forecast")[0]["doc_id"] == "b"
+    assert index.search("") == []
+
+def test_documents_are_indexed_once(tmp_path):
+    index = build(tmp_path)
+    assert index.add_document("a", "budget forecast " * 500) == 0
+    assert index.contains("a") and not index.contains("d")
+    assert index.row_count() == 3
+
+def test_long_document_keeps_one_result(tmp_path):
+    index = VectorIndex(tmp_path)
+    assert index.add_document("long", "budget forecast notes. " * 2000) > 1
+    assert [result["doc_id"] for result in index.search("budget")] == ["long"]
+
+def test_index_persists(tmp_path):
+    build(tmp_path)
+    reopened = VectorIndex(tmp_path)
+    assert reopened.contains("b")
+    assert reopened.search("budget forecast")[0]["doc_id"] == "b"
+
+def test_recovers_from_torn_matrix_row(tmp_path):
+    index = build(tmp_path)
+    # A writer crashed part way through a row
+    with open(index.vectors_path, 'ab') as f:
+        f.write(b"\x00" * (EMBEDDING_DIM * 4 // 2))
+
+    reopened = VectorIndex(tmp_path)
+    assert reopened.contains("c") and not reopened.contains("lost")
+    assert reopened.row_count() == 3
+    assert reopened.search("budget forecast")[0]["doc_id"] == "b"
+    assert reopened.add_document("d", "menu for the team dinner") == 1
+    assert index.vectors_path.stat().st_size == 4 * EMBEDDING_DIM * 4
+    assert reopened.search("dinner")[0]["doc_id"] == "d"
+
+def test_recovers_from_torn_id_line(tmp_path):
+    index = build(tmp_path)
+    # Vector written, ID line cut short
+    with open(index.vectors_path, 'ab') as f:
+        f.write(b"\x00" * (EMBEDDING_DIM * 4))
+    with open(index.ids_path, 'ab') as f:
+        f.write(b'{"doc_id": "lost", "chu')
+
+    reopened = VectorIndex(tmp_path)
+    assert reopened.contains("c") and not reopened.contains("lost")
+    assert reopened.row_count() == 3
+    assert reopened.add_document("d", "menu for the team dinner") == 1
+    assert VectorIndex(tmp_path).search("dinner")[0]["doc_id"] == "d"
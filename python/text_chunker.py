@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Text Chunker
+Thai-aware chunking of extracted text and local retrieval of the chunks
+most relevant to a question, so prompts stay within a fixed token budget
+"""
+
+import re
+import math
+from collections import Counter
+
+# Optional Thai word segmentation
+try:
+    from pythainlp.tokenize import word_tokenize as thai_word_tokenize
+    THAI_TOKENIZER_AVAILABLE = True
+except ImportError:
+    THAI_TOKENIZER_AVAILABLE = False
+
+# Rough token costs: Thai script packs fewer characters per model token
+THAI_CHARS_PER_TOKEN = 2.5
+OTHER_CHARS_PER_TOKEN = 4.0
+
+CHUNK_TOKENS = 400
+CHUNK_OVERLAP_TOKENS = 60
+PROMPT_TEXT_TOKENS = 3000
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+THAI_CHAR = re.compile(r'[\u0e00-\u0e7f]')
+# Vowel and tone marks that must stay attached to the preceding consonant
+THAI_COMBINING = re.compile(r'[\u0e31\u0e34-\u0e3a\u0e47-\u0e4e]')
+THAI_RUN = re.compile(r'[\u0e00-\u0e7f]+')
+WORD = re.compile(r'[^\W_]+', re.UNICODE)
+# Paragraph breaks, line breaks, whitespace between Thai phrases, Latin sentence ends
+SEGMENT_BREAK = re.compile(r'(\n\s*\n|\n|(?<=[.!?])\s+|\s+)')
+
+def estimate_tokens(text):
+    """Estimate the model token count of a text"""
+    thai_chars = len(THAI_CHAR.findall(text))
+    other_chars = len(text) - thai_chars
+    return int(math.ceil(thai_chars / THAI_CHARS_PER_TOKEN + other_chars / OTHER_CHARS_PER_TOKEN))
+
+def _split_long_segment(segment, max_tokens):
+    """Split a segment with no usable break points without cutting Thai clusters"""
+    pieces = []
+    start = 0
+    step = max(1, int(max_tokens * THAI_CHARS_PER_TOKEN))
+    while start < len(segment):
+        end = min(start + step, len(segment))
+        while end < len(segment) and THAI_COMBINING.match(segment[end]):
+            end += 1
+        pieces.append(segment[start:end])
+        start = end
+    return pieces
+
+def _segments(text, max_tokens):
+    """Split text into small units that chunk boundaries may fall between"""
+    segments = []
+    for part in SEGMENT_BREAK.split(text):
+        if not part or part.isspace():
+            if part and segments:
+                segments[-1] += part
+            continue
+        if estimate_tokens(part) > max_tokens:
+            segments.extend(_split_long_segment(part, max_tokens))
+        else:
+            segments.append(part)
+    return segments
+
+def chunk_text(text, max_tokens=CHUNK_TOKENS, overlap_tokens=CHUNK_OVERLAP_TOKENS):
+    """Split text into overlapping chunks of at most about max_tokens tokens"""
+    segments = _segments(text, max_tokens)
+    chunks = []
+    current = []
+    current_tokens = 0
+
+    for segment in segments:
+        tokens = estimate_tokens(segment)
+        if current and current_tokens + tokens > max_tokens:
+            chunks.append("".join(current).strip())
+
+            # Carry the tail of the previous chunk over as overlap
+            overlap = []
+            overlap_count = 0
+            for previous in reversed(current):
+                previous_tokens = estimate_tokens(previous)
+                if overlap_count + previous_tokens > overlap_tokens:
+                    break
+                overlap.insert(0, previous)
+                overlap_count += previous_tokens
+            current = overlap
+            current_tokens = overlap_count
+
+        current.append(segment)
+        current_tokens += tokens
+
+    if current:
+        chunks.append("".join(current).strip())
+
+    return [chunk for chunk in chunks if chunk]
+
+def tokenize(text):
+    """Tokenize for retrieval: words for Latin text, words or character bigrams for Thai"""
+    tokens = []
+    for word in WORD.findall(text.lower()):
+        if not THAI_RUN.search(word):
+            tokens.append(word)
+            continue
+        for run in THAI_RUN.findall(word):
+            if THAI_TOKENIZER_AVAILABLE:
+                tokens.extend(t for t in thai_word_tokenize(run, keep_whitespace=False) if t.strip())
+            elif len(run) == 1:
+                tokens.append(run)
+            else:
+                tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+        tokens.extend(part for part in THAI_RUN.split(word) if part)
+    return tokens
+
+class ChunkRetriever:
+    """In-memory BM25 ranking of chunks against a question"""
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.term_counts = [Counter(tokenize(chunk)) for chunk in chunks]
+        self.lengths = [sum(counts.values()) for counts in self.term_counts]
+        self.avg_length = (sum(self.lengths) / len(self.lengths)) if self.lengths else 0.0
+        self.doc_freq = Counter()
+        for counts in self.term_counts:
+            self.doc_freq.update(counts.keys())
+
+    def score(self, query_terms, index):
+        counts = self.term_counts[index]
+        length_norm = 1 - BM25_B + BM25_B * self.lengths[index] / (self.avg_length or 1.0)
+        total = 0.0
+        for term in query_terms:
+            tf = counts.get(term)
+            if not tf:
+                continue
+            df = self.doc_freq[term]
+            idf = math.log(1 + (len(self.chunks) - df + 0.5) / (df + 0.5))
+            total += idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * length_norm)
+        return total
+
+    def top_k(self, question, k):
+        """Return the indices of the k best chunks, in document order"""
+        query_terms = set(tokenize(question))
+        scores = [(self.score(query_terms, i), i) for i in range(len(self.chunks))]
+        best = [i for score, i in sorted(scores, key=lambda item: (-item[0], item[1]))[:k] if score > 0]
+
+        # Too few matches (e.g. "summarize this"): fill up with chunks
+        # spread evenly across the document
+        if len(best) < k:
+            step = len(self.chunks) / max(k, 1)
+            for i in range(k):
+                index = int(i * step)
+                if len(best) >= k or index >= len(self.chunks):
+                    break
+                if index not in best:
+                    best.append(index)
+
+        return sorted(best)
+
+def select_relevant_text(text, question, max_tokens=PROMPT_TEXT_TOKENS,
+                         chunk_tokens=CHUNK_TOKENS, overlap_tokens=CHUNK_OVERLAP_TOKENS):
+    """Return (prompt_text, info) holding the full text or its most relevant chunks"""
+    total_tokens = estimate_tokens(text)
+    if total_tokens <= max_tokens:
+        return text, {"chunked": False, "estimated_tokens": total_tokens}
+
+    chunks = chunk_text(text, chunk_tokens, overlap_tokens)
+    k = max(1, max_tokens // chunk_tokens)
+    selected = ChunkRetriever(chunks).top_k(question, k)
+    prompt_text = "\n\n[...]\n\n".join(chunks[i] for i in selected)
+
+    return prompt_text, {
+        "chunked": True,
+        "estimated_tokens": total_tokens,
+        "prompt_tokens": estimate_tokens(prompt_text),
+        "chunk_count": len(chunks),
+        "selected_chunks": selected
+    }
@@ -12,6 +12,8 @@ import base64
 import tempfile
 from pathlib import Path
 from file_processor import FileProcessor
+from payload_reader import read_length_prefixed
+from metrics import stage, timed
 
 class UploadHandler:
     def __init__(self, upload_dir="uploads"):
@@ -21,25 +23,28 @@ class UploadHandler:
         # Create upload directories
         self.upload_dir.mkdir(parents=True, exist_ok=True)
         
+    @timed("text")
     def handle_text_upload(self, text_content, filename):
         """Handle text upload"""
         try:
-            # Generate output filename
-            base_name = Path(filename).stem
-            timestamp = int(os.path.getmtime(tempfile.mktemp()))
-            
-            # Save text to backend
-            backend_text_path = self.processor.backend_dir / "text" / f"{base_name}_{timestamp}.txt"
-            with open(backend_text_path, 'w', encoding='utf-8') as f:
-                f.write(text_content)
+            with stage("decode") as decode:
+                if isinstance(text_content, (bytes, bytearray, memoryview)):
+                    text_content = bytes(text_content).decode('utf-8')
+                text_bytes = text_content.encode('utf-8')
+                decode.bytes = len(text_bytes)
             
-            # Save text to frontend
-            frontend_text_path = self.processor.frontend_dir / "text" / f"{base_name}_{timestamp}.txt"
-            with open(frontend_text_path, 'w', encoding='utf-8') as f:
-                f.write(text_content)
+            # Save text once, named by its content hash
+            base_name = Path(filename).stem
+            with stage("store_original", len(text_bytes)):
+                digest, text_blob = self.processor.store.put_bytes(text_bytes, '.txt')
+                backend_text_path, frontend_text_path = self.processor.publish(
+                    text_blob, "text", f"{base_name}_{digest[:16]}.txt")
+            with stage("index", len(text_bytes)):
+                self.processor.index_text(digest, text_content, filename, backend_text_path)
             
             return {
                 "success": True,
+                "sha256": digest,
                 "text_content": text_content,
                 "backend_text_path": str(backend_text_path),
                 "frontend_text_path": str(frontend_text_path),
@@ -91,18 +96,28 @@ class UploadHandler:
 def main():
     """Main function for command line usage"""
     if len(sys.argv) < 4:
-        print("Usage: python upload_handler.py <file_type> <filename> <base64_data>")
+        print("Usage: python upload_handler.py <file_type> <filename> <file_path | - | base64_data>")
         sys.exit(1)
     
     file_type = sys.argv[1]
     filename = sys.argv[2]
-    base64_data = sys.argv[3]
+    source = sys.argv[3]
+    
+    # Raw bytes come from a file path or a length-prefixed stdin stream;
+    # anything else is treated as legacy inline base64
+    if source == '-':
+        file_data = read_length_prefixed(sys.stdin.buffer)
+    elif os.path.isfile(source):
+        with open(source, 'rb') as f:
+            file_data = f.read()
+    else:
+        file_data = source
     
     # Initialize handler
     handler = UploadHandler()
     
     # Process upload
-    result = handler.process_upload(base64_data, filename, file_type)
+    result = handler.process_upload(file_data, filename, file_type)
     
     # Output result as JSON
     print(json.dumps(result, indent=2))
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Vector Index Script
+Local on-disk vector index over uploaded document text.
+
+Chunks are embedded with a hashing embedder (no model download needed) and
+appended to a float32 matrix file that is memory-mapped for search, so a
+query is a single matrix-vector product however many documents are indexed.
+
+Layout of the index directory:
+- vectors.f32: row-major float32 matrix, one row per chunk
+- ids.jsonl: one JSON object per row (doc_id, chunk, filename, path, text preview)
+- .lock: advisory lock serializing writers
+"""
+
+import os
+import sys
+import json
+import zlib
+import math
+import fcntl
+import argparse
+import threading
+from pathlib import Path
+from collections import Counter
+from text_chunker import tokenize, chunk_text
+
+# Vector math
+try:
+    import numpy as np
+    VECTOR_AVAILABLE = True
+except ImportError:
+    VECTOR_AVAILABLE = False
+
+EMBEDDING_DIM = 256
+INDEX_CHUNK_TOKENS = 200
+INDEX_CHUNK_OVERLAP_TOKENS = 30
+PREVIEW_CHARS = 200
+
+class HashingEmbedder:
+    """Signed feature hashing of retrieval tokens into a fixed-size unit vector"""
+
+    def __init__(self, dim=EMBEDDING_DIM):
+        self.dim = dim
+
+    def embed(self, text):
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for token, count in Counter(tokenize(text)).items():
+            # crc32 is stable across processes, unlike hash()
+            h = zlib.crc32(token.encode('utf-8'))
+            sign = 1.0 if h & 0x80000000 else -1.0
+            vector[h % self.dim] += sign * (1.0 + math.log(count))
+
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vector /= norm
+        return vector
+
+    def embed_many(self, texts):
+        matrix = np.empty((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            matrix[row] = self.embed(text)
+        return matrix
+
+class VectorIndex:
+    """Append-only chunk embedding matrix with an ID map"""
+
+    def __init__(self, index_dir="uploads/index/vectors", dim=EMBEDDING_DIM):
+        if not VECTOR_AVAILABLE:
+            raise ImportError("numpy is required for the vector index")
+
+        self.index_dir = Path(index_dir)
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        self.vectors_path = self.index_dir / "vectors.f32"
+        self.ids_path = self.index_dir / "ids.jsonl"
+        self.lock_path = self.index_dir / ".lock"
+        self.embedder = HashingEmbedder(dim)
+        self.dim = dim
+        self.row_bytes = dim * 4
+
+        # ID map rows loaded so far and the ids.jsonl offset they end at
+        self.rows = []
+        self.doc_ids = set()
+        self._ids_offset = 0
+        self._lock = threading.Lock()
+
+    def _refresh(self):
+        """Load ID map rows appended since the last call (possibly by other processes)"""
+        if not self.ids_path.exists():
+            return
+        with open(self.ids_path, 'rb') as f:
+            f.seek(self._ids_offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                row = json.loads(line)
+                self.rows.append(row)
+                self.doc_ids.add(row["doc_id"])
+                self._ids_offset += len(line)
+
+    def row_count(self):
+        """Number of rows present in both the matrix and the ID map"""
+        matrix_rows = self.vectors_path.stat().st_size // self.row_bytes if self.vectors_path.exists() else 0
+        return min(matrix_rows, len(self.rows))
+
+    def contains(self, doc_id):
+        with self._lock:
+            self._refresh()
+            return doc_id in self.doc_ids
+
+    def add_document(self, doc_id, text, filename="", path=""):
+        """Chunk, embed and append a document; returns the number of rows added"""
+        # Re-uploads of an indexed document are common (extraction cache
+        # hits), so skip the chunking and embedding for them up front
+        if self.contains(doc_id):
+            return 0
+
+        chunks = chunk_text(text, INDEX_CHUNK_TOKENS, INDEX_CHUNK_OVERLAP_TOKENS)
+        if not chunks:
+            return 0
+
+        matrix = self.embedder.embed_many(chunks)
+
+        with self._lock, open(self.lock_path, 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                self._refresh()
+                if doc_id in self.doc_ids:
+                    return 0
+
+                # Drop any torn rows or ID line left by a crashed writer, then
+                # append matrix rows before their ID lines so readers never
+                # see an ID without a vector
+                existing_rows = len(self.rows)
+                with open(self.vectors_path, 'ab') as f:
+                    f.truncate(existing_rows * self.row_bytes)
+                    f.write(matrix.tobytes())
+
+                with open(self.ids_path, 'ab') as f:
+                    f.truncate(self._ids_offset)
+                    for number, chunk in enumerate(chunks):
+                        row = {
+                            "doc_id": doc_id,
+                            "chunk": number,
+                            "filename": filename,
+                            "path": str(path),
+                            "preview": chunk[:PREVIEW_CHARS]
+                        }
+                        f.write(json.dumps(row, ensure_ascii=False).encode('utf-8') + b"\n")
+
+                self._refresh()
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+        return len(chunks)
+
+    def search(self, query, top_k=10):
+        """Return the top_k documents for a query, scored by their best chunk"""
+        with self._lock:
+            self._refresh()
+            rows = self.row_count()
+        if rows == 0:
+            return []
+
+        matrix = np.memmap(self.vectors_path, dtype=np.float32, mode='r', shape=(rows, self.dim))
+        scores = matrix @ self.embedder.embed(query)
+
+        # Over-fetch chunks so several chunks of one document still leave top_k documents
+        candidates = min(rows, top_k * 8)
+        best = np.argpartition(-scores, candidates - 1)[:candidates]
+        best = best[np.argsort(-scores[best])]
+
+        results = []
+        seen = set()
+        for row_number in best:
+            score = float(scores[row_number])
+            if score <= 0:
+                break
+            row = self.rows[row_number]
+            if row["doc_id"] in seen:
+                continue
+            seen.add(row["doc_id"])
+            results.append({
+                "doc_id": row["doc_id"],
+                "filename": row["filename"],
+                "path": row["path"],
+                "chunk": row["chunk"],
+                "preview": row["preview"],
+                "score": round(score, 4)
+            })
+            if len(results) >= top_k:
+                break
+
+        return results
+
+def main():
+    parser = argparse.ArgumentParser(description='Search or extend the local vector index')
+    parser.add_argument('command', choices=['search', 'add'], help='Operation')
+    parser.add_argument('text', help='Query for search, or path of a UTF-8 text file for add')
+    parser.add_argument('--index-dir', default='uploads/index/vectors', help='Index directory')
+    parser.add_argument('--top-k', type=int, default=10, help='Number of documents to return')
+    parser.add_argument('--doc-id', help='Document ID for add (defaults to the file name)')
+
+    args = parser.parse_args()
+    index = VectorIndex(args.index_dir)
+
+    if args.command == 'search':
+        result = {"success": True, "results": index.search(args.text, args.top_k)}
+    else:
+        with open(args.text, 'r', encoding='utf-8') as f:
+            text = f.read()
+        doc_id = args.doc_id or Path(args.text).name
+        result = {"success": True, "rows_added": index.add_document(doc_id, text, Path(args.text).name, args.text)}
+
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+if __name__ == "__main__":
+    main()